@@ -0,0 +1,42 @@
+"""create training_jobs table
+
+Revision ID: 3e6b1d9a4f25
+Revises: 9a1f3c7d2e60
+Create Date: 2026-10-17 14:05:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3e6b1d9a4f25"
+down_revision: Union[str, Sequence[str], None] = "9a1f3c7d2e60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "training_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), onupdate=sa.func.now()),
+        sa.Column("stage", sa.String(length=10), nullable=False, index=True),
+        sa.Column("status", sa.String(length=20), nullable=False, index=True),
+        sa.Column("version", sa.String(length=50), nullable=True),
+        sa.Column("stage_timings", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("training_jobs")
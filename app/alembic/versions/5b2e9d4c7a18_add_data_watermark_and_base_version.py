@@ -0,0 +1,36 @@
+"""add data_watermark and base_version to model_versions
+
+Revision ID: 5b2e9d4c7a18
+Revises: a8d3f6c2e917
+Create Date: 2026-10-17 18:20:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5b2e9d4c7a18"
+down_revision: Union[str, Sequence[str], None] = "a8d3f6c2e917"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "model_versions",
+        sa.Column("data_watermark", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "model_versions",
+        sa.Column("base_version", sa.String(length=50), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("model_versions", "base_version")
+    op.drop_column("model_versions", "data_watermark")
@@ -0,0 +1,47 @@
+"""create rescoring_jobs table
+
+Revision ID: 5c2d8e41a7f3
+Revises: b943afc54cd1
+Create Date: 2026-10-17 10:12:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5c2d8e41a7f3"
+down_revision: Union[str, Sequence[str], None] = "b943afc54cd1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "rescoring_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), onupdate=sa.func.now()),
+        sa.Column("stage", sa.String(length=10), nullable=False, index=True),
+        sa.Column("version", sa.String(length=50), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False, index=True),
+        sa.Column("total_episodes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "processed_episodes", sa.Integer(), nullable=False, server_default="0"
+        ),
+        sa.Column("updated_episodes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_episode_id", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("rescoring_jobs")
@@ -0,0 +1,32 @@
+"""add hyperparameters and search to model_versions
+
+Revision ID: 7c4a2e8f1b93
+Revises: 3e6b1d9a4f25
+Create Date: 2026-10-17 15:20:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7c4a2e8f1b93"
+down_revision: Union[str, Sequence[str], None] = "3e6b1d9a4f25"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "model_versions", sa.Column("hyperparameters", sa.JSON(), nullable=True)
+    )
+    op.add_column("model_versions", sa.Column("search", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("model_versions", "search")
+    op.drop_column("model_versions", "hyperparameters")
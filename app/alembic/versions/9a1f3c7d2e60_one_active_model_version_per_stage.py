@@ -0,0 +1,62 @@
+"""one active model version per stage
+
+Revision ID: 9a1f3c7d2e60
+Revises: 5c2d8e41a7f3
+Create Date: 2026-10-17 11:40:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9a1f3c7d2e60"
+down_revision: Union[str, Sequence[str], None] = "5c2d8e41a7f3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Si algún stage quedó con más de una version activa, se conserva la más reciente
+    op.execute(
+        sa.text(
+            """
+            UPDATE model_versions AS mv
+            SET active = FALSE
+            WHERE mv.active
+              AND mv.id <> (
+                SELECT MAX(other.id)
+                FROM model_versions AS other
+                WHERE other.stage = mv.stage AND other.active
+              )
+            """
+        )
+    )
+    # Índice único parcial (stage WHERE active) como restricción de exclusión
+    # diferida: un único UPDATE que mueve el flag entre dos filas se valida al
+    # hacer commit y no fila por fila
+    op.execute(
+        sa.text(
+            """
+            ALTER TABLE model_versions
+            ADD CONSTRAINT uq_model_versions_one_active_per_stage
+            EXCLUDE USING btree (stage WITH =) WHERE (active)
+            DEFERRABLE INITIALLY DEFERRED
+            """
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        sa.text(
+            """
+            ALTER TABLE model_versions
+            DROP CONSTRAINT uq_model_versions_one_active_per_stage
+            """
+        )
+    )
@@ -0,0 +1,31 @@
+"""add dataset_fingerprint to model_versions
+
+Revision ID: a8d3f6c2e917
+Revises: 7c4a2e8f1b93
+Create Date: 2026-10-17 16:10:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a8d3f6c2e917"
+down_revision: Union[str, Sequence[str], None] = "7c4a2e8f1b93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "model_versions",
+        sa.Column("dataset_fingerprint", sa.String(length=64), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("model_versions", "dataset_fingerprint")
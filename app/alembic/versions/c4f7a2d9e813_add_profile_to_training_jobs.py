@@ -0,0 +1,28 @@
+"""add profile to training_jobs
+
+Revision ID: c4f7a2d9e813
+Revises: 5b2e9d4c7a18
+Create Date: 2026-10-17 19:05:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c4f7a2d9e813"
+down_revision: Union[str, Sequence[str], None] = "5b2e9d4c7a18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("training_jobs", sa.Column("profile", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("training_jobs", "profile")
@@ -0,0 +1,30 @@
+"""add training_stats to training_jobs
+
+Revision ID: d9b3e5f1a274
+Revises: c4f7a2d9e813
+Create Date: 2026-10-17 21:40:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d9b3e5f1a274"
+down_revision: Union[str, Sequence[str], None] = "c4f7a2d9e813"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "training_jobs", sa.Column("training_stats", sa.JSON(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("training_jobs", "training_stats")
@@ -0,0 +1,38 @@
+"""add features_updated_at to episodes and data_max_episode_id to model_versions
+
+Revision ID: e2a7c4d8b915
+Revises: d9b3e5f1a274
+Create Date: 2026-10-17 23:10:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e2a7c4d8b915"
+down_revision: Union[str, Sequence[str], None] = "d9b3e5f1a274"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "episodes",
+        sa.Column("features_updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    # Mejor estimación para los episodios existentes
+    op.execute("UPDATE episodes SET features_updated_at = updated_at")
+    op.add_column(
+        "model_versions",
+        sa.Column("data_max_episode_id", sa.Integer(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("model_versions", "data_max_episode_id")
+    op.drop_column("episodes", "features_updated_at")
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 
 from app.api.routes.ml_model.inference import router as inference_router
+from app.api.routes.ml_model.rescoring import router as rescoring_router
 from app.api.routes.ml_model.training import router as training_router
 from app.api.routes.ml_model.versions import router as versions_router
 
@@ -9,3 +10,4 @@ router = APIRouter(prefix="/ml-model")
 router.include_router(inference_router)
 router.include_router(training_router)
 router.include_router(versions_router)
+router.include_router(rescoring_router)
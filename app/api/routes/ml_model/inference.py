@@ -1,15 +1,28 @@
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, update
-from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import ml_config
 from app.databases.postgresql.db import get_db
-from app.databases.postgresql.models import Episode, User
-from app.schemas.ml_model.inference import InferenceRequest, InferenceResponse
-from app.services.auth_service import require_medical_role
-from app.services.ml_model_services.inference_service import InferenceService
+from app.databases.postgresql.models import User
+from app.repositories.episode import EpisodeRepository
+from app.schemas.ml_model.inference import (
+    InferenceBatchRequest,
+    InferenceBatchResponse,
+    InferenceProfileResponse,
+    InferenceRequest,
+    InferenceResponse,
+    InferenceStatsResponse,
+)
+from app.services.auth_service import require_admin, require_medical_role
+from app.services.ml_model_services.inference_service import (
+    InferenceService,
+    micro_batcher,
+    single_flight,
+)
+from ml_package.saluai5_ml.inference_pipeline.prediction_cache import prediction_cache
+from ml_package.saluai5_ml.profiling import inference_profile
 
 router = APIRouter(prefix="/inference", tags=["ML Model - Inference"])
 
@@ -17,7 +30,6 @@ router = APIRouter(prefix="/inference", tags=["ML Model - Inference"])
 @router.post("/", response_model=InferenceResponse, status_code=status.HTTP_200_OK)
 async def predict_episode_pertinence(
     payload: InferenceRequest,
-    db: Annotated[AsyncSession, Depends(get_db)],
     current_user: Annotated[User, Depends(require_medical_role)],
 ):
     """
@@ -30,6 +42,9 @@ async def predict_episode_pertinence(
     Missing values will be automatically filled with representative values
     (means for numerical, modes for categorical).
 
+    Identical requests in flight at the same time share one pipeline run and
+    one UPDATE of `recomendacion_modelo`.
+
     Args:
         payload: Episode data and model selection
 
@@ -40,33 +55,15 @@ async def predict_episode_pertinence(
         HTTPException: If prediction fails or invalid model type
     """
     try:
-
         episode_data = payload.model_dump(
             exclude={"id_episodio", "stage", "model_type", "numero_episodio"}
         )
-        result = await InferenceService.predict_episode_pertinence(
-            episode_data=episode_data, current_user=current_user, stage=payload.stage
+        result = await InferenceService.predict_and_record(
+            episode_data=episode_data,
+            episode_id=payload.id_episodio,
+            current_user=current_user,
+            stage=payload.stage,
         )
-
-        episode_id = payload.id_episodio
-        if episode_id:
-
-            res = await db.execute(select(Episode).where(Episode.id == episode_id))
-            ep = res.scalar_one_or_none()
-
-            if ep:
-
-                try:
-                    await db.execute(
-                        update(Episode)
-                        .where(Episode.id == ep.id)
-                        .values(recomendacion_modelo=result.get("label"))
-                    )
-                    await db.commit()
-                except SQLAlchemyError:
-                    await db.rollback()
-                    raise
-        print(result)
         return result
 
     except HTTPException as e:
@@ -76,3 +73,109 @@ async def predict_episode_pertinence(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al realizar la predicción: {str(e)}",
         )
+
+
+@router.post(
+    "/batch", response_model=InferenceBatchResponse, status_code=status.HTTP_200_OK
+)
+async def predict_episodes_pertinence_batch(
+    payload: InferenceBatchRequest,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[User, Depends(require_medical_role)],
+):
+    """
+    Predict the pertinence of many episodes in one call.
+
+    Accepts either a list of episode payloads or a list of stored episode ids.
+    Cleaning, encoding and prediction run once over the whole batch, and when
+    `update_episodes` is set every `recomendacion_modelo` is written back with
+    a single UPDATE.
+    """
+    try:
+        not_found_ids: list[int] = []
+        if payload.episode_ids:
+            features = await InferenceService.get_episodes_features(
+                db, payload.episode_ids
+            )
+            episode_ids = [eid for eid in payload.episode_ids if eid in features]
+            not_found_ids = [eid for eid in payload.episode_ids if eid not in features]
+            episodes_data = [features[eid] for eid in episode_ids]
+        else:
+            episode_ids = [episode.id_episodio for episode in payload.episodes]
+            episodes_data = [
+                episode.model_dump(
+                    exclude={"id_episodio", "stage", "model_type", "numero_episodio"}
+                )
+                for episode in payload.episodes
+            ]
+
+        results = []
+        if episodes_data:
+            results = await InferenceService.predict_episodes_pertinence(
+                episodes_data=episodes_data,
+                current_user=current_user,
+                stage=payload.stage,
+            )
+
+        updated = 0
+        if payload.update_episodes:
+            labels_by_id = {
+                eid: result["label"] for eid, result in zip(episode_ids, results) if eid
+            }
+            updated = await EpisodeRepository.bulk_update_model_recommendations(
+                db, labels_by_id
+            )
+
+        return {
+            "results": [
+                {**result, "id_episodio": eid}
+                for eid, result in zip(episode_ids, results)
+            ],
+            "updated_episodes": updated,
+            "not_found_episode_ids": not_found_ids,
+        }
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al realizar la predicción: {str(e)}",
+        )
+
+
+@router.get("/stats", response_model=InferenceStatsResponse)
+async def get_inference_stats(
+    _: Annotated[User, Depends(require_admin)],
+):
+    """Runtime metrics of the inference service (micro-batching, caches, coalescing)."""
+    return {
+        "micro_batching": {
+            "enabled": ml_config.micro_batching_enabled,
+            **micro_batcher.stats(),
+        },
+        "prediction_cache": {
+            "enabled": ml_config.prediction_cache_enabled,
+            **prediction_cache.stats(),
+        },
+        "single_flight": {
+            "enabled": ml_config.single_flight_enabled,
+            **single_flight.stats(),
+        },
+    }
+
+
+@router.get("/profile", response_model=InferenceProfileResponse)
+async def get_inference_profile(
+    _: Annotated[User, Depends(require_admin)],
+    reset: bool = False,
+):
+    """
+    Per-stage wall time, CPU time, peak RSS and tracemalloc deltas of the
+    sampled inference requests (BACKEND_ML_INFERENCE_PROFILING_SAMPLE_RATE),
+    aggregated since startup or the last `reset`.
+    """
+    profile = inference_profile.stats()
+    if reset:
+        inference_profile.reset()
+    return profile
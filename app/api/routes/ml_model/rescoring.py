@@ -0,0 +1,55 @@
+from typing import Annotated, List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.databases.postgresql.db import get_db
+from app.databases.postgresql.models import User
+from app.repositories.rescoring_job import RescoringJobRepository
+from app.schemas.ml_model.rescoring import RescoringJobOut
+from app.services.auth_service import require_admin
+from app.services.ml_model_services.rescoring_service import RescoringService
+
+router = APIRouter(prefix="/rescoring", tags=["ML Model - Rescoring"])
+
+
+@router.post(
+    "/{stage}", response_model=RescoringJobOut, status_code=status.HTTP_202_ACCEPTED
+)
+async def start_rescoring(
+    stage: str,
+    _: Annotated[User, Depends(require_admin)],
+):
+    """
+    Re-score every open episode with the active model version of `stage`.
+    Resumes the unfinished job of that version if there is one.
+    """
+    if stage not in ["dev", "prod"]:
+        raise HTTPException(status_code=400, detail="Invalid stage")
+    try:
+        return await RescoringService.start(stage)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/jobs/{job_id}", response_model=RescoringJobOut)
+async def get_rescoring_job(
+    job_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    _: Annotated[User, Depends(require_admin)],
+):
+    job = await RescoringJobRepository.get_by_id(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Rescoring job not found")
+    return job
+
+
+@router.get("/stage/{stage}", response_model=List[RescoringJobOut])
+async def list_rescoring_jobs(
+    stage: str,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    _: Annotated[User, Depends(require_admin)],
+):
+    if stage not in ["dev", "prod"]:
+        raise HTTPException(status_code=400, detail="Invalid stage")
+    return await RescoringJobRepository.list_by_stage(db, stage)
@@ -1,49 +1,58 @@
-from typing import Annotated
+from typing import Annotated, List
 
-from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.databases.postgresql.db import get_db
 from app.databases.postgresql.models import User
+from app.repositories.training_job import TrainingJobRepository
+from app.schemas.ml_model.training import TrainingJobOut
 from app.services.auth_service import require_admin
+from app.services.ml_model_services.training_lock import TrainingInProgressError
 from app.services.ml_model_services.training_service import TrainingService
 
 router = APIRouter(prefix="/training", tags=["ML Model - Training"])
 
 
-@router.post("/{stage}", status_code=status.HTTP_200_OK)
+@router.post(
+    "/{stage}", response_model=TrainingJobOut, status_code=status.HTTP_202_ACCEPTED
+)
 async def trigger_training(
     current_user: Annotated[User, Depends(require_admin)],
     stage: str = "prod",
+    force: bool = False,
 ):
     """
     Launch the ML model training pipeline manually via endpoint.
+    The model is trained in a worker process; poll the returned job with
+    `GET /training/jobs/{job_id}`. If the stage is already training, the
+    running job is returned instead of starting another one. If the training
+    set did not change since the latest version the job is "skipped", unless
+    `force` is set.
     """
     if current_user is None or not getattr(current_user, "is_admin", False):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin role required to train models",
         )
+    if stage not in ["dev", "prod"]:
+        raise HTTPException(status_code=400, detail="Invalid stage")
     try:
-        service = TrainingService(stage=stage)
-        result = await service.run_training()
+        return await TrainingService.start(stage, force=force)
 
-        return {
-            "status": "success",
-            "stage": stage,
-            "trained_version": result.version,
-            "trained_at": str(result.trained_at),
-        }
+    except TrainingInProgressError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Error running training pipeline: {str(e)}",
+            detail=f"Error starting training pipeline: {str(e)}",
         )
 
 
 @router.post("/internal/trigger-background", status_code=status.HTTP_202_ACCEPTED)
 async def trigger_training_background(
-    background_tasks: BackgroundTasks,
     x_token: str = Header(..., description="Secret token for automation"),
     stage: str = "prod",
 ):
@@ -53,7 +62,35 @@ async def trigger_training_background(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication token",
         )
+    if stage not in ["dev", "prod"]:
+        raise HTTPException(status_code=400, detail="Invalid stage")
 
-    background_tasks.add_task(TrainingService.execute_background_task, stage)
+    try:
+        job = await TrainingService.start(stage)
+    except TrainingInProgressError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    return {"message": "Pipeline iniciado.", "job_id": job.id}
 
-    return {"message": "Pipeline iniciado."}
+
+@router.get("/jobs/{job_id}", response_model=TrainingJobOut)
+async def get_training_job(
+    job_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    _: Annotated[User, Depends(require_admin)],
+):
+    job = await TrainingJobRepository.get_by_id(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return job
+
+
+@router.get("/stage/{stage}", response_model=List[TrainingJobOut])
+async def list_training_jobs(
+    stage: str,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    _: Annotated[User, Depends(require_admin)],
+):
+    if stage not in ["dev", "prod"]:
+        raise HTTPException(status_code=400, detail="Invalid stage")
+    return await TrainingJobRepository.list_by_stage(db, stage)
@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import ml_config
 from app.databases.postgresql.db import get_db
 from app.databases.postgresql.models import User
 from app.repositories.model_versions import ModelVersionRepository
@@ -14,6 +15,10 @@ from app.schemas.ml_model.versions import (
     ModelVersionUpdate,
 )
 from app.services.auth_service import require_admin
+from app.services.ml_model_services.rescoring_service import RescoringService
+from ml_package.saluai5_ml.inference_pipeline.artifacts.cache import artifacts_cache
+from ml_package.saluai5_ml.inference_pipeline.prediction_cache import prediction_cache
+from ml_package.saluai5_ml.inference_pipeline.registry import active_model_registry
 
 router = APIRouter(prefix="/versions", tags=["ML Model - Versions"])
 
@@ -81,15 +86,30 @@ async def update_version(
     if not instance:
         raise HTTPException(status_code=404, detail="Version not found")
 
+    changes = payload.model_dump(exclude_unset=True)
+    activate = changes.get("active") is True
+    if activate:
+        # Activar pasa por el UPDATE atómico que desactiva el resto del stage
+        del changes["active"]
+
     try:
-        return await ModelVersionRepository.update_partial(
-            db,
-            instance,
-            **payload.model_dump(exclude_unset=True),
-        )
+        updated = await ModelVersionRepository.update_partial(db, instance, **changes)
+        if activate:
+            await ModelVersionRepository.activate(db, updated.stage, version)
+            await db.refresh(updated)
     except IntegrityError:
         raise HTTPException(status_code=409, detail="Integrity error")
 
+    if activate:
+        artifacts_cache.invalidate_stage(updated.stage, keep=version)
+        prediction_cache.invalidate_stage(updated.stage, keep=version)
+    elif payload.active is not None:
+        artifacts_cache.invalidate(version)
+        prediction_cache.invalidate(version)
+    if payload.active is not None:
+        active_model_registry.invalidate()
+    return updated
+
 
 @router.post("/{version}/activate", response_model=ModelVersionOut)
 async def activate_version(
@@ -101,13 +121,18 @@ async def activate_version(
     if not instance:
         raise HTTPException(status_code=404, detail="Version not found")
 
-    # desactivar todas las del mismo stage
-    versions = await ModelVersionRepository.list_by_stage(db, instance.stage)
-    for mv in versions:
-        mv.active = mv.version == version
-
-    await db.commit()
+    # activar esta y desactivar todas las del mismo stage en un solo UPDATE
+    await ModelVersionRepository.activate(db, instance.stage, version)
     await db.refresh(instance)
+    active_model_registry.invalidate()
+
+    # Las versiones que dejaron de estar activas ya no se sirven
+    artifacts_cache.invalidate_stage(instance.stage, keep=version)
+    prediction_cache.invalidate_stage(instance.stage, keep=version)
+
+    # Refresca recomendacion_modelo de los episodios abiertos en segundo plano
+    if ml_config.rescoring_on_activation:
+        await RescoringService.start(instance.stage)
     return instance
 
 
@@ -122,6 +147,9 @@ async def delete_version(
         raise HTTPException(status_code=404, detail="Version not found")
 
     await ModelVersionRepository.delete_by_version(db, version)
+    artifacts_cache.invalidate(version)
+    prediction_cache.invalidate(version)
+    active_model_registry.invalidate()
     return None
 
 
@@ -135,6 +163,9 @@ async def delete_stage(
         raise HTTPException(status_code=400, detail="Invalid stage")
 
     await ModelVersionRepository.delete_by_stage(db, stage)
+    artifacts_cache.invalidate_stage(stage)
+    prediction_cache.invalidate_stage(stage)
+    active_model_registry.invalidate()
     return None
 
 
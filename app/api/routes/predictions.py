@@ -1,6 +1,6 @@
 """Inference endpoint for ML models."""
 
-from typing import Annotated
+from typing import Annotated, List
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select, update
@@ -9,8 +9,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.databases.postgresql.db import get_db
 from app.databases.postgresql.models import Episode, User
+from app.repositories.episode import EpisodeRepository
 from app.schemas.prediction import PredictionRequest, PredictionResponse
-from app.services.auth_service import require_medical_role
+from app.services.auth_service import require_admin, require_medical_role
 from app.services.prediction_service import PredictionService
 
 router = APIRouter(prefix="/predictions", tags=["predictions"])
@@ -103,3 +104,94 @@ async def predict_episode_pertinence(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al realizar la predicción: {str(e)}",
         )
+
+
+@router.post(
+    "/batch", response_model=List[PredictionResponse], status_code=status.HTTP_200_OK
+)
+async def predict_episodes_pertinence(
+    payload: List[PredictionRequest],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[User, Depends(require_medical_role)],
+):
+    """
+    Predict the pertinence of several episodes in one call.
+
+    All forms are encoded and scored together, which is much cheaper than one
+    request per episode. Every item must use the same `model_type`. Episodes
+    referenced by `id_episodio` get their `recomendacion_modelo` updated with
+    a single UPDATE.
+    """
+    if not payload:
+        return []
+
+    model_types = {item.model_type for item in payload}
+    if len(model_types) > 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="All episodes in a batch must use the same model_type",
+        )
+
+    try:
+        results = PredictionService.predict_episodes_pertinence(
+            episodes_data=[
+                item.model_dump(exclude={"model_type", "id_episodio"})
+                for item in payload
+            ],
+            model_type=model_types.pop(),
+            current_user=current_user,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al realizar la predicción: {str(e)}",
+        )
+
+    labels_by_id = {
+        item.id_episodio: result["label"]
+        for item, result in zip(payload, results)
+        if item.id_episodio
+    }
+    existing_ids = set()
+    update_error = None
+    try:
+        if labels_by_id:
+            res = await db.execute(
+                select(Episode.id).where(Episode.id.in_(list(labels_by_id)))
+            )
+            existing_ids = set(res.scalars().all())
+            await EpisodeRepository.bulk_update_model_recommendations(
+                db, {i: labels_by_id[i] for i in existing_ids}
+            )
+    except SQLAlchemyError as e:
+        await db.rollback()
+        update_error = f"Could not update episode due to DB error: {str(e)}"
+
+    for item, result in zip(payload, results):
+        episode_id = item.id_episodio
+        if not episode_id:
+            result["update_episode"] = f"Episode with id {episode_id} was not found"
+        elif update_error:
+            result["update_episode"] = update_error
+        elif episode_id in existing_ids:
+            result["update_episode"] = (
+                f"Model recommendation added to the episode of id {episode_id}"
+            )
+        else:
+            result["update_episode"] = (
+                f"Episode with id_episodio '{episode_id}' not found"
+            )
+    return results
+
+
+@router.post("/reload", status_code=status.HTTP_204_NO_CONTENT)
+async def reload_prediction_models(
+    current_user: Annotated[User, Depends(require_admin)],
+):
+    """
+    Reload the legacy model, encoders and representative values from disk.
+    They are loaded once per process, so replacing the files requires a reload.
+    """
+    PredictionService.reload_models()
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -69,10 +69,92 @@ class AppConfig(BaseSettings):
     debug: bool = False
 
 
+class MLConfig(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="BACKEND_ML_")
+
+    # Presupuesto de memoria (bytes) del cache de artefactos por version
+    artifact_cache_max_bytes: int = 512 * 1024 * 1024
+
+    # Micro-batching de requests de inferencia concurrentes
+    micro_batching_enabled: bool = False
+    micro_batching_window_ms: float = 5.0
+    micro_batching_max_batch_size: int = 32
+
+    # Backend de las etapas CPU de la inferencia: inline | thread | process
+    inference_executor: str = "inline"
+    inference_executor_workers: int = 2
+
+    # Evaluador del modelo en inferencia: sklearn | flat_forest
+    inference_backend: str = "sklearn"
+
+    # Formato de artefactos a cargar: pickle | mmap. Con "mmap" las versiones
+    # que tengan bundle (manifest + bloques .npy) se mapean en memoria y se
+    # sirven con el evaluador flat_forest; las demás siguen usando los .pkl
+    artifact_format: str = "pickle"
+
+    # Requests de inferencia idénticos en curso comparten una sola ejecución
+    single_flight_enabled: bool = True
+
+    # Cache de predicciones por (version, hash de features)
+    prediction_cache_enabled: bool = True
+    prediction_cache_max_entries: int = 10_000
+    prediction_cache_ttl_seconds: float = 15 * 60
+
+    # Registro de versiones activas: intervalo de polling sin LISTEN/NOTIFY
+    registry_poll_interval_seconds: float = 5.0
+
+    # Warm-up al iniciar: stages a precargar y conexiones del pool a abrir.
+    # /ready responde 200 solo cuando todos esos stages cargaron; los que
+    # fallan se reintentan cada warmup_retry_seconds
+    warmup_enabled: bool = True
+    warmup_stages: List[str] = ["prod"]
+    warmup_db_connections: int = 2
+    warmup_retry_seconds: float = 30.0
+
+    # Re-scoring de episodios abiertos al activar una version
+    rescoring_on_activation: bool = True
+    rescoring_chunk_size: int = 500
+    rescoring_pause_ms: float = 50.0
+
+    # Procesos worker de entrenamiento (los jobs extra esperan en cola)
+    training_workers: int = 1
+
+    # Búsqueda de hiperparámetros con k-fold al entrenar. candidates=0
+    # recorre la grilla completa; workers=0 usa todos los núcleos
+    training_search_enabled: bool = False
+    training_search_splits: int = 5
+    training_search_candidates: int = 0
+    training_search_workers: int = 0
+
+    # Snapshot columnar incremental del conjunto de entrenamiento
+    training_snapshot_enabled: bool = True
+    training_snapshot_overlap_seconds: float = 300.0
+
+    # Reentrenamiento incremental: se agregan árboles (warm_start) al modelo
+    # activo con los episodios nuevos, sin superar el presupuesto de árboles
+    training_incremental_enabled: bool = False
+    training_incremental_trees: int = 20
+    training_incremental_min_rows: int = 100
+    training_tree_budget: int = 200
+
+    # Matrices de features dispersas (CSR) en vez de densas: en el
+    # entrenamiento (encoder, búsqueda y ajuste) y en la inferencia con el
+    # evaluador sklearn (flat_forest necesita la matriz densa)
+    training_sparse_features: bool = False
+    inference_sparse_features: bool = False
+
+    # Perfilado por etapa (wall, CPU, RSS pico y tracemalloc). En inferencia
+    # se perfila una fracción de los requests y se agrega por etapa
+    training_profiling_enabled: bool = False
+    inference_profiling_sample_rate: float = 0.0
+    profiling_tracemalloc: bool = True
+
+
 global_config = GlobalConfig()
 db_postgresql_config = DatabasePostgresqlConfig()
 security_config = SecurityConfig()
 app_config = AppConfig()
+ml_config = MLConfig()
 
 
 class Settings:
@@ -81,6 +163,7 @@ class Settings:
         self.db_postgresql_config = db_postgresql_config
         self.security_config = security_config
         self.app_config = app_config
+        self.ml_config = ml_config
 
     @property
     def database_postgresql_url(self) -> str:
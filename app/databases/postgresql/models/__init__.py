@@ -6,6 +6,8 @@ from .episode_user import episode_user
 from .insurance_review import InsuranceReview
 from .model_versions import ModelVersion
 from .patient import Patient
+from .rescoring_job import RescoringJob
+from .training_job import TrainingJob
 from .user import User
 from .user_episodes_validations import UserEpisodeValidation
 
@@ -20,4 +22,6 @@ __all__ = [
     "ModelVersion",
     "DoctorSummary",
     "InsuranceReview",
+    "RescoringJob",
+    "TrainingJob",
 ]
@@ -3,11 +3,15 @@ from sqlalchemy import (
     Boolean,
     Column,
     Date,
+    DateTime,
     ForeignKey,
     Integer,
     Numeric,
     String,
     Table,
+    event,
+    func,
+    inspect,
 )
 from sqlalchemy.orm import relationship
 
@@ -93,6 +97,10 @@ class Episode(BaseModel):
     estado_del_caso = Column(String(50))
     recomendacion_modelo = Column(String(50))
     validacion_jefe_turno = Column(String(50))
+    # Última edición de datos clínicos o de la validación (NULL si nunca
+    # cambiaron): el entrenamiento incremental y su snapshot se guían por
+    # ella, no por updated_at
+    features_updated_at = Column(DateTime(timezone=True))
 
     # Relación muchos-a-muchos
     diagnostics = relationship(
@@ -126,3 +134,27 @@ class Episode(BaseModel):
         uselist=False,
         cascade="all, delete-orphan",
     )
+
+
+# Columnas cuyo cambio no modifica los datos de entrenamiento
+NON_FEATURE_COLUMNS = {
+    "estado_del_caso",
+    "recomendacion_modelo",
+    "validacion_jefe_turno",
+    "created_at",
+    "updated_at",
+    "features_updated_at",
+}
+
+
+@event.listens_for(Episode, "before_update")
+def touch_features_updated_at(mapper, connection, target):
+    """Marca features_updated_at si la edición toca datos del episodio."""
+    state = inspect(target)
+    changed = state.attrs.diagnostics.history.has_changes() or any(
+        state.attrs[attr.key].history.has_changes()
+        for attr in mapper.column_attrs
+        if attr.key not in NON_FEATURE_COLUMNS
+    )
+    if changed:
+        target.features_updated_at = func.now()
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Date, Float, String
+from sqlalchemy import JSON, Boolean, Column, Date, DateTime, Float, Integer, String
 
 from .base import BaseModel
 
@@ -12,3 +12,9 @@ class ModelVersion(BaseModel):
     trained_at = Column(Date, nullable=False)
     stage = Column(String(10), nullable=False, default="dev")
     active = Column(Boolean, default=False)
+    hyperparameters = Column(JSON)
+    search = Column(JSON)
+    dataset_fingerprint = Column(String(64))
+    data_watermark = Column(DateTime(timezone=True))
+    data_max_episode_id = Column(Integer)
+    base_version = Column(String(50))
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, Integer, String, Text
+
+from .base import BaseModel
+
+
+class RescoringJob(BaseModel):
+    __tablename__ = "rescoring_jobs"
+
+    stage = Column(String(10), nullable=False, index=True)
+    version = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    total_episodes = Column(Integer, nullable=False, default=0)
+    processed_episodes = Column(Integer, nullable=False, default=0)
+    updated_episodes = Column(Integer, nullable=False, default=0)
+    last_episode_id = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
@@ -0,0 +1,17 @@
+from sqlalchemy import JSON, Column, DateTime, String, Text
+
+from .base import BaseModel
+
+
+class TrainingJob(BaseModel):
+    __tablename__ = "training_jobs"
+
+    stage = Column(String(10), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    version = Column(String(50))
+    stage_timings = Column(JSON)
+    profile = Column(JSON)
+    training_stats = Column(JSON)
+    error = Column(Text)
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
@@ -1,4 +1,6 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 import uvicorn
@@ -11,15 +13,58 @@ from limits.strategies import FixedWindowRateLimiter
 from slowapi.util import get_remote_address
 
 from app.api.router import router
-from app.core.config import global_config
+from app.core.config import global_config, ml_config
 from app.params import FRONTEND_PORT, FRONTEND_URL
+from app.services.ml_model_services.inference_service import micro_batcher
+from app.services.ml_model_services.rescoring_service import RescoringService
+from app.services.ml_model_services.training_service import TrainingService
+from app.services.ml_model_services.warmup_service import model_warmup
+from ml_package.saluai5_ml.inference_pipeline.executor import inference_executor
+from ml_package.saluai5_ml.inference_pipeline.registry import active_model_registry
 
 logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("uvicorn.error")
 
 memory_storage = MemoryStorage()
 limiter_strategy = FixedWindowRateLimiter(memory_storage)
 global_limit = parse("60/minute")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Cambios de version activa hechos por otros workers (LISTEN/NOTIFY)
+    await active_model_registry.start()
+
+    # Re-scorings interrumpidos por el reinicio
+    try:
+        await RescoringService.recover_interrupted()
+    except Exception as e:
+        logger.error(f"❌ [RESCORING] No se pudieron recuperar los jobs: {e}")
+
+    # El warm-up corre en segundo plano: /health responde de inmediato y
+    # /ready recién cuando el modelo activo de cada stage quedó cargado
+    warmup_task = None
+    if ml_config.warmup_enabled:
+        warmup_task = asyncio.create_task(
+            model_warmup.run(
+                stages=ml_config.warmup_stages,
+                db_connections=ml_config.warmup_db_connections,
+                retry_seconds=ml_config.warmup_retry_seconds,
+            )
+        )
+    else:
+        model_warmup.ready = True
+
+    yield
+
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    await active_model_registry.stop()
+    await micro_batcher.close()
+    inference_executor.shutdown()
+    TrainingService.shutdown()
+
+
 app = FastAPI(
     title=global_config.title,
     version=global_config.version,
@@ -27,6 +72,7 @@ app = FastAPI(
     openapi_url=f"{global_config.api_prefix}{global_config.openapi_url}",
     docs_url=global_config.docs_url,
     redoc_url=global_config.redoc_url,
+    lifespan=lifespan,
 )
 
 
@@ -71,6 +117,12 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.api_route("/ready", methods=["GET", "HEAD"])
+def readiness_check():
+    status = model_warmup.status()
+    return JSONResponse(status_code=200 if model_warmup.ready else 503, content=status)
+
+
 if __name__ == "__main__":
     print(global_config.port)
     uvicorn.run(
@@ -1,7 +1,7 @@
 from datetime import date
 from typing import Dict, List, Optional, Tuple
 
-from sqlalchemy import func, insert, or_, select
+from sqlalchemy import case, func, insert, or_, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
@@ -169,6 +169,9 @@ class EpisodeRepository:
                 .all()
             )
             ep.diagnostics = diags
+            # El cambio de la M2M no toca la fila del episodio: se marca a mano
+            # para que el snapshot de entrenamiento lo detecte
+            ep.updated_at = func.now()
 
         try:
             await db.commit()
@@ -179,6 +182,60 @@ class EpisodeRepository:
         await db.refresh(ep)
         return ep
 
+    @staticmethod
+    async def update_model_recommendation(
+        db: AsyncSession, episode_id: int, label: str
+    ) -> Optional[int]:
+        """
+        Escribe recomendacion_modelo de un episodio con un único
+        UPDATE ... RETURNING. Retorna el id actualizado, o None si no existe.
+        """
+        stmt = (
+            update(Episode)
+            .where(Episode.id == episode_id)
+            # updated_at no cambia: la recomendación no es un dato del episodio
+            # (el entrenamiento y su snapshot se guían por updated_at)
+            .values(recomendacion_modelo=label, updated_at=Episode.updated_at)
+            .returning(Episode.id)
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            result = await db.execute(stmt)
+            updated_id = result.scalar_one_or_none()
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            raise e
+        return updated_id
+
+    @staticmethod
+    async def bulk_update_model_recommendations(
+        db: AsyncSession, labels_by_episode_id: Dict[int, str]
+    ) -> int:
+        """
+        Escribe recomendacion_modelo para varios episodios con un único UPDATE.
+        Retorna la cantidad de episodios actualizados.
+        """
+        if not labels_by_episode_id:
+            return 0
+
+        stmt = (
+            update(Episode)
+            .where(Episode.id.in_(list(labels_by_episode_id)))
+            .values(
+                recomendacion_modelo=case(labels_by_episode_id, value=Episode.id),
+                updated_at=Episode.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            result = await db.execute(stmt)
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            raise e
+        return result.rowcount
+
     # Delete
     @staticmethod
     async def hard_delete(db: AsyncSession, ep: Episode) -> None:
@@ -1,11 +1,16 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 
-from sqlalchemy import Integer, delete, func, select
+from sqlalchemy import Integer, delete, func, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.databases.postgresql.models import ModelVersion
 
+# Canal de LISTEN/NOTIFY por el que se avisa a los workers que cambió la
+# version activa de un stage (el payload es el stage)
+ACTIVE_VERSION_CHANNEL = "model_versions_active"
+
 
 class ModelVersionRepository:
 
@@ -19,6 +24,12 @@ class ModelVersionRepository:
         metric_value: float,
         trained_at,
         active: bool = False,
+        hyperparameters: Optional[dict] = None,
+        search: Optional[dict] = None,
+        dataset_fingerprint: Optional[str] = None,
+        data_watermark: Optional[datetime] = None,
+        data_max_episode_id: Optional[int] = None,
+        base_version: Optional[str] = None,
     ) -> ModelVersion:
         instance = ModelVersion(
             version=version,
@@ -27,8 +38,16 @@ class ModelVersionRepository:
             metric_value=metric_value,
             trained_at=trained_at,
             active=active,
+            hyperparameters=hyperparameters,
+            search=search,
+            dataset_fingerprint=dataset_fingerprint,
+            data_watermark=data_watermark,
+            data_max_episode_id=data_max_episode_id,
+            base_version=base_version,
         )
         db.add(instance)
+        if active:
+            await ModelVersionRepository.notify_active_change(db, stage)
         try:
             await db.commit()
         except IntegrityError as e:
@@ -57,6 +76,21 @@ class ModelVersionRepository:
         res = await db.execute(stmt)
         return res.scalar_one_or_none()
 
+    @staticmethod
+    async def list_stage_versions(
+        db: AsyncSession,
+    ) -> List[Tuple[str, str, bool, int]]:
+        """(stage, version, active, id) de todas las versiones, sin cargar entidades."""
+        res = await db.execute(
+            select(
+                ModelVersion.stage,
+                ModelVersion.version,
+                ModelVersion.active,
+                ModelVersion.id,
+            )
+        )
+        return [tuple(row) for row in res.all()]
+
     @staticmethod
     async def list_all(db: AsyncSession) -> List[ModelVersion]:
         res = await db.execute(select(ModelVersion).order_by(ModelVersion.id.desc()))
@@ -117,6 +151,7 @@ class ModelVersionRepository:
             instance.trained_at = trained_at
         if active is not None:
             instance.active = active
+            await ModelVersionRepository.notify_active_change(db, instance.stage)
         if stage is not None:
             instance.stage = stage
 
@@ -140,6 +175,8 @@ class ModelVersionRepository:
         was_active = instance.active
 
         await db.execute(delete(ModelVersion).where(ModelVersion.version == version))
+        if was_active:
+            await ModelVersionRepository.notify_active_change(db, stage)
         await db.commit()
 
         if not was_active:
@@ -153,14 +190,43 @@ class ModelVersionRepository:
         best = sorted(
             remaining, key=lambda mv: (mv.metric_value, mv.trained_at), reverse=True
         )[0]
-        for mv in remaining:
-            mv.active = mv.id == best.id
+        await ModelVersionRepository.activate(db, stage, best.version)
 
-        await db.commit()
+    @staticmethod
+    async def activate(db: AsyncSession, stage: str, version: str) -> None:
+        """
+        Activa `version` y desactiva el resto del stage con un único UPDATE
+        atómico. La restricción parcial de la tabla garantiza una sola
+        version activa por stage.
+        """
+        stmt = (
+            update(ModelVersion)
+            .where(ModelVersion.stage == stage)
+            .values(active=ModelVersion.version == version)
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(stmt)
+        await ModelVersionRepository.notify_active_change(db, stage)
+        try:
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            raise e
+
+    @staticmethod
+    async def notify_active_change(db: AsyncSession, stage: str) -> None:
+        """
+        Avisa a todos los workers que cambió la version activa de `stage`.
+        Postgres entrega la notificación solo si la transacción hace commit.
+        En otros motores (SQLite en tests) los workers hacen polling.
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            await db.execute(select(func.pg_notify(ACTIVE_VERSION_CHANNEL, stage)))
 
     @staticmethod
     async def delete_by_stage(db: AsyncSession, stage: str) -> None:
         await db.execute(delete(ModelVersion).where(ModelVersion.stage == stage))
+        await ModelVersionRepository.notify_active_change(db, stage)
         await db.commit()
 
     @staticmethod
@@ -0,0 +1,94 @@
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.databases.postgresql.models import RescoringJob
+
+UNFINISHED_STATUSES = ("queued", "running")
+
+
+class RescoringJobRepository:
+
+    @staticmethod
+    async def create(
+        db: AsyncSession,
+        *,
+        stage: str,
+        version: str,
+        total_episodes: int = 0,
+    ) -> RescoringJob:
+        instance = RescoringJob(
+            stage=stage,
+            version=version,
+            status="queued",
+            total_episodes=total_episodes,
+            processed_episodes=0,
+            updated_episodes=0,
+            last_episode_id=0,
+        )
+        db.add(instance)
+        try:
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            raise e
+
+        await db.refresh(instance)
+        return instance
+
+    @staticmethod
+    async def get_by_id(db: AsyncSession, job_id: int) -> Optional[RescoringJob]:
+        res = await db.execute(select(RescoringJob).where(RescoringJob.id == job_id))
+        return res.scalar_one_or_none()
+
+    @staticmethod
+    async def get_unfinished_for_version(
+        db: AsyncSession, version: str
+    ) -> Optional[RescoringJob]:
+        """Último job en cola o en curso (posiblemente interrumpido) de la version."""
+        stmt = (
+            select(RescoringJob)
+            .where(
+                RescoringJob.version == version,
+                RescoringJob.status.in_(UNFINISHED_STATUSES),
+            )
+            .order_by(RescoringJob.id.desc())
+            .limit(1)
+        )
+        res = await db.execute(stmt)
+        return res.scalar_one_or_none()
+
+    @staticmethod
+    async def list_unfinished(db: AsyncSession) -> List[RescoringJob]:
+        """Jobs en cola o en curso de todos los stages, del más antiguo al último."""
+        res = await db.execute(
+            select(RescoringJob)
+            .where(RescoringJob.status.in_(UNFINISHED_STATUSES))
+            .order_by(RescoringJob.id)
+        )
+        return list(res.scalars().all())
+
+    @staticmethod
+    async def list_by_stage(db: AsyncSession, stage: str) -> List[RescoringJob]:
+        res = await db.execute(
+            select(RescoringJob)
+            .where(RescoringJob.stage == stage)
+            .order_by(RescoringJob.id.desc())
+        )
+        return list(res.scalars().all())
+
+    @staticmethod
+    async def update_partial(
+        db: AsyncSession, instance: RescoringJob, **changes
+    ) -> RescoringJob:
+        for k, v in changes.items():
+            setattr(instance, k, v)
+        try:
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            raise e
+        await db.refresh(instance)
+        return instance
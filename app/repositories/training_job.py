@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.databases.postgresql.models import TrainingJob
+
+UNFINISHED_STATUSES = ("queued", "running")
+
+
+class TrainingJobRepository:
+
+    @staticmethod
+    async def create(db: AsyncSession, *, stage: str) -> TrainingJob:
+        instance = TrainingJob(stage=stage, status="queued")
+        db.add(instance)
+        try:
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            raise e
+
+        await db.refresh(instance)
+        return instance
+
+    @staticmethod
+    async def get_by_id(db: AsyncSession, job_id: int) -> Optional[TrainingJob]:
+        res = await db.execute(select(TrainingJob).where(TrainingJob.id == job_id))
+        return res.scalar_one_or_none()
+
+    @staticmethod
+    async def get_unfinished_for_stage(
+        db: AsyncSession, stage: str
+    ) -> Optional[TrainingJob]:
+        """Último job en cola o en curso del stage."""
+        stmt = (
+            select(TrainingJob)
+            .where(
+                TrainingJob.stage == stage,
+                TrainingJob.status.in_(UNFINISHED_STATUSES),
+            )
+            .order_by(TrainingJob.id.desc())
+            .limit(1)
+        )
+        res = await db.execute(stmt)
+        return res.scalar_one_or_none()
+
+    @staticmethod
+    async def fail_unfinished(db: AsyncSession, stage: str, error: str) -> int:
+        """Marca como fallidos los jobs sin terminar del stage."""
+        res = await db.execute(
+            update(TrainingJob)
+            .where(
+                TrainingJob.stage == stage,
+                TrainingJob.status.in_(UNFINISHED_STATUSES),
+            )
+            .values(
+                status="failed", error=error, finished_at=datetime.now(timezone.utc)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return res.rowcount
+
+    @staticmethod
+    async def list_by_stage(db: AsyncSession, stage: str) -> List[TrainingJob]:
+        res = await db.execute(
+            select(TrainingJob)
+            .where(TrainingJob.stage == stage)
+            .order_by(TrainingJob.id.desc())
+        )
+        return list(res.scalars().all())
+
+    @staticmethod
+    async def update_partial(
+        db: AsyncSession, instance: TrainingJob, **changes
+    ) -> TrainingJob:
+        for k, v in changes.items():
+            setattr(instance, k, v)
+        try:
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            raise e
+        await db.refresh(instance)
+        return instance
@@ -1,8 +1,8 @@
 """Schemas for prediction endpoints."""
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class InferenceRequest(BaseModel):
@@ -117,3 +117,99 @@ class InferenceResponse(BaseModel):
         json_schema_extra = {
             "example": {"prediction": 1, "probability": 0.87, "label": "PERTINENTE"}
         }
+
+
+class InferenceBatchRequest(BaseModel):
+    """
+    Request schema for scoring many episodes in one call. Either full episode
+    payloads or ids of stored episodes must be provided, not both.
+    """
+
+    stage: str = "prod"
+    episodes: Optional[List[InferenceRequest]] = None
+    episode_ids: Optional[List[int]] = None
+    update_episodes: bool = Field(
+        False, description="Write every label back to Episode.recomendacion_modelo"
+    )
+
+    @model_validator(mode="after")
+    def validate_single_source(self):
+        if bool(self.episodes) == bool(self.episode_ids):
+            raise ValueError("Provide either 'episodes' or 'episode_ids'")
+        return self
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "stage": "prod",
+                "episode_ids": [1, 2, 3],
+                "update_episodes": True,
+            }
+        }
+
+
+class InferenceBatchItem(InferenceResponse):
+    """Inference result for one episode of a batch."""
+
+    id_episodio: Optional[int] = None
+
+
+class InferenceBatchResponse(BaseModel):
+    """Response schema for batch inference."""
+
+    results: List[InferenceBatchItem]
+    updated_episodes: int = 0
+    not_found_episode_ids: List[int] = []
+
+
+class MicroBatchingStats(BaseModel):
+    """Batch size and queue wait metrics of the inference micro-batcher."""
+
+    enabled: bool
+    window_ms: float
+    max_batch_size: int
+    batches: int
+    requests: int
+    avg_batch_size: float
+    max_batch_size_seen: int
+    avg_queue_wait_ms: float
+    max_queue_wait_ms: float
+    pending: int
+
+
+class PredictionCacheStats(BaseModel):
+    """Hit/miss counters and occupancy of the prediction cache."""
+
+    enabled: bool
+    max_entries: int
+    ttl_seconds: float
+    entries: int
+    hits: int
+    misses: int
+    hit_rate: float
+
+
+class SingleFlightStats(BaseModel):
+    """Coalescing counters of identical in-flight inference requests."""
+
+    enabled: bool
+    executions: int
+    coalesced: int
+    coalesced_rate: float
+    in_flight: int
+
+
+class InferenceStatsResponse(BaseModel):
+    """Runtime metrics of the inference service."""
+
+    micro_batching: MicroBatchingStats
+    prediction_cache: PredictionCacheStats
+    single_flight: SingleFlightStats
+
+
+class InferenceProfileResponse(BaseModel):
+    """Sampled per-stage time and memory profile of the inference pipeline."""
+
+    sample_rate: float
+    samples: int
+    stages: Dict[str, Dict[str, float]]
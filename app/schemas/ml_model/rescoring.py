@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, computed_field
+
+
+class RescoringJobOut(BaseModel):
+    id: int
+    stage: str
+    version: str
+    status: str
+    total_episodes: int
+    processed_episodes: int
+    updated_episodes: int
+    last_episode_id: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @computed_field
+    @property
+    def progress(self) -> float:
+        """Fraction of the open episodes already re-scored (0 to 1)."""
+        if self.status == "succeeded":
+            return 1.0
+        if not self.total_episodes:
+            return 0.0
+        return round(min(self.processed_episodes / self.total_episodes, 1.0), 4)
+
+    class Config:
+        from_attributes = True
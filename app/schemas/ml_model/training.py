@@ -1,5 +1,25 @@
+from datetime import datetime
+from typing import Dict, Optional, Union
+
 from pydantic import BaseModel
 
 
 class TrainingRequest(BaseModel):
     stage: str = "dev"
+
+
+class TrainingJobOut(BaseModel):
+    id: int
+    stage: str
+    status: str
+    version: Optional[str] = None
+    stage_timings: Optional[Dict[str, float]] = None
+    profile: Optional[Dict[str, Dict[str, float]]] = None
+    training_stats: Optional[Dict[str, Union[float, str]]] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,5 @@
-from datetime import date
-from typing import Optional
+from datetime import date, datetime
+from typing import Any, Dict, Optional
 
 from pydantic import BaseModel
 
@@ -33,6 +33,12 @@ class ModelVersionOut(ModelVersionBase):
     trained_at: Optional[date] = None
     active: Optional[bool] = None
     stage: Optional[str] = None
+    hyperparameters: Optional[Dict[str, Any]] = None
+    search: Optional[Dict[str, Any]] = None
+    dataset_fingerprint: Optional[str] = None
+    data_watermark: Optional[datetime] = None
+    data_max_episode_id: Optional[int] = None
+    base_version: Optional[str] = None
 
     class Config:
         from_attributes = True
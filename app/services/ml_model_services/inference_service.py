@@ -1,10 +1,19 @@
 """Inference service for ML model inference."""
 
+from typing import Dict, List
+
 from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import ml_config
 from app.databases.postgresql.db import get_async_session_local
 from app.databases.postgresql.models import User
+from app.repositories.episode import EpisodeRepository
+from app.services.ml_model_services.micro_batcher import InferenceMicroBatcher
+from app.services.ml_model_services.single_flight import SingleFlight
+from ml_package.saluai5_ml.inference_pipeline.data_ingestion.loader import DataLoader
 from ml_package.saluai5_ml.inference_pipeline.inference_engine import InferenceEngine
+from ml_package.saluai5_ml.inference_pipeline.prediction_cache import PredictionCache
 
 
 class InferenceService:
@@ -53,21 +62,128 @@ class InferenceService:
             }
         """
         InferenceService._validate_user_permissions(current_user)
-        engine = InferenceEngine(episode_data=episode_data, stage=stage)
-        SessionLocal = get_async_session_local()
-        async with SessionLocal() as session:
-            try:
-                result = await engine.run(session)
-                return result
+        try:
+            if ml_config.micro_batching_enabled:
+                return await micro_batcher.submit(stage, episode_data)
+            results = await InferenceService._score_batch(stage, [episode_data])
+            return results[0]
+
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error durante la inferencia: {str(e)}",
+            )
 
-            except ValueError as e:
+    @staticmethod
+    async def predict_and_record(
+        episode_data: dict,
+        episode_id: int | None = None,
+        current_user: User | None = None,
+        stage: str = "prod",
+    ) -> dict:
+        """
+        Predict the pertinence of an episode and store the label in its
+        `recomendacion_modelo` when `episode_id` is given.
 
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        Identical requests in flight at the same time (same stage, episode id
+        and canonical payload, e.g. a double click or a frontend retry) share
+        one pipeline run and one UPDATE; every caller receives the result.
+        """
+        InferenceService._validate_user_permissions(current_user)
+        try:
+            if not ml_config.single_flight_enabled:
+                return await InferenceService._predict_and_record(
+                    stage, episode_data, episode_id
                 )
+            key = (stage, episode_id, PredictionCache.make_key(episode_data))
+            return await single_flight.do(
+                key,
+                lambda: InferenceService._predict_and_record(
+                    stage, episode_data, episode_id
+                ),
+            )
 
-            except Exception as e:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Error durante la inferencia: {str(e)}",
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error durante la inferencia: {str(e)}",
+            )
+
+    @staticmethod
+    async def _predict_and_record(
+        stage: str, episode_data: dict, episode_id: int | None
+    ) -> dict:
+        """Scores one episode and writes its recommendation back, once."""
+        if ml_config.micro_batching_enabled:
+            result = await micro_batcher.submit(stage, episode_data)
+        else:
+            result = (await InferenceService._score_batch(stage, [episode_data]))[0]
+
+        # The pipeline itself does not hold a connection, so this short-lived
+        # session is the only one the prediction uses
+        if episode_id:
+            SessionLocal = get_async_session_local()
+            async with SessionLocal() as session:
+                await EpisodeRepository.update_model_recommendation(
+                    session, episode_id, result["label"]
                 )
+        return result
+
+    @staticmethod
+    async def predict_episodes_pertinence(
+        episodes_data: List[dict],
+        current_user: User | None = None,
+        stage: str = "prod",
+    ) -> List[dict]:
+        """
+        Predict the pertinence of many episodes running the pipeline once over
+        the whole batch.
+
+        Returns:
+            list: one {'prediction', 'probability', 'label'} dict per episode,
+            in the same order as `episodes_data`.
+        """
+        InferenceService._validate_user_permissions(current_user)
+        try:
+            return await InferenceService._score_batch(stage, episodes_data)
+
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error durante la inferencia: {str(e)}",
+            )
+
+    @staticmethod
+    async def _score_batch(stage: str, episodes_data: List[dict]) -> List[dict]:
+        """
+        Runs the inference pipeline once over a list of episodes. No session is
+        opened up front: the engine only touches the database when the active
+        versions must be reloaded or an old version lacks its imputation
+        statistics, and then it borrows a connection just for that query.
+        """
+        return await InferenceEngine.for_stage(stage).run_batch(None, episodes_data)
+
+    @staticmethod
+    async def get_episodes_features(
+        db: AsyncSession, episode_ids: List[int]
+    ) -> Dict[int, dict]:
+        """Loads the model features of stored episodes, keyed by episode id."""
+        return await DataLoader(db).fetch_episodes_by_ids(episode_ids)
+
+
+micro_batcher = InferenceMicroBatcher(
+    score_batch=lambda stage, data: InferenceService._score_batch(stage, data),
+    window_ms=ml_config.micro_batching_window_ms,
+    max_batch_size=ml_config.micro_batching_max_batch_size,
+)
+
+single_flight = SingleFlight()
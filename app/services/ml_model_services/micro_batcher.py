@@ -0,0 +1,168 @@
+"""Dynamic micro-batching of concurrent inference requests."""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+ScoreBatch = Callable[[str, List[dict]], Awaitable[List[dict]]]
+
+
+class InferenceMicroBatcher:
+    """
+    Gathers inference requests that arrive within a short window (or until the
+    batch is full) and scores them as a single matrix. Each caller awaits its
+    own future and receives only its own result.
+
+    There is one queue and one worker task per stage, so every batch is scored
+    against a single active model. A failing payload only fails its own
+    request: failed batches are bisected and retried.
+    """
+
+    def __init__(self, score_batch: ScoreBatch, window_ms: float, max_batch_size: int):
+        self.score_batch = score_batch
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._loop = None
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self._batches = 0
+        self._requests = 0
+        self._max_batch_size_seen = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _ensure_worker(self, stage: str) -> asyncio.Queue:
+        """Creates the stage queue and worker on the running loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queues = {}
+            self._workers = {}
+
+        if stage not in self._queues:
+            self._queues[stage] = asyncio.Queue()
+        worker = self._workers.get(stage)
+        if worker is None or worker.done():
+            self._workers[stage] = loop.create_task(self._run_worker(stage))
+        return self._queues[stage]
+
+    async def submit(self, stage: str, episode_data: dict) -> dict:
+        """Queues one episode and waits for its prediction."""
+        queue = self._ensure_worker(stage)
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((episode_data, future, time.perf_counter()))
+        return await future
+
+    async def _collect_batch(self, queue: asyncio.Queue) -> list:
+        """Waits for a first item, then gathers more until the window closes."""
+        batch = [await queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run_worker(self, stage: str) -> None:
+        queue = self._queues[stage]
+        while True:
+            batch = await self._collect_batch(queue)
+            self._record_batch(batch)
+            await self._score(stage, batch)
+
+    async def _score(self, stage: str, batch: list) -> None:
+        """
+        Scores a batch and resolves its futures. If the batch fails, it is
+        bisected so only the futures of the payloads that fail on their own
+        get the exception.
+        """
+        error = await self._try_score(stage, batch)
+        if error is not None:
+            await self._bisect(stage, batch, error)
+
+    async def _try_score(self, stage: str, batch: list) -> Optional[Exception]:
+        """Scores a batch once; resolves its futures or returns the error."""
+        try:
+            results = await self.score_batch(
+                stage, [episode_data for episode_data, _, _ in batch]
+            )
+        except Exception as e:
+            return e
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+        return None
+
+    async def _bisect(self, stage: str, batch: list, error: Exception) -> None:
+        """
+        Retries the halves of a failed batch. When both halves fail with the
+        same exception type the failure is not tied to a payload (no active
+        version, missing artifacts, a dead executor), so the whole batch gets
+        the error instead of paying ~2N calls to bisect it down to singles.
+        """
+        if len(batch) == 1:
+            self._fail(batch, error)
+            return
+
+        middle = len(batch) // 2
+        halves = [batch[:middle], batch[middle:]]
+        errors = [await self._try_score(stage, half) for half in halves]
+        if all(errors) and type(errors[0]) is type(errors[1]):
+            for half, half_error in zip(halves, errors):
+                self._fail(half, half_error)
+            return
+        for half, half_error in zip(halves, errors):
+            if half_error is not None:
+                await self._bisect(stage, half, half_error)
+
+    @staticmethod
+    def _fail(batch: list, error: Exception) -> None:
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def _record_batch(self, batch: list) -> None:
+        now = time.perf_counter()
+        waits = [now - enqueued_at for _, _, enqueued_at in batch]
+        self._batches += 1
+        self._requests += len(batch)
+        self._max_batch_size_seen = max(self._max_batch_size_seen, len(batch))
+        self._total_wait += sum(waits)
+        self._max_wait = max(self._max_wait, max(waits))
+
+    async def close(self) -> None:
+        """Cancels the stage workers (pending callers are left to time out)."""
+        workers = list(self._workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._workers = {}
+        self._queues = {}
+
+    def stats(self) -> dict:
+        """Batch size and queue wait metrics since startup."""
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size,
+            "batches": self._batches,
+            "requests": self._requests,
+            "avg_batch_size": (
+                round(self._requests / self._batches, 2) if self._batches else 0.0
+            ),
+            "max_batch_size_seen": self._max_batch_size_seen,
+            "avg_queue_wait_ms": (
+                round(self._total_wait / self._requests * 1000, 3)
+                if self._requests
+                else 0.0
+            ),
+            "max_queue_wait_ms": round(self._max_wait * 1000, 3),
+            "pending": sum(queue.qsize() for queue in self._queues.values()),
+        }
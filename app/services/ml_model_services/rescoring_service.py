@@ -0,0 +1,246 @@
+"""Bulk re-scoring of open episodes with the active model version."""
+
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.core.config import ml_config
+from app.databases.postgresql.db import get_async_session_local
+from app.databases.postgresql.models import RescoringJob
+from app.repositories.episode import EpisodeRepository
+from app.repositories.model_versions import ModelVersionRepository
+from app.repositories.rescoring_job import UNFINISHED_STATUSES, RescoringJobRepository
+from app.services.ml_model_services.training_lock import TrainingLock
+from ml_package.saluai5_ml.inference_pipeline.data_ingestion.loader import DataLoader
+from ml_package.saluai5_ml.inference_pipeline.executor import inference_executor
+from ml_package.saluai5_ml.inference_pipeline.inference_engine import InferenceEngine
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class RescoringJobLock(TrainingLock):
+    """
+    Exclusive lock on one re-scoring job, held by the process that runs it.
+    Same mechanism as the training lock (advisory lock or flock), keyed by
+    job id, so a job is never run twice at once by different workers.
+    """
+
+    def __init__(self, stage: str, job_id: int):
+        super().__init__(stage)
+        self.job_id = job_id
+
+    @property
+    def key(self) -> int:
+        digest = hashlib.sha1(f"rescoring:{self.job_id}".encode()).digest()
+        return int.from_bytes(digest[:8], "big", signed=True)
+
+    @property
+    def path(self) -> Path:
+        return (
+            self.lock_dir
+            / "models_repository"
+            / self.stage
+            / f".rescoring-{self.job_id}.lock"
+        )
+
+
+class RescoringService:
+    """
+    Refreshes `recomendacion_modelo` on every open episode after a model
+    version becomes active.
+
+    Open episodes are streamed in id order with a server-side cursor, scored
+    chunk by chunk as one matrix and written back with one UPDATE per chunk.
+    After each chunk the job stores its progress and the last episode id, so
+    an interrupted job resumes where it stopped (see recover_interrupted). A
+    pause between chunks keeps the job from starving interactive traffic.
+    """
+
+    _tasks: Dict[int, asyncio.Task] = {}
+    _start_lock: Optional[asyncio.Lock] = None
+    _start_lock_loop = None
+
+    @staticmethod
+    def get_start_lock() -> asyncio.Lock:
+        """Lock for `start`, created on the running loop the first time."""
+        loop = asyncio.get_running_loop()
+        if RescoringService._start_lock_loop is not loop:
+            RescoringService._start_lock = asyncio.Lock()
+            RescoringService._start_lock_loop = loop
+        return RescoringService._start_lock
+
+    @staticmethod
+    def schedule(job_id: int) -> None:
+        """Runs the job in a background task unless it is already running here."""
+        task = RescoringService._tasks.get(job_id)
+        if task is None or task.done():
+            RescoringService._tasks[job_id] = asyncio.create_task(
+                RescoringService.run_job(job_id)
+            )
+
+    @staticmethod
+    async def recover_interrupted() -> None:
+        """
+        Called at startup: resumes the jobs left queued/running by a restart.
+        Jobs of versions that are no longer active end as "superseded" on
+        their first check, and jobs still running in another worker are
+        skipped by their lock.
+        """
+        SessionLocal = get_async_session_local()
+        async with SessionLocal() as session:
+            jobs = await RescoringJobRepository.list_unfinished(session)
+        for job in jobs:
+            logger.info(f"🔄 [RESCORING] Recuperando job {job.id} ({job.version})")
+            RescoringService.schedule(job.id)
+
+    @staticmethod
+    async def start(stage: str) -> RescoringJob:
+        """
+        Starts re-scoring the open episodes with the active version of `stage`.
+        If that version already has an unfinished job (for instance one that
+        was interrupted by a restart) it is resumed instead of creating a new one.
+        """
+        async with RescoringService.get_start_lock():
+            SessionLocal = get_async_session_local()
+            async with SessionLocal() as session:
+                version = await InferenceEngine.for_stage(stage).get_active_version(
+                    session
+                )
+                job = await RescoringJobRepository.get_unfinished_for_version(
+                    session, version
+                )
+                if job is None:
+                    total = await DataLoader(session).count_open_episodes()
+                    job = await RescoringJobRepository.create(
+                        session, stage=stage, version=version, total_episodes=total
+                    )
+
+            RescoringService.schedule(job.id)
+            return job
+
+    @staticmethod
+    async def run_job(job_id: int) -> None:
+        """
+        Runs (or resumes) a re-scoring job until it finishes. Returns right
+        away if the job already finished or another process is running it.
+        """
+        SessionLocal = get_async_session_local()
+        async with SessionLocal() as session:
+            job = await RescoringJobRepository.get_by_id(session, job_id)
+        if job is None:
+            return
+
+        lock = RescoringJobLock(job.stage, job_id)
+        if not await lock.acquire():
+            logger.info(f"[RESCORING] Job {job_id} en curso en otro proceso")
+            return
+        try:
+            await RescoringService._run_job(job_id)
+        finally:
+            await lock.release()
+
+    @staticmethod
+    async def is_superseded(session, job: RescoringJob) -> bool:
+        """Whether another version became active (its own job takes over)."""
+        active = await ModelVersionRepository.get_active_version_for_stage(
+            session, stage=job.stage
+        )
+        return active is None or active.version != job.version
+
+    @staticmethod
+    async def _run_job(job_id: int) -> None:
+        SessionLocal = get_async_session_local()
+        async with SessionLocal() as read_session, SessionLocal() as session:
+            job = await RescoringJobRepository.get_by_id(session, job_id)
+            if job is None or job.status not in UNFINISHED_STATUSES:
+                return
+            logger.info(
+                f"🔄 [RESCORING] Job {job.id}: {job.version} "
+                f"desde episodio {job.last_episode_id}"
+            )
+            try:
+                job = await RescoringJobRepository.update_partial(
+                    session,
+                    job,
+                    status="running",
+                    started_at=job.started_at or datetime.now(timezone.utc),
+                )
+                if await RescoringService.is_superseded(session, job):
+                    await RescoringService.mark_superseded(session, job)
+                    return
+
+                statistics = await InferenceEngine.for_stage(
+                    job.stage
+                ).get_imputation_statistics(session, job.version)
+
+                chunks = DataLoader(read_session).stream_open_episodes(
+                    ml_config.rescoring_chunk_size, after_id=job.last_episode_id
+                )
+                async for episodes in chunks:
+                    # Si se activó otra version, su propio job se encarga
+                    if await RescoringService.is_superseded(session, job):
+                        await RescoringService.mark_superseded(session, job)
+                        return
+
+                    job = await RescoringService.score_chunk(
+                        session, job, episodes, statistics
+                    )
+                    await asyncio.sleep(ml_config.rescoring_pause_ms / 1000)
+
+                await RescoringJobRepository.update_partial(
+                    session,
+                    job,
+                    status="succeeded",
+                    finished_at=datetime.now(timezone.utc),
+                )
+                logger.info(
+                    f"✅ [RESCORING] Job {job.id} finalizado: "
+                    f"{job.updated_episodes} episodios actualizados"
+                )
+
+            except Exception as e:
+                logger.error(f"❌ [RESCORING] Falló el job {job_id}: {str(e)}")
+                await session.rollback()
+                await RescoringJobRepository.update_partial(
+                    session,
+                    job,
+                    status="failed",
+                    error=str(e),
+                    finished_at=datetime.now(timezone.utc),
+                )
+
+    @staticmethod
+    async def mark_superseded(session, job: RescoringJob) -> None:
+        await RescoringJobRepository.update_partial(
+            session,
+            job,
+            status="superseded",
+            finished_at=datetime.now(timezone.utc),
+        )
+        logger.info(f"[RESCORING] Job {job.id} reemplazado")
+
+    @staticmethod
+    async def score_chunk(
+        session, job: RescoringJob, episodes: Dict[int, dict], statistics
+    ) -> RescoringJob:
+        """Scores one chunk as a matrix, writes it back and records progress."""
+        await DataLoader(session).add_diagnostics(episodes)
+        results = await inference_executor.score(
+            job.version, list(episodes.values()), statistics
+        )
+        labels_by_id = {
+            episode_id: result["label"] for episode_id, result in zip(episodes, results)
+        }
+        updated = await EpisodeRepository.bulk_update_model_recommendations(
+            session, labels_by_id
+        )
+        return await RescoringJobRepository.update_partial(
+            session,
+            job,
+            processed_episodes=job.processed_episodes + len(episodes),
+            updated_episodes=job.updated_episodes + updated,
+            last_episode_id=max(episodes),
+        )
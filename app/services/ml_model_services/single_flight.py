@@ -0,0 +1,60 @@
+"""Single-flight coalescing of identical concurrent inference requests."""
+
+import asyncio
+import copy
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time. Callers that arrive while a call
+    with the same key is in flight do not start their own: they await the
+    same task and receive a copy of its result (or its exception).
+
+    The call runs as its own task, so a caller that disconnects (and gets
+    cancelled) does not cancel the work the other callers are waiting for.
+    The key is forgotten as soon as the call finishes; this is not a cache.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self._executions = 0
+        self._coalesced = 0
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """Runs `call` or joins the in-flight call with the same key."""
+        task = self._calls.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self._executions += 1
+        else:
+            self._coalesced += 1
+
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved even if every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        """Executions, coalesced callers and calls currently in flight."""
+        requests = self._executions + self._coalesced
+        return {
+            "executions": self._executions,
+            "coalesced": self._coalesced,
+            "coalesced_rate": (
+                round(self._coalesced / requests, 4) if requests else 0.0
+            ),
+            "in_flight": len(self._calls),
+        }
@@ -0,0 +1,127 @@
+"""Cluster-wide exclusive training lock per stage."""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import func, select
+
+from app.databases.postgresql.db import get_engine
+
+
+def lock_file(fd: int) -> bool:
+    """
+    Non-blocking exclusive lock on an open file. fcntl only exists on POSIX
+    and msvcrt only on Windows, so they are imported where they are used.
+    """
+    if os.name == "nt":
+        import msvcrt
+
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    import fcntl
+
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def unlock_file(fd: int) -> None:
+    if os.name == "nt":
+        import msvcrt
+
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        return
+
+    import fcntl
+
+    fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class TrainingInProgressError(Exception):
+    """Another process is training the stage and there is no job to join."""
+
+
+class TrainingLock:
+    """
+    Exclusive lock on the training pipeline of a stage, shared by every
+    uvicorn worker and every host that uses the same database.
+
+    - Postgres: a session-level advisory lock held on a dedicated connection
+      (in autocommit mode, so it is never left "idle in transaction").
+    - Other engines (SQLite in tests and local runs): a file lock (flock, or
+      msvcrt on Windows) next to the stage's models, which covers the
+      workers of one host.
+
+    Both are released by the OS/server if the holder dies, so a lock that
+    cannot be acquired always belongs to a live process.
+    """
+
+    lock_dir = Path(__file__).resolve().parents[3] / "ml_package" / "saluai5_ml"
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._connection = None
+        self._fd: Optional[int] = None
+
+    @property
+    def key(self) -> int:
+        """Stable signed 64-bit key for pg_advisory_lock."""
+        digest = hashlib.sha1(f"training:{self.stage}".encode()).digest()
+        return int.from_bytes(digest[:8], "big", signed=True)
+
+    @property
+    def path(self) -> Path:
+        return self.lock_dir / "models_repository" / self.stage / ".training.lock"
+
+    @property
+    def held(self) -> bool:
+        return self._connection is not None or self._fd is not None
+
+    async def acquire(self) -> bool:
+        """Tries to take the lock without waiting. Returns whether it did."""
+        engine = get_engine()
+        if engine.url.get_backend_name() == "postgresql":
+            connection = await engine.connect()
+            connection = await connection.execution_options(
+                isolation_level="AUTOCOMMIT"
+            )
+            acquired = (
+                await connection.execute(select(func.pg_try_advisory_lock(self.key)))
+            ).scalar_one()
+            if not acquired:
+                await connection.close()
+                return False
+            self._connection = connection
+            return True
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if not lock_file(fd):
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    async def release(self) -> None:
+        """Releases the lock if it is held."""
+        if self._connection is not None:
+            try:
+                await self._connection.execute(
+                    select(func.pg_advisory_unlock(self.key))
+                )
+            finally:
+                await self._connection.close()
+                self._connection = None
+        if self._fd is not None:
+            unlock_file(self._fd)
+            os.close(self._fd)
+            self._fd = None
@@ -1,59 +1,274 @@
 import asyncio
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from typing import Dict, Optional
 
-from app.databases.postgresql.db import get_async_session_local
+from app.core.config import ml_config
+from app.databases.postgresql.db import get_async_session_local, get_engine
+from app.databases.postgresql.models import TrainingJob
+from app.repositories.training_job import TrainingJobRepository
+from app.services.ml_model_services.rescoring_service import RescoringService
+from app.services.ml_model_services.training_lock import (
+    TrainingInProgressError,
+    TrainingLock,
+)
+from ml_package.saluai5_ml.inference_pipeline.registry import active_model_registry
 from ml_package.saluai5_ml.training_pipeline.orchestrator import TrainingOrchestrator
 
 logger = logging.getLogger("uvicorn.error")
 
 
+def run_training_job(job_id: int, force: bool = False) -> dict:
+    """
+    Entry point of the training worker process. Runs the whole pipeline with
+    its own event loop and DB engine, marks the job as running and stores the
+    stage timings as each stage finishes. The terminal state (and the stage
+    profile, when profiling is enabled) is recorded by the API process, which
+    also sees worker crashes.
+    """
+    return asyncio.run(_run_training_job(job_id, force))
+
+
+async def _run_training_job(job_id: int, force: bool = False) -> dict:
+    SessionLocal = get_async_session_local()
+    try:
+        async with SessionLocal() as session, SessionLocal() as job_session:
+            job = await TrainingJobRepository.get_by_id(job_session, job_id)
+            job = await TrainingJobRepository.update_partial(
+                job_session,
+                job,
+                status="running",
+                started_at=datetime.now(timezone.utc),
+            )
+
+            async def on_stage(timings: Dict[str, float]) -> None:
+                await TrainingJobRepository.update_partial(
+                    job_session, job, stage_timings=timings
+                )
+
+            orchestrator = TrainingOrchestrator(stage=job.stage, force=force)
+            result = await orchestrator.run(session, on_stage=on_stage)
+            return {
+                "version": result.version,
+                "active": bool(result.active),
+                "noop": orchestrator.noop,
+                "stage_timings": orchestrator.timings,
+                "profile": orchestrator.profiler.report or None,
+                "training_stats": orchestrator.training_stats or None,
+            }
+    finally:
+        # El loop de este job se cierra: las conexiones no sirven al siguiente
+        await get_engine().dispose()
+
+
 class TrainingService:
     """
     Wrapper service to run ML training using a proper DB session.
+
+    Jobs started with `start` are recorded in `training_jobs` and the pandas /
+    sklearn work runs in a separate worker process, so the API event loop
+    stays responsive while a model trains.
+
+    Only one pipeline per stage runs at a time in the whole cluster: the
+    process that owns a job holds the stage's TrainingLock until the job
+    ends, and triggers that arrive meanwhile (from any uvicorn worker) join
+    that job instead of starting their own.
     """
 
-    def __init__(self, stage: str = "dev", config=None):
+    _tasks: Dict[int, asyncio.Task] = {}
+    _pool: Optional[ProcessPoolExecutor] = None
+
+    def __init__(self, stage: str = "dev", config=None, force: bool = False):
         self.stage = stage
         self.config = config
-        self.orchestrator = TrainingOrchestrator(stage=self.stage, config=self.config)
+        self.orchestrator = TrainingOrchestrator(
+            stage=self.stage, config=self.config, force=force
+        )
 
     async def run_training(self):
         """
-        Runs the training pipeline using a DB session created the same way FastAPI does.
+        Runs the training pipeline in this process, using a DB session created
+        the same way FastAPI does.
         """
+        lock = TrainingLock(self.stage)
+        if not await lock.acquire():
+            raise TrainingInProgressError(
+                f"Ya hay un entrenamiento en curso para el stage '{self.stage}'"
+            )
+
         SessionLocal = get_async_session_local()
+        try:
+            async with SessionLocal() as session:
+                result = await self.orchestrator.run(session)
+        finally:
+            await lock.release()
 
-        async with SessionLocal() as session:
-            result = await self.orchestrator.run(session)
+        # La nueva version fue promovida: refrescar los episodios abiertos
+        if (
+            not self.orchestrator.noop
+            and result.active
+            and ml_config.rescoring_on_activation
+        ):
+            await RescoringService.start(self.stage)
 
         return result
 
     @staticmethod
-    async def execute_background_task(stage: str):
+    def get_pool() -> ProcessPoolExecutor:
+        """Creates the training worker pool lazily on the first job."""
+        if TrainingService._pool is None:
+            TrainingService._pool = ProcessPoolExecutor(
+                max_workers=ml_config.training_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return TrainingService._pool
+
+    @staticmethod
+    async def start(stage: str, force: bool = False) -> TrainingJob:
         """
-        Método estático para ser llamado por BackgroundTasks.
-        Maneja logs y excepciones ya que no hay respuesta HTTP.
+        Queues a training job for `stage` and returns it immediately. If the
+        stage is already training, returns the running job instead. Unless
+        `force` is set, the job ends as "skipped" when the training set did
+        not change since the latest version.
         """
-        logger.info(
-            f"🔄 [BACKGROUND] Iniciando reentrenamiento automático para stage: {stage}"
+        SessionLocal = get_async_session_local()
+        lock = TrainingLock(stage)
+        if not await lock.acquire():
+            return await TrainingService.join_running_job(stage)
+
+        try:
+            async with SessionLocal() as session:
+                # Nadie tenía el lock: los jobs sin terminar son de un proceso
+                # que murió y ya no van a terminar
+                await TrainingJobRepository.fail_unfinished(
+                    session,
+                    stage,
+                    error="Interrumpido: el proceso que lo ejecutaba terminó",
+                )
+                job = await TrainingJobRepository.create(session, stage=stage)
+        except Exception:
+            await lock.release()
+            raise
+
+        TrainingService._tasks[job.id] = asyncio.create_task(
+            TrainingService.run_job(job.id, stage, force, lock)
         )
+        logger.info(f"🔄 [TRAINING] Job {job.id} en cola para stage: {stage}")
+        return job
 
+    @staticmethod
+    async def join_running_job(stage: str, attempts: int = 20) -> TrainingJob:
+        """
+        Returns the unfinished job of the process that holds the lock. The
+        holder may not have committed its job yet, so it retries briefly.
+        """
+        SessionLocal = get_async_session_local()
+        for _ in range(attempts):
+            async with SessionLocal() as session:
+                job = await TrainingJobRepository.get_unfinished_for_stage(
+                    session, stage
+                )
+            if job is not None:
+                logger.info(f"[TRAINING] Uniéndose al job {job.id} del stage: {stage}")
+                return job
+            await asyncio.sleep(0.1)
+
+        raise TrainingInProgressError(
+            f"Ya hay un entrenamiento en curso para el stage '{stage}'"
+        )
+
+    @staticmethod
+    async def run_job(
+        job_id: int,
+        stage: str,
+        force: bool = False,
+        lock: Optional[TrainingLock] = None,
+    ) -> None:
+        """
+        Waits for the worker process and records how the job ended. Releases
+        the stage lock once the job has its final state.
+        """
         try:
-            service = TrainingService(stage=stage)
-            result = await service.run_training()
+            result = await TrainingService.wait_for_worker(job_id, force)
+        finally:
+            TrainingService._tasks.pop(job_id, None)
+            if lock is not None:
+                await lock.release()
 
-            logger.info(
-                "[BACKGROUND] Entrenamiento automático finalizado exitosamente."
+        if result is None or result["noop"]:
+            return
+
+        # La version activa pudo cambiar en el worker
+        active_model_registry.invalidate()
+        if result["active"] and ml_config.rescoring_on_activation:
+            await RescoringService.start(stage)
+
+    @staticmethod
+    async def wait_for_worker(job_id: int, force: bool) -> Optional[dict]:
+        """Runs the job in the worker pool and stores its terminal state."""
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(
+                TrainingService.get_pool(), run_training_job, job_id, force
+            )
+
+        except Exception as e:
+            logger.error(f"❌ [TRAINING] Falló el job {job_id}: {str(e)}")
+            if isinstance(e, BrokenProcessPool):
+                # El worker murió (p. ej. sin memoria): el próximo job crea otro pool
+                TrainingService._pool = None
+            await TrainingService.finish_job(job_id, status="failed", error=str(e))
+            return None
+
+        if result["noop"]:
+            await TrainingService.finish_job(
+                job_id,
+                status="skipped",
+                version=result["version"],
+                stage_timings=result["stage_timings"],
+                profile=result.get("profile"),
+                training_stats=result.get("training_stats"),
             )
             logger.info(
-                f"📊 Nueva versión: {result.version} | Fecha: {result.trained_at}"
+                f"[TRAINING] Job {job_id} sin cambios en los datos: "
+                f"se mantiene {result['version']}"
             )
+            return result
 
-        except Exception as e:
-            logger.error(
-                f"❌ [BACKGROUND] Falló el pipeline de entrenamiento automático: {str(e)}"
+        await TrainingService.finish_job(
+            job_id,
+            status="succeeded",
+            version=result["version"],
+            stage_timings=result["stage_timings"],
+            profile=result.get("profile"),
+            training_stats=result.get("training_stats"),
+        )
+        logger.info(
+            f"✅ [TRAINING] Job {job_id} finalizado. Nueva versión: {result['version']}"
+        )
+        return result
+
+    @staticmethod
+    async def finish_job(job_id: int, **changes) -> None:
+        SessionLocal = get_async_session_local()
+        async with SessionLocal() as session:
+            job = await TrainingJobRepository.get_by_id(session, job_id)
+            if job is None:
+                return
+            await TrainingJobRepository.update_partial(
+                session, job, finished_at=datetime.now(timezone.utc), **changes
             )
 
+    @staticmethod
+    def shutdown() -> None:
+        """Releases the worker pool."""
+        if TrainingService._pool is not None:
+            TrainingService._pool.shutdown(wait=False, cancel_futures=True)
+            TrainingService._pool = None
+
 
 if __name__ == "__main__":
     import sys
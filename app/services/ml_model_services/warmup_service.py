@@ -0,0 +1,124 @@
+"""Startup warm-up of the inference pipeline and readiness state."""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List
+
+from sqlalchemy import text
+
+from app.databases.postgresql.db import get_async_session_local, get_engine
+from app.schemas.ml_model.inference import InferenceRequest
+from ml_package.saluai5_ml.inference_pipeline.inference_engine import InferenceEngine
+from ml_package.saluai5_ml.inference_pipeline.registry import active_model_registry
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class ModelWarmup:
+    """
+    Prepares the service before it receives inference traffic: opens pooled
+    DB connections, loads the artifacts of the active version of each stage
+    and runs one synthetic prediction through the full pipeline, so the first
+    real request does not pay for imports, connections or unpickling.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.stages: Dict[str, dict] = {}
+        self.db_connections = 0
+        self.duration_ms = 0.0
+
+    @staticmethod
+    def synthetic_episode() -> dict:
+        """An episode with every feature missing, filled in by imputation."""
+        return InferenceRequest(diagnostics=[]).model_dump(
+            exclude={"id_episodio", "stage", "model_type", "numero_episodio"}
+        )
+
+    async def open_db_connections(self, n_connections: int) -> int:
+        """
+        Opens `n_connections` connections at the same time and returns them to
+        the pool, so they stay available for the first requests.
+        """
+        engine = get_engine()
+        connections = []
+        try:
+            for _ in range(n_connections):
+                connection = await engine.connect()
+                connections.append(connection)
+                await connection.execute(text("SELECT 1"))
+        finally:
+            for connection in connections:
+                await connection.close()
+        return len(connections)
+
+    async def warm_up_stage(self, stage: str) -> dict:
+        """Loads the active version of a stage and runs a synthetic prediction."""
+        SessionLocal = get_async_session_local()
+        async with SessionLocal() as session:
+            try:
+                version = await active_model_registry.get_active_version(stage, session)
+            except ValueError as e:
+                return {"status": "no_active_version", "detail": str(e)}
+
+            # Artifacts are loaded wherever the pipeline runs: this process
+            # or the worker of the configured executor backend
+            engine = InferenceEngine.for_stage(stage)
+            await engine.run_batch(session, [self.synthetic_episode()], use_cache=False)
+        return {"status": "warm", "version": version}
+
+    async def warm_up_stages(self, stages: List[str]) -> None:
+        """Warms up each stage, recording failures per stage."""
+        for stage in stages:
+            try:
+                self.stages[stage] = await self.warm_up_stage(stage)
+            except Exception as e:
+                logger.error(f"❌ [WARMUP] Stage '{stage}' failed: {e}")
+                self.stages[stage] = {"status": "error", "detail": str(e)}
+
+    def failed_stages(self) -> List[str]:
+        """Requested stages whose active version is not loaded."""
+        return [
+            stage for stage, result in self.stages.items() if result["status"] != "warm"
+        ]
+
+    async def run(
+        self, stages: List[str], db_connections: int, retry_seconds: float = 30.0
+    ) -> None:
+        """
+        Runs the whole warm-up. The service becomes ready only once every
+        requested stage has its active version loaded; failed stages (no
+        active version yet, missing artifacts, DB down) are retried every
+        `retry_seconds` until they load.
+        """
+        started_at = time.perf_counter()
+        try:
+            self.db_connections = await self.open_db_connections(db_connections)
+        except Exception as e:
+            logger.error(f"❌ [WARMUP] Could not open DB connections: {e}")
+
+        await self.warm_up_stages(stages)
+        while self.failed_stages():
+            failed = {stage: self.stages[stage] for stage in self.failed_stages()}
+            logger.warning(
+                f"[WARMUP] Not ready, retrying in {retry_seconds}s: {failed}"
+            )
+            await asyncio.sleep(retry_seconds)
+            await self.warm_up_stages(self.failed_stages())
+
+        self.duration_ms = round((time.perf_counter() - started_at) * 1000, 1)
+        self.ready = True
+        logger.info(f"✅ [WARMUP] Completed in {self.duration_ms} ms: {self.stages}")
+
+    def status(self) -> dict:
+        return {
+            "status": "ready" if self.ready else "warming_up",
+            "stages": self.stages,
+            "failed_stages": self.failed_stages(),
+            "db_connections": self.db_connections,
+            "duration_ms": self.duration_ms,
+        }
+
+
+model_warmup = ModelWarmup()
@@ -1,12 +1,15 @@
 """Prediction service for ML model inference."""
 
-from typing import Literal
+from typing import List, Literal
 
 from fastapi import HTTPException, status
 
 from app.databases.postgresql.models import User
 from ml_package.saluai5_ml.models.random_forest.inference import (
-    make_prediction as predict_rf,
+    make_predictions as predict_rf_batch,
+)
+from ml_package.saluai5_ml.models.random_forest.inference import (
+    reload_artifacts as reload_rf_artifacts,
 )
 
 
@@ -34,6 +37,20 @@ class PredictionService:
                 'model': str (model name used)
             }
         """
+        return PredictionService.predict_episodes_pertinence(
+            [episode_data], model_type=model_type, current_user=current_user
+        )[0]
+
+    @staticmethod
+    def predict_episodes_pertinence(
+        episodes_data: List[dict],
+        model_type: Literal["random_forest", "xgboost"] = "random_forest",
+        current_user: User | None = None,
+    ) -> List[dict]:
+        """
+        Predict the pertinence of several episodes with one encoding pass and
+        one model call. Returns one result per episode, in the same order.
+        """
         if current_user is None or not (
             getattr(current_user, "is_doctor", False)
             or getattr(current_user, "is_chief_doctor", False)
@@ -46,12 +63,23 @@ class PredictionService:
 
         # Select predictor based on model type
         if model_type == "random_forest":
-            result = predict_rf(episode_data)
+            results = predict_rf_batch(episodes_data)
         else:
             raise ValueError(f"Invalid model_type: {model_type}.'")
 
-        # Enhance result with label and model info
-        result["label"] = "PERTINENTE" if result["prediction"] == 1 else "NO PERTINENTE"
-        result["model"] = model_type
+        # Enhance results with label and model info
+        for result in results:
+            result["label"] = (
+                "PERTINENTE" if result["prediction"] == 1 else "NO PERTINENTE"
+            )
+            result["model"] = model_type
+
+        return results
 
-        return result
+    @staticmethod
+    def reload_models() -> None:
+        """
+        Reload the model, encoders and representative values of the legacy
+        predictors from disk. They are otherwise loaded once per process.
+        """
+        reload_rf_artifacts()
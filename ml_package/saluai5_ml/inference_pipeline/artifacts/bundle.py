@@ -0,0 +1,124 @@
+import json
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+from ml_package.saluai5_ml.inference_pipeline.artifacts.flat_forest import FlatForest
+from ml_package.saluai5_ml.inference_pipeline.data_preparation.codec import FeatureCodec
+
+
+class ArtifactBundle:
+    """
+    Formato de artefactos "zero-copy" de una version: un directorio con un
+    manifest.json pequeño y un bloque .npy sin comprimir por cada arreglo
+    numérico grande (nodos del bosque, vectores del MinMaxScaler, posiciones
+    del codec). Las tablas de categorías y las estadísticas de imputación son
+    pequeñas y van dentro del manifest.
+
+    Los bloques se cargan con mmap_mode="r": el sistema operativo comparte las
+    páginas entre todos los procesos que sirven la misma version y solo lee
+    del disco las que efectivamente se usan, en vez de deserializar una copia
+    privada por proceso como ocurre con joblib/pickle.
+    """
+
+    format_version = 1
+    manifest_name = "manifest.json"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.path / self.manifest_name
+
+    def exists(self) -> bool:
+        """Indica si la version tiene su bundle exportado."""
+        return self.manifest_path.exists()
+
+    def get_size(self) -> int:
+        """Tamaño en disco (bytes) del bundle."""
+        if not self.path.exists():
+            return 0
+        return sum(path.stat().st_size for path in self.path.iterdir())
+
+    def save(
+        self,
+        model,
+        data_encoders,
+        multilabel_classes,
+        imputation_statistics=None,
+    ) -> None:
+        """
+        Exporta el modelo sklearn y sus encoders. El modelo se guarda aplanado
+        (FlatForest) y los encoders como el estado compilado del FeatureCodec.
+        El manifest se escribe al final, así un bundle a medio escribir nunca
+        se considera válido.
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        flat_forest = FlatForest.from_sklearn(model)
+        codec_arrays, codec_tables = FeatureCodec(model, data_encoders).get_state()
+
+        blocks = {}
+        for prefix, arrays in (
+            ("forest", flat_forest.get_arrays()),
+            ("codec", codec_arrays),
+        ):
+            for name, array in arrays.items():
+                file_name = f"{prefix}_{name}.npy"
+                np.save(self.path / file_name, np.ascontiguousarray(array))
+                blocks[f"{prefix}.{name}"] = file_name
+
+        manifest = {
+            "format_version": self.format_version,
+            "blocks": blocks,
+            "model": {
+                "type": "flat_forest",
+                "classes": [
+                    FeatureCodec.to_json_value(c) for c in flat_forest.classes_
+                ],
+                "max_depth": int(flat_forest.max_depth),
+            },
+            "codec": codec_tables,
+            "multilabel_classes": sorted(
+                FeatureCodec.to_json_value(c) for c in multilabel_classes
+            ),
+            "imputation_statistics": imputation_statistics,
+        }
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps(manifest, default=FeatureCodec.to_json_value, ensure_ascii=False)
+        )
+        tmp_path.replace(self.manifest_path)
+
+    def load_block(self, file_name: str) -> np.ndarray:
+        """Mapea un bloque .npy en memoria, de solo lectura y sin copiarlo."""
+        return np.load(self.path / file_name, mmap_mode="r").view(np.ndarray)
+
+    def load(self) -> Dict:
+        """Carga el bundle con el mismo contrato que ArtifactsLoader.run."""
+        manifest = json.loads(self.manifest_path.read_text())
+        if manifest.get("format_version") != self.format_version:
+            raise ValueError(
+                f"Formato de artefactos no soportado: {manifest.get('format_version')}"
+            )
+
+        arrays = {"forest": {}, "codec": {}}
+        for key, file_name in manifest["blocks"].items():
+            prefix, name = key.split(".", 1)
+            arrays[prefix][name] = self.load_block(file_name)
+
+        model = FlatForest(
+            classes=np.array(manifest["model"]["classes"], dtype=object),
+            max_depth=manifest["model"]["max_depth"],
+            **arrays["forest"],
+        )
+        return {
+            "model": model,
+            "data_encoders": None,
+            "multilabel_classes": set(manifest["multilabel_classes"]),
+            "imputation_statistics": manifest["imputation_statistics"],
+            "feature_codec": FeatureCodec.from_state(
+                arrays["codec"], manifest["codec"]
+            ),
+        }
@@ -0,0 +1,130 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.core.config import ml_config
+from ml_package.saluai5_ml.inference_pipeline.artifacts.loader import ArtifactsLoader
+
+
+class ArtifactsCache:
+    """
+    Cache en memoria, compartido por todo el proceso, de los artefactos de
+    inferencia (modelo + encoders) indexados por version (ej: prod_v4).
+
+    - Cada version se carga una sola vez, aunque lleguen requests concurrentes.
+    - La carga (joblib.load) se ejecuta fuera del event loop.
+    - Se desalojan las versiones menos usadas (LRU) cuando el tamaño de los
+      artefactos supera el presupuesto de memoria configurado.
+    - `generation` aumenta con cada invalidación. Los workers del pool de
+      procesos tienen su propio cache y lo sincronizan con sync(generation).
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple[Dict, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version_locks: Dict[str, threading.Lock] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.generation = 0
+
+    def _get_cached(self, version: str) -> Optional[Dict]:
+        """Retorna los artefactos cacheados y los marca como recién usados."""
+        with self._lock:
+            entry = self._entries.get(version)
+            if entry is None:
+                return None
+            self._entries.move_to_end(version)
+            return entry[0]
+
+    def _get_version_lock(self, version: str) -> threading.Lock:
+        with self._lock:
+            return self._version_locks.setdefault(version, threading.Lock())
+
+    def load(self, version: str) -> Dict:
+        """
+        Obtiene los artefactos de una version de forma síncrona, cargándolos
+        desde disco solo si no están en cache. Seguro para usar desde threads.
+        """
+        artifacts = self._get_cached(version)
+        if artifacts is not None:
+            return artifacts
+
+        with self._get_version_lock(version):
+            artifacts = self._get_cached(version)
+            if artifacts is not None:
+                return artifacts
+
+            loader = ArtifactsLoader(version=version)
+            artifacts = loader.run()
+            self._store(version, artifacts, loader.get_artifacts_size())
+            return artifacts
+
+    async def get(self, version: str) -> Dict:
+        """
+        Obtiene los artefactos de una version sin bloquear el event loop.
+        Las requests concurrentes por la misma version esperan una única carga.
+        """
+        artifacts = self._get_cached(version)
+        if artifacts is not None:
+            return artifacts
+
+        pending = self._pending.get(version)
+        if pending is None:
+            pending = asyncio.ensure_future(asyncio.to_thread(self.load, version))
+            self._pending[version] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(version, None))
+        return await asyncio.shield(pending)
+
+    def _store(self, version: str, artifacts: Dict, size: int) -> None:
+        """Guarda una version y desaloja las menos usadas si se excede el presupuesto."""
+        with self._lock:
+            self._entries[version] = (artifacts, size)
+            self._entries.move_to_end(version)
+            while len(self._entries) > 1 and self.total_bytes() > self.max_bytes:
+                self._entries.popitem(last=False)
+
+    def total_bytes(self) -> int:
+        """Tamaño aproximado (en disco) de los artefactos cacheados."""
+        return sum(size for _, size in self._entries.values())
+
+    def invalidate(self, version: str) -> None:
+        """Elimina una version del cache."""
+        with self._lock:
+            self._entries.pop(version, None)
+            self.generation += 1
+
+    def invalidate_stage(self, stage: str, keep: Optional[str] = None) -> None:
+        """Elimina todas las versiones de un stage, salvo la indicada en `keep`."""
+        with self._lock:
+            for version in list(self._entries):
+                if version.split("_v")[0] == stage and version != keep:
+                    del self._entries[version]
+            self.generation += 1
+
+    def clear(self) -> None:
+        """Vacía el cache."""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def sync(self, generation: int) -> None:
+        """
+        Cache de un worker del pool de procesos: si el proceso principal
+        invalidó versiones desde la última tarea (otra `generation`), se vacía
+        y las versiones vigentes se vuelven a cargar desde disco. Así una
+        promoción o un stage borrado y reentrenado (mismo label) no sigue
+        sirviendo el modelo anterior.
+        """
+        with self._lock:
+            if generation != self.generation:
+                self._entries.clear()
+                self.generation = generation
+
+    def cached_versions(self) -> list:
+        """Versiones cacheadas, de la menos a la más recientemente usada."""
+        with self._lock:
+            return list(self._entries)
+
+
+artifacts_cache = ArtifactsCache(max_bytes=ml_config.artifact_cache_max_bytes)
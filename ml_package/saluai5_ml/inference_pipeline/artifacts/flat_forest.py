@@ -0,0 +1,162 @@
+from pathlib import Path
+
+import numpy as np
+import sklearn
+from sklearn.utils.fixes import parse_version
+
+# Desde sklearn 1.4 tree_.value guarda fracciones por clase; antes guardaba
+# conteos y predict_proba los normalizaba en cada llamada
+TREE_VALUES_ARE_FRACTIONS = parse_version(sklearn.__version__) >= parse_version("1.4")
+
+
+class FlatForest:
+    """
+    Exportación de un RandomForestClassifier a arreglos NumPy contiguos
+    (structure-of-arrays): feature, threshold, hijos izquierdo/derecho y valor
+    de hoja de todos los nodos de todos los árboles. El evaluador recorre todos
+    los árboles a la vez, un nivel por iteración, evitando el overhead por
+    árbol de predict_proba. Las probabilidades son idénticas a las de sklearn.
+    """
+
+    def __init__(
+        self,
+        feature,
+        threshold,
+        left,
+        right,
+        missing_go_to_left,
+        value,
+        roots,
+        classes,
+        max_depth,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_go_to_left = missing_go_to_left
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.max_depth = int(max_depth)
+        self.n_estimators = len(roots)
+
+    @classmethod
+    def from_sklearn(cls, model) -> "FlatForest":
+        """
+        Aplana los árboles del bosque. Los índices de hijos pasan a ser
+        globales y cada hoja apunta a sí misma, de modo que el recorrido puede
+        iterar max_depth niveles sin distinguir hojas de nodos internos.
+        """
+        features, thresholds, lefts, rights, missing, values, roots = (
+            [] for _ in range(7)
+        )
+        n_classes = len(model.classes_)
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left < 0
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            missing.append(
+                tree.missing_go_to_left
+                if hasattr(tree, "missing_go_to_left")
+                else np.zeros(tree.node_count, dtype=np.uint8)
+            )
+
+            tree_values = np.array(tree.value[:, 0, :n_classes], dtype=np.float64)
+            if not TREE_VALUES_ARE_FRACTIONS:
+                normalizer = tree_values.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                tree_values /= normalizer
+            values.append(tree_values)
+
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            missing_go_to_left=np.concatenate(missing).astype(bool),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.intp),
+            classes=np.asarray(model.classes_),
+            max_depth=max_depth,
+        )
+
+    def get_arrays(self) -> dict:
+        """Arreglos numéricos del bosque, por nombre."""
+        return {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "missing_go_to_left": self.missing_go_to_left,
+            "value": self.value,
+            "roots": self.roots,
+        }
+
+    def save(self, path: Path) -> None:
+        """Guarda los arreglos en un archivo .npz sin comprimir."""
+        np.savez(
+            path,
+            classes=self.classes_.astype(str),
+            max_depth=np.array(self.max_depth),
+            **self.get_arrays(),
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "FlatForest":
+        """Carga un bosque exportado con save."""
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(
+                feature=arrays["feature"].astype(np.intp),
+                threshold=arrays["threshold"],
+                left=arrays["left"].astype(np.intp),
+                right=arrays["right"].astype(np.intp),
+                missing_go_to_left=arrays["missing_go_to_left"],
+                value=arrays["value"],
+                roots=arrays["roots"].astype(np.intp),
+                classes=arrays["classes"].astype(object),
+                max_depth=arrays["max_depth"],
+            )
+
+    def apply(self, X) -> np.ndarray:
+        """
+        Retorna el índice global de la hoja alcanzada por cada fila en cada
+        árbol, con forma (árboles, filas).
+        """
+        # Mismo casteo que sklearn: los árboles comparan X en float32
+        # contra umbrales float64
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[np.newaxis, :]
+        nodes = np.repeat(self.roots[:, np.newaxis], X.shape[0], axis=1)
+        for _ in range(self.max_depth):
+            values = X[rows, self.feature[nodes]].astype(np.float64)
+            go_left = values <= self.threshold[nodes]
+            is_missing = np.isnan(values)
+            if is_missing.any():
+                go_left = np.where(is_missing, self.missing_go_to_left[nodes], go_left)
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Probabilidad por clase: promedio de los valores de hoja de cada árbol.
+        Se suma árbol por árbol en orden (cumsum), igual que sklearn, para
+        obtener exactamente los mismos resultados en punto flotante.
+        """
+        leaf_values = self.value[self.apply(X)]
+        return np.cumsum(leaf_values, axis=0)[-1] / self.n_estimators
+
+    def predict(self, X) -> np.ndarray:
+        """Clase de mayor probabilidad para cada fila."""
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
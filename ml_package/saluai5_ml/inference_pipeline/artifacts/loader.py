@@ -1,8 +1,14 @@
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
 import joblib
 
+from app.core.config import ml_config
+from ml_package.saluai5_ml.inference_pipeline.artifacts.bundle import ArtifactBundle
+from ml_package.saluai5_ml.inference_pipeline.artifacts.flat_forest import FlatForest
+from ml_package.saluai5_ml.inference_pipeline.data_preparation.codec import FeatureCodec
+from ml_package.saluai5_ml.inference_pipeline.version_engine import VersionEngine
+
 
 class ArtifactsLoader:
 
@@ -41,6 +47,40 @@ class ArtifactsLoader:
                 f"Detalle técnico: {e}"
             ) from e
 
+    def get_imputation_statistics_path(self) -> Path:
+        """
+        Ruta del snapshot de estadísticas de imputación de la version.
+        """
+        stage = self.version.split("_v")[0]
+        base_path = self.get_base_directory_package()
+        return (
+            base_path / "encoders_repository" / stage / f"imputation/{self.version}.pkl"
+        )
+
+    def has_imputation_statistics(self) -> bool:
+        """
+        Indica si la version tiene estadísticas de imputación serializadas.
+        """
+        return self.get_imputation_statistics_path().exists()
+
+    def load_imputation_statistics(self) -> Optional[Dict]:
+        """
+        Carga las estadísticas de imputación (promedios y modas) de la version.
+        Retorna None para versiones entrenadas antes de que se serializaran.
+        """
+        statistics_path = self.get_imputation_statistics_path()
+        if not statistics_path.exists():
+            return None
+        try:
+            return joblib.load(statistics_path)
+
+        except Exception as e:
+            raise FileNotFoundError(
+                f"Error crítico del sistema: No se pudieron cargar los artefactos del modelo {self.version}"
+                f"(estadísticas de imputación) en la ruta {statistics_path}. Entrena o activa otra version del modelo."
+                f"Detalle técnico: {e}"
+            ) from e
+
     def load_ml_model(self) -> any:
         """
         Load the trained model from a file.
@@ -59,6 +99,102 @@ class ArtifactsLoader:
                 f"Detalle técnico: {e}"
             ) from e
 
+    def get_flat_forest_path(self) -> Path:
+        """
+        Ruta del bosque exportado en arreglos NumPy (.npz) de la version.
+        """
+        stage = self.version.split("_v")[0]
+        base_path = self.get_base_directory_package()
+        return base_path / "models_repository" / stage / f"{self.version}.npz"
+
+    def load_flat_forest(self, model) -> FlatForest:
+        """
+        Carga el bosque aplanado de la version. Las versiones entrenadas antes
+        de que se exportara se aplanan al vuelo desde el modelo sklearn.
+        """
+        flat_forest_path = self.get_flat_forest_path()
+        if not flat_forest_path.exists():
+            return FlatForest.from_sklearn(model)
+        try:
+            return FlatForest.load(flat_forest_path)
+
+        except Exception as e:
+            raise FileNotFoundError(
+                f"Error crítico del sistema: No se pudieron cargar los artefactos del modelo {self.version}"
+                f"(bosque aplanado) en la ruta {flat_forest_path}. Entrena o activa otra version del modelo."
+                f"Detalle técnico: {e}"
+            ) from e
+
+    def get_bundle(self) -> ArtifactBundle:
+        """
+        Bundle mapeable en memoria de la version
+        (models_repository/{stage}/{version}/manifest.json + bloques .npy).
+        """
+        stage = self.version.split("_v")[0]
+        base_path = self.get_base_directory_package()
+        return ArtifactBundle(base_path / "models_repository" / stage / self.version)
+
+    def uses_bundle(self) -> bool:
+        """Indica si la version se carga desde su bundle en vez de los .pkl."""
+        return ml_config.artifact_format == "mmap" and self.get_bundle().exists()
+
+    def load_bundle(self) -> Dict:
+        """
+        Carga la version desde su bundle, mapeando los bloques .npy en memoria.
+        """
+        bundle = self.get_bundle()
+        try:
+            return bundle.load()
+
+        except Exception as e:
+            raise FileNotFoundError(
+                f"Error crítico del sistema: No se pudieron cargar los artefactos del modelo {self.version}"
+                f"(bundle) en la ruta {bundle.path}. Entrena o activa otra version del modelo."
+                f"Detalle técnico: {e}"
+            ) from e
+
+    def export_bundle(self) -> None:
+        """
+        Exporta el bundle de la version a partir de sus .pkl. Sirve tanto al
+        terminar un entrenamiento como para convertir versiones antiguas.
+        """
+        model = self.load_ml_model()
+        data_encoders = self.load_data_encoders()
+        self.get_bundle().save(
+            model,
+            data_encoders,
+            self.get_multilabel_classes(data_encoders[1]),
+            self.load_imputation_statistics(),
+        )
+        print(f"✅ Bundle de artefactos exportado: version {self.version}")
+
+    def get_artifacts_paths(self) -> list:
+        """
+        Retorna las rutas de todos los archivos de artefactos de la version.
+        """
+        stage = self.version.split("_v")[0]
+        base_path = self.get_base_directory_package()
+        encoders_path = base_path / "encoders_repository" / stage
+        return [
+            base_path / "models_repository" / stage / f"{self.version}.pkl",
+            encoders_path / f"categorical/{self.version}.pkl",
+            encoders_path / f"multilabel/{self.version}.pkl",
+            encoders_path / f"numerical/{self.version}.pkl",
+            encoders_path / f"imputation/{self.version}.pkl",
+            self.get_flat_forest_path(),
+        ]
+
+    def get_artifacts_size(self) -> int:
+        """
+        Tamaño en disco (bytes) de los artefactos de la version. Se usa como
+        aproximación de la memoria que ocupan una vez cargados.
+        """
+        if self.uses_bundle():
+            return self.get_bundle().get_size()
+        return sum(
+            path.stat().st_size for path in self.get_artifacts_paths() if path.exists()
+        )
+
     def get_multilabel_classes(self, multilabel_encoder) -> set:
         """
         Obtiene las clases del encoder multilabel
@@ -66,15 +202,33 @@ class ArtifactsLoader:
         return set(multilabel_encoder.classes_)
 
     def run(self) -> Dict:
-        """Retorna los encoders y el modelo en un diccionario."""
+        """
+        Retorna los encoders y el modelo en un diccionario, junto al
+        VersionEngine (inmutable) que los usa para inferir.
+        """
+        if self.uses_bundle():
+            artifacts = self.load_bundle()
+        else:
+            artifacts = self.load_pickled_artifacts()
+        artifacts["engine"] = VersionEngine(self.version, artifacts)
+        self.print_successful_operation()
+        return artifacts
+
+    def load_pickled_artifacts(self) -> Dict:
+        """Carga los artefactos desde los .pkl de la version."""
         model = self.load_ml_model()
         data_encoders = self.load_data_encoders()
         multilabel_classes = self.get_multilabel_classes(data_encoders[1])
-        self.print_successful_operation()
+        imputation_statistics = self.load_imputation_statistics()
+        feature_codec = FeatureCodec(model, data_encoders)
+        if ml_config.inference_backend == "flat_forest":
+            model = self.load_flat_forest(model)
         return {
             "model": model,
             "data_encoders": data_encoders,
             "multilabel_classes": multilabel_classes,
+            "imputation_statistics": imputation_statistics,
+            "feature_codec": feature_codec,
         }
 
     def print_successful_operation(self) -> None:
@@ -1,5 +1,5 @@
 from decimal import Decimal
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List
 
 import pandas as pd
 import sqlalchemy as sa
@@ -110,6 +110,79 @@ class DataLoader:
             out.append(row)
         return out
 
+    async def fetch_episodes_by_ids(
+        self, episode_ids: List[int]
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Extrae solo las columnas de features de los episodios indicados, junto
+        a sus diagnosticos. Devuelve un dict con episode_id como clave.
+        """
+        if not episode_ids:
+            return {}
+
+        stmt = self._features_select().where(Episode.id.in_(episode_ids))
+        result = await self.session.execute(stmt)
+        episodes = self._rows_to_features(result.all())
+        return await self.add_diagnostics(episodes)
+
+    async def stream_open_episodes(
+        self, chunk_size: int, after_id: int = 0
+    ) -> AsyncIterator[Dict[int, Dict[str, Any]]]:
+        """
+        Recorre los episodios abiertos (estado_del_caso = "Abierto") con id
+        mayor a `after_id`, en orden de id, usando un cursor del lado del
+        servidor. Entrega chunks de hasta `chunk_size` episodios con sus
+        features (sin diagnosticos; ver add_diagnostics).
+        """
+        stmt = (
+            self._features_select()
+            .where(Episode.estado_del_caso == "Abierto", Episode.id > after_id)
+            .order_by(Episode.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        result = await self.session.stream(stmt)
+        async for rows in result.partitions(chunk_size):
+            yield self._rows_to_features(rows)
+
+    async def count_open_episodes(self, after_id: int = 0) -> int:
+        """Cantidad de episodios abiertos con id mayor a `after_id`."""
+        stmt = select(sa.func.count(Episode.id)).where(
+            Episode.estado_del_caso == "Abierto", Episode.id > after_id
+        )
+        return int((await self.session.execute(stmt)).scalar_one())
+
+    async def add_diagnostics(
+        self, episodes: Dict[int, Dict[str, Any]]
+    ) -> Dict[int, Dict[str, Any]]:
+        """Agrega a cada episodio la lista de cie_code de sus diagnosticos."""
+        diagnostics_map = await self._fetch_diagnostics_map(list(episodes))
+        for episode_id, episode in episodes.items():
+            episode["diagnostics"] = diagnostics_map.get(episode_id, [])
+        return episodes
+
+    def _feature_columns(self) -> List[str]:
+        """Columnas de features del modelo (sin id ni validacion)."""
+        return [
+            col for col in self.column_names if col not in ("id_episodio", "validacion")
+        ]
+
+    def _features_select(self):
+        """SELECT proyectado a Episode.id y las columnas de features."""
+        return select(
+            Episode.id, *[getattr(Episode, col) for col in self._feature_columns()]
+        )
+
+    def _rows_to_features(self, rows) -> Dict[int, Dict[str, Any]]:
+        """Convierte filas (id, features...) en un dict de features por id."""
+        feature_columns = self._feature_columns()
+        out: Dict[int, Dict[str, Any]] = {}
+        for row in rows:
+            episode = {}
+            for col, val in zip(feature_columns, row[1:]):
+                episode[col] = float(val) if isinstance(val, Decimal) else val
+            out[row[0]] = episode
+        return out
+
     def _extract_episode_ids(self, episodes: List[Episode]) -> List[int]:
         """Extrae los IDs de los episodios."""
         episode_ids = []
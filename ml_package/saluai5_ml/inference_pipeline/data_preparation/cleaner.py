@@ -1,3 +1,5 @@
+from typing import List
+
 import numpy as np
 import pandas as pd
 
@@ -54,21 +56,42 @@ class DataCleaner:
     - Limpieza de valores nulos
     - Conversión de tipos
     - Normalización y codificación
+
+    No guarda estado de la request: cada paso recibe el DataFrame y retorna
+    uno nuevo, así una misma instancia se comparte entre requests y threads.
     """
 
-    def upload_data(
-        self, df_db: pd.DataFrame, df_request: pd.DataFrame, labels
-    ) -> None:
-        self.data_db = df_db
-        self.data_db_columns = self.data_db.columns
-        self.data_request = pd.DataFrame([df_request])
-        self.labels = labels
+    def compute_imputation_statistics(self, df_db: pd.DataFrame) -> dict:
+        """
+        Calcula promedios y modas a partir de los episodios de la base de datos.
+        Solo se usa para versiones antiguas que no tienen el snapshot de
+        estadísticas serializado junto a sus encoders.
+        """
+        statistics = {"binary": {}, "numerical": {}, "categorical": {}}
+        for col in self.binary_columns:
+            if col in df_db.columns:
+                mode_value = df_db[col].replace("", np.nan).mode(dropna=True)
+                statistics["binary"][col] = (
+                    mode_value[0] if not mode_value.empty else False
+                )
+        for col in self.numerical_columns:
+            if col in df_db.columns:
+                mean_value = df_db[col].replace("", np.nan).mean(skipna=True)
+                statistics["numerical"][col] = (
+                    0.0 if pd.isna(mean_value) else mean_value
+                )
+        for col in self.categorical_columns:
+            if col in df_db.columns:
+                mode_value = df_db[col].replace("", np.nan).mode(dropna=True)
+                statistics["categorical"][col] = (
+                    mode_value[0] if not mode_value.empty else None
+                )
+        return statistics
 
-    def filter_episode_columns(self) -> None:
+    def filter_episode_columns(self, data: pd.DataFrame) -> pd.DataFrame:
         """
-        Filtra las columnas del DataFrame de la base de datos para que solo
+        Filtra las columnas del DataFrame de la request para que solo
         queden las relevantes para el modelo.
-        Modifica self.data_db in-place (no retorna nada).
         """
         relevant_columns = (
             self.numerical_columns
@@ -76,135 +99,111 @@ class DataCleaner:
             + self.categorical_columns
             + self.multicategorical_columns
         )
-        self.data_request = self.data_request[relevant_columns].copy()
+        return data[relevant_columns].copy()
 
-    def impute_binary_columns(self) -> None:
+    def impute_binary_columns(
+        self, data: pd.DataFrame, statistics: dict
+    ) -> pd.DataFrame:
         """
-        Imputa valores faltantes en columnas binarias usando la moda de cada columna.
-        Modifica self.data_db in-place (no retorna nada). Rellena el df de la request
+        Imputa valores faltantes en columnas binarias usando la moda guardada
+        en las estadísticas de la versión.
         """
         for col in self.binary_columns:
-            if col in self.data_db_columns:
-                self.data_db[col] = self.data_db[col].replace("", np.nan)
-                mode_value = self.data_db[col].mode(dropna=True)
-                mode_value = mode_value[0] if not mode_value.empty else False
-
-                if col in self.data_request.columns:
-                    self.data_request[col] = self.data_request[col].replace(
-                        self.null_like_strings, np.nan
-                    )
-                    self.data_request[col] = (
-                        self.data_request[col]
-                        .fillna(mode_value)
-                        .infer_objects(copy=False)
-                    )
-
-    def impute_numerical_columns(self) -> None:
+            if col in data.columns:
+                mode_value = statistics["binary"].get(col, False)
+                data[col] = data[col].replace(self.null_like_strings, np.nan)
+                data[col] = data[col].fillna(mode_value).infer_objects(copy=False)
+        return data
+
+    def impute_numerical_columns(
+        self, data: pd.DataFrame, statistics: dict
+    ) -> pd.DataFrame:
         """
         Imputa valores faltantes en columnas numéricas usando el promedio (mean)
-        de cada columna. Modifica self.data_db in-place (no retorna nada).
+        guardado en las estadísticas de la versión.
         """
         for col in self.numerical_columns:
-            if col in self.data_db_columns:
-                self.data_db[col] = self.data_db[col].replace("", np.nan)
-                mean_value = self.data_db[col].mean(skipna=True)
-                if pd.isna(mean_value):
-                    mean_value = 0.0
-
-                if col in self.data_request.columns:
-                    self.data_request[col] = self.data_request[col].replace(
-                        self.null_like_strings, np.nan
-                    )
-                    self.data_request[col] = (
-                        self.data_request[col]
-                        .fillna(mean_value)
-                        .infer_objects(copy=False)
-                    )
-
-    def impute_categorical_columns(self) -> None:
+            if col in data.columns:
+                mean_value = statistics["numerical"].get(col, 0.0)
+                data[col] = data[col].replace(self.null_like_strings, np.nan)
+                data[col] = data[col].fillna(mean_value).infer_objects(copy=False)
+        return data
+
+    def impute_categorical_columns(
+        self, data: pd.DataFrame, statistics: dict
+    ) -> pd.DataFrame:
         """
         Imputa valores faltantes en columnas categóricas usando la moda
-        (valor más frecuente) de cada columna.
-        Modifica self.data_db in-place (no retorna nada).
+        (valor más frecuente) guardada en las estadísticas de la versión.
         """
         for col in self.categorical_columns:
-            if col in self.data_db_columns:
-                self.data_db[col] = self.data_db[col].replace("", np.nan)
-                mode_value = self.data_db[col].mode(dropna=True)
-                mode_value = mode_value[0] if not mode_value.empty else None
-
-                if col in self.data_request.columns:
-                    self.data_request[col] = self.data_request[col].replace(
-                        self.null_like_strings, np.nan
-                    )
-                    self.data_request[col] = (
-                        self.data_request[col]
-                        .fillna(mode_value)
-                        .infer_objects(copy=False)
-                    )
-                    if col in ["tipo", "tipo_alerta_ugcc"]:
-                        self.data_request[col] = (
-                            self.data_request[col].astype("string").str.upper()
-                        )
-
-    def impute_multicategorical_columns(self) -> None:
+            if col in data.columns:
+                mode_value = statistics["categorical"].get(col)
+                data[col] = data[col].replace(self.null_like_strings, np.nan)
+                data[col] = data[col].fillna(mode_value).infer_objects(copy=False)
+                if col in ["tipo", "tipo_alerta_ugcc"]:
+                    data[col] = data[col].astype("string").str.upper()
+        return data
+
+    def impute_multicategorical_columns(
+        self, data: pd.DataFrame, labels
+    ) -> pd.DataFrame:
         """
         Imputa valores faltantes en columnas multicategóricas usando [].
-        Modifica self.data_db in-place (no retorna nada).
         """
         for col in self.multicategorical_columns:
-            if col in self.data_request.columns:
-                self.data_request[col] = self.data_request[col].apply(
-                    self.clean_multilabels
+            if col in data.columns:
+                data[col] = data[col].apply(
+                    lambda value: self.clean_multilabels(value, labels)
                 )
+        return data
 
-    def clean_multilabels(self, labels):
+    def clean_multilabels(self, values, labels):
         """
         Limpia los labels multicategoricos para que solo contengan valores validos.
         """
-        if not isinstance(labels, list):
+        if not isinstance(values, list):
             return []
         cleaned = []
-        for x in labels:
+        for x in values:
             if x is None or (isinstance(x, float) and np.isnan(x)):
                 continue
             if not isinstance(x, str):
                 continue
-            if x in self.labels:
+            if x in labels:
                 cleaned.append(x)
         return cleaned
 
-    def impute_data(self) -> None:
+    def impute_data(self, data: pd.DataFrame, statistics: dict, labels) -> pd.DataFrame:
         """
         Imputa valores faltantes en todas las columnas del dataset,
         incluyendo binarias, numéricas y categóricas.
-        Modifica self.data_db in-place (no retorna nada).
         """
-        self.impute_binary_columns()
-        self.impute_numerical_columns()
-        self.impute_categorical_columns()
-        self.impute_multicategorical_columns()
+        data = self.impute_binary_columns(data, statistics)
+        data = self.impute_numerical_columns(data, statistics)
+        data = self.impute_categorical_columns(data, statistics)
+        return self.impute_multicategorical_columns(data, labels)
 
-    def transform_binary_columns(self) -> None:
+    def transform_binary_columns(self, data: pd.DataFrame) -> pd.DataFrame:
         """
         Codifica columnas binarias a numérico (0/1).
         """
         for col in self.binary_columns:
-            if col in self.data_db_columns:
-                self.data_request[col] = self.data_request[col].apply(
-                    self.map_binary_value
-                )
+            if col in data.columns:
+                data[col] = data[col].apply(self.map_binary_value)
+        return data
 
-    def transform_triage_column(self) -> None:
+    def transform_triage_column(self, data: pd.DataFrame) -> pd.DataFrame:
         """
         Convierte la columna 'triage' a string."""
-        self.data_request["triage"] = self.data_request["triage"].apply(
+        data["triage"] = data["triage"].apply(
             lambda x: (
                 ""
                 if pd.isna(x)
                 else str(int(x)) if isinstance(x, (float, int)) else str(x)
             )
         )
+        return data
 
     def map_binary_value(self, value):
         """
@@ -226,19 +225,26 @@ class DataCleaner:
 
         return 0
 
-    def run_preprocessing(self, data, label_classes) -> pd.DataFrame:
+    def clean(self, records: List[dict], statistics: dict, labels) -> pd.DataFrame:
+        """
+        Preprocesamiento completo de uno o más episodios como función pura:
+        no modifica los registros recibidos ni el estado de la instancia.
+        """
+        data = self.filter_episode_columns(pd.DataFrame(records))
+        data = self.impute_data(data, statistics, labels)
+        data = self.transform_triage_column(data)
+        return self.transform_binary_columns(data)
+
+    def run_preprocessing(self, data, statistics, label_classes) -> pd.DataFrame:
         """
-        Ejecuta el preprocesamiento completo de datos.
-        Retorna el DataFrame preprocesado.
+        Ejecuta el preprocesamiento completo de datos (uno o más episodios)
+        usando las estadísticas de imputación de la versión activa.
+        Retorna el DataFrame preprocesado, con una fila por episodio.
         """
-        self.upload_data(data[0], data[1], label_classes)
-        self.filter_episode_columns()
-        self.impute_data()
-        self.transform_triage_column()
-        self.transform_binary_columns()
-        self.print_successful_operation()
-        return self.data_request
+        data_cleaned = self.clean(data, statistics, label_classes)
+        self.print_successful_operation(data_cleaned)
+        return data_cleaned
 
-    def print_successful_operation(self) -> None:
+    def print_successful_operation(self, data: pd.DataFrame) -> None:
         """Imprime mensaje de exito"""
-        print("✅ Datos preprocesados")
+        print(f"✅ Datos preprocesados: {len(data)} filas")
@@ -0,0 +1,284 @@
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+class FeatureCodec:
+
+    numerical_columns = [
+        "presion_sistolica",
+        "presion_diastolica",
+        "presion_media",
+        "temperatura_c",
+        "saturacion_o2",
+        "frecuencia_cardiaca",
+        "frecuencia_respiratoria",
+        "glasgow_score",
+        "fio2",
+        "pcr",
+        "hemoglobina",
+        "creatinina",
+        "nitrogeno_ureico",
+        "sodio",
+        "potasio",
+    ]
+    binary_columns = [
+        "antecedentes_cardiaco",
+        "antecedentes_diabetes",
+        "antecedentes_hipertension",
+        "fio2_ge_50",
+        "ventilacion_mecanica",
+        "cirugia_realizada",
+        "cirugia_mismo_dia_ingreso",
+        "hemodinamia",
+        "hemodinamia_mismo_dia_ingreso",
+        "endoscopia",
+        "endoscopia_mismo_dia_ingreso",
+        "dialisis",
+        "trombolisis",
+        "trombolisis_mismo_dia_ingreso",
+        "troponinas_alteradas",
+        "ecg_alterado",
+        "rnm_protocolo_stroke",
+        "dva",
+        "transfusiones",
+        "compromiso_conciencia",
+        "dreo",
+    ]
+    categorical_columns = ["tipo", "tipo_alerta_ugcc", "tipo_cama", "triage"]
+    multicategorical_columns = ["diagnostics"]
+
+    """
+    Codificador de features compilado una sola vez por version de artefactos.
+    Reemplaza la cadena OneHotEncoder -> MinMaxScaler -> MultiLabelBinarizer
+    -> pd.concat -> alineación de columnas por escrituras directas sobre una
+    matriz float32 en el orden de features del modelo. El resultado es idéntico
+    al de los encoders de sklearn (el modelo trabaja internamente en float32).
+    """
+
+    def __init__(self, model, encoders):
+        categorical_encoder, multilabel_encoder, numerical_encoder = encoders
+        self.feature_names = list(model.feature_names_in_)
+        self.n_features = len(self.feature_names)
+        positions = {name: i for i, name in enumerate(self.feature_names)}
+
+        self.compile_numerical(numerical_encoder, positions)
+        self.compile_binary(positions)
+        self.compile_categorical(categorical_encoder, positions)
+        self.compile_multicategorical(multilabel_encoder, positions)
+
+    def compile_numerical(self, numerical_encoder, positions) -> None:
+        """
+        Precalcula los vectores min_/scale_ del MinMaxScaler y la posición de
+        salida de cada columna numérica.
+        """
+        columns = list(
+            getattr(numerical_encoder, "feature_names_in_", self.numerical_columns)
+        )
+        self.numerical_input_columns = columns
+        self.numerical_positions = np.array([positions[col] for col in columns])
+        self.numerical_scale = np.asarray(numerical_encoder.scale_, dtype=np.float64)
+        self.numerical_min = np.asarray(numerical_encoder.min_, dtype=np.float64)
+
+    def compile_binary(self, positions) -> None:
+        """Precalcula la posición de salida de cada columna binaria."""
+        self.binary_input_columns = [
+            col for col in self.binary_columns if col in positions
+        ]
+        self.binary_positions = np.array(
+            [positions[col] for col in self.binary_input_columns], dtype=np.intp
+        )
+
+    def compile_categorical(self, categorical_encoder, positions) -> None:
+        """
+        Precalcula, para cada columna categórica, la posición de salida de cada
+        categoría conocida. Las categorías desconocidas no activan ninguna
+        columna (equivalente a handle_unknown="ignore").
+        """
+        columns = list(
+            getattr(categorical_encoder, "feature_names_in_", self.categorical_columns)
+        )
+        output_names = categorical_encoder.get_feature_names_out(columns)
+        self.categorical_lookups = []
+        offset = 0
+        for col, categories in zip(columns, categorical_encoder.categories_):
+            lookup = {}
+            missing_position = None
+            for j, category in enumerate(categories):
+                position = positions.get(output_names[offset + j])
+                if position is None:
+                    continue
+                if self.is_missing(category):
+                    missing_position = position
+                else:
+                    lookup[category] = position
+            offset += len(categories)
+            self.categorical_lookups.append((col, lookup, missing_position))
+
+    def compile_multicategorical(self, multilabel_encoder, positions) -> None:
+        """Precalcula la posición de salida de cada diagnóstico (código CIE)."""
+        column = self.multicategorical_columns[0]
+        self.multicategorical_column = column
+        self.multicategorical_lookup = {}
+        for cls in multilabel_encoder.classes_:
+            position = positions.get(f"{column}_{cls}")
+            if position is not None:
+                self.multicategorical_lookup[cls] = position
+
+    def get_state(self):
+        """
+        Estado compilado del codec, separado en arreglos numéricos (para
+        guardarlos como bloques .npy) y tablas pequeñas serializables a JSON.
+        """
+        arrays = {
+            "numerical_positions": self.numerical_positions,
+            "numerical_scale": self.numerical_scale,
+            "numerical_min": self.numerical_min,
+            "binary_positions": self.binary_positions,
+        }
+        tables = {
+            "feature_names": self.feature_names,
+            "numerical_input_columns": self.numerical_input_columns,
+            "binary_input_columns": self.binary_input_columns,
+            "categorical_lookups": [
+                {
+                    "column": col,
+                    "lookup": [
+                        [self.to_json_value(category), int(position)]
+                        for category, position in lookup.items()
+                    ],
+                    "missing_position": (
+                        None if missing_position is None else int(missing_position)
+                    ),
+                }
+                for col, lookup, missing_position in self.categorical_lookups
+            ],
+            "multicategorical_column": self.multicategorical_column,
+            "multicategorical_lookup": [
+                [self.to_json_value(cls), int(position)]
+                for cls, position in self.multicategorical_lookup.items()
+            ],
+        }
+        return arrays, tables
+
+    @classmethod
+    def from_state(cls, arrays, tables) -> "FeatureCodec":
+        """Reconstruye un codec compilado sin necesitar el modelo ni los encoders."""
+        codec = cls.__new__(cls)
+        codec.feature_names = list(tables["feature_names"])
+        codec.n_features = len(codec.feature_names)
+        codec.numerical_input_columns = list(tables["numerical_input_columns"])
+        codec.numerical_positions = arrays["numerical_positions"]
+        codec.numerical_scale = arrays["numerical_scale"]
+        codec.numerical_min = arrays["numerical_min"]
+        codec.binary_input_columns = list(tables["binary_input_columns"])
+        codec.binary_positions = arrays["binary_positions"]
+        codec.categorical_lookups = [
+            (
+                entry["column"],
+                {category: position for category, position in entry["lookup"]},
+                entry["missing_position"],
+            )
+            for entry in tables["categorical_lookups"]
+        ]
+        codec.multicategorical_column = tables["multicategorical_column"]
+        codec.multicategorical_lookup = {
+            cls_: position for cls_, position in tables["multicategorical_lookup"]
+        }
+        return codec
+
+    @staticmethod
+    def to_json_value(value):
+        """Convierte escalares NumPy a tipos nativos de Python."""
+        return value.item() if isinstance(value, np.generic) else value
+
+    @staticmethod
+    def is_missing(value) -> bool:
+        """Indica si un valor escalar es nulo (None, NaN o pd.NA)."""
+        return value is None or (not isinstance(value, str) and bool(pd.isna(value)))
+
+    def encode_numerical(self, data: pd.DataFrame) -> np.ndarray:
+        """Numéricas: misma aritmética que MinMaxScaler.transform (float64)."""
+        numerical = data[self.numerical_input_columns].to_numpy(dtype=np.float64)
+        return numerical * self.numerical_scale + self.numerical_min
+
+    def get_one_hot_cells(self, data: pd.DataFrame) -> Tuple[List[int], List[int]]:
+        """
+        Filas y posiciones de las celdas en 1: one-hot de las categóricas (por
+        lookup directo de la categoría) y una columna por diagnóstico conocido.
+        """
+        rows: List[int] = []
+        positions: List[int] = []
+        for col, lookup, missing_position in self.categorical_lookups:
+            for row, value in enumerate(data[col].tolist()):
+                if self.is_missing(value):
+                    position = missing_position
+                else:
+                    position = lookup.get(value)
+                if position is not None:
+                    rows.append(row)
+                    positions.append(position)
+
+        for row, labels in enumerate(data[self.multicategorical_column].tolist()):
+            for label in labels:
+                position = self.multicategorical_lookup.get(label)
+                if position is not None:
+                    rows.append(row)
+                    positions.append(position)
+        return rows, positions
+
+    def encode(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Codifica y normaliza los datos preprocesados.
+        Retorna una matriz float32 de (filas, features) en el orden del modelo.
+        """
+        n_rows = len(data)
+        encoded = np.zeros((n_rows, self.n_features), dtype=np.float32)
+        encoded[:, self.numerical_positions] = self.encode_numerical(data)
+
+        # Binarias: ya vienen como 0/1 desde el cleaner
+        if self.binary_input_columns:
+            encoded[:, self.binary_positions] = data[
+                self.binary_input_columns
+            ].to_numpy(dtype=np.float64)
+
+        rows, positions = self.get_one_hot_cells(data)
+        encoded[rows, positions] = 1.0
+        return encoded
+
+    def encode_sparse(self, data: pd.DataFrame) -> sp.csr_matrix:
+        """
+        Igual que encode, pero como matriz CSR float32: solo se guardan las
+        celdas distintas de cero, sin reservar la matriz densa con una columna
+        por código CIE.
+        """
+        n_rows = len(data)
+        rows, columns, values = [], [], []
+        blocks = [(self.encode_numerical(data), self.numerical_positions)]
+        if self.binary_input_columns:
+            blocks.append(
+                (
+                    data[self.binary_input_columns].to_numpy(dtype=np.float64),
+                    self.binary_positions,
+                )
+            )
+        for block, block_positions in blocks:
+            block_rows, block_columns = np.nonzero(block)
+            rows.append(block_rows)
+            columns.append(block_positions[block_columns])
+            values.append(block[block_rows, block_columns])
+
+        one_hot_rows, one_hot_positions = self.get_one_hot_cells(data)
+        rows.append(np.asarray(one_hot_rows, dtype=np.intp))
+        columns.append(np.asarray(one_hot_positions, dtype=np.intp))
+        values.append(np.ones(len(one_hot_rows)))
+
+        return sp.csr_matrix(
+            (
+                np.concatenate(values).astype(np.float32),
+                (np.concatenate(rows), np.concatenate(columns)),
+            ),
+            shape=(n_rows, self.n_features),
+        )
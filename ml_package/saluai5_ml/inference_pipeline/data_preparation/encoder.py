@@ -26,86 +26,82 @@ class DataEncoder:
 
     """
     Se encarga de codificar variables categóricas, multicategóricas y
-    normalizar los datos.
+    normalizar los datos. Cada paso recibe el DataFrame y retorna uno nuevo,
+    sin guardar datos de la request en la instancia.
     """
 
-    def upload_data(self, data: pd.DataFrame, encoders: any, model: any) -> None:
-        self.data = data
-        self.model = model
-        self.categorical_encoder = encoders[0]
-        self.multilabel_encoder = encoders[1]
-        self.numerical_encoder = encoders[2]
-
-    def encode_categorical_columns(self) -> None:
+    def encode_categorical_columns(
+        self, data: pd.DataFrame, categorical_encoder
+    ) -> pd.DataFrame:
         """
         Codifica columnas categóricas usando One-Hot Encoding.
         """
 
-        data_encoded = self.categorical_encoder.transform(
-            self.data[self.categorical_columns]
-        )
+        data_encoded = categorical_encoder.transform(data[self.categorical_columns])
 
         data_ohe = pd.DataFrame(
             data_encoded,
-            columns=self.categorical_encoder.get_feature_names_out(
-                self.categorical_columns
-            ),
-            index=self.data.index,
+            columns=categorical_encoder.get_feature_names_out(self.categorical_columns),
+            index=data.index,
         )
 
-        self.data = pd.concat(
+        return pd.concat(
             [
-                self.data.drop(columns=self.categorical_columns),
+                data.drop(columns=self.categorical_columns),
                 data_ohe,
             ],
             axis=1,
         )
 
-    def encode_multicategorical_columns(self) -> None:
+    def encode_multicategorical_columns(
+        self, data: pd.DataFrame, multilabel_encoder
+    ) -> pd.DataFrame:
         """
         Codifica columnas multicategóricas usando Multi Label Encoder.
         """
         multicategorical_column = self.multicategorical_columns[0]
 
-        encoded_data = self.multilabel_encoder.transform(
-            self.data[multicategorical_column]
-        )
+        encoded_data = multilabel_encoder.transform(data[multicategorical_column])
         encoded_col_names = [
-            f"{multicategorical_column}_{cls}"
-            for cls in self.multilabel_encoder.classes_
+            f"{multicategorical_column}_{cls}" for cls in multilabel_encoder.classes_
         ]
 
         data_df = pd.DataFrame(
-            encoded_data, columns=encoded_col_names, index=self.data.index
+            encoded_data, columns=encoded_col_names, index=data.index
         )
-        self.data = pd.concat(
-            [self.data.drop(columns=[multicategorical_column]), data_df],
+        return pd.concat(
+            [data.drop(columns=[multicategorical_column]), data_df],
             axis=1,
         )
 
-    def normalize_numerical_columns(self) -> None:
+    def normalize_numerical_columns(
+        self, data: pd.DataFrame, numerical_encoder
+    ) -> pd.DataFrame:
         """
         Aplica min max scaler a las columnas numericas.
         """
-        self.data[self.numerical_columns] = self.numerical_encoder.transform(
-            self.data[self.numerical_columns]
+        data = data.copy()
+        data[self.numerical_columns] = numerical_encoder.transform(
+            data[self.numerical_columns]
         )
+        return data
 
-    def align_features(self):
-        expected_cols = list(self.model.feature_names_in_)
-        return self.data[expected_cols]
+    def align_features(self, data: pd.DataFrame, model) -> pd.DataFrame:
+        expected_cols = list(model.feature_names_in_)
+        return data[expected_cols]
 
     def encode(self, data: pd.DataFrame, artifacts: any) -> pd.DataFrame:
         """
         Codifica y normaliza los datos.
         """
-        self.upload_data(data, artifacts["data_encoders"], artifacts["model"])
-        self.encode_categorical_columns()
-        self.normalize_numerical_columns()
-        self.encode_multicategorical_columns()
+        categorical_encoder, multilabel_encoder, numerical_encoder = artifacts[
+            "data_encoders"
+        ]
+        data = self.encode_categorical_columns(data, categorical_encoder)
+        data = self.normalize_numerical_columns(data, numerical_encoder)
+        data = self.encode_multicategorical_columns(data, multilabel_encoder)
         self.print_successful_operation()
-        data_encoded = self.align_features()
-        return data_encoded
+        return self.align_features(data, artifacts["model"])
 
     def print_successful_operation(self) -> None:
         """Imprime mensaje de exito"""
@@ -0,0 +1,114 @@
+import asyncio
+import contextvars
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional
+
+from app.core.config import ml_config
+from ml_package.saluai5_ml.inference_pipeline.artifacts.cache import artifacts_cache
+from ml_package.saluai5_ml.profiling import get_current_profiler
+
+
+def score_episodes(
+    version: str,
+    episodes_data: List[dict],
+    statistics: Optional[Dict] = None,
+    generation: Optional[int] = None,
+) -> List[dict]:
+    """
+    Etapas CPU de la inferencia: limpieza, codificación y predicción.
+    Usa el VersionEngine cacheado en el proceso que la ejecuta, por lo que en
+    el pool de procesos cada worker mantiene su propia copia del modelo.
+    `statistics` solo se entrega para versiones sin snapshot de imputación.
+    `generation` (solo en el pool de procesos) es la del cache del proceso
+    principal: el worker descarta sus versiones si hubo invalidaciones.
+    """
+    if generation is not None:
+        artifacts_cache.sync(generation)
+    return artifacts_cache.load(version)["engine"].score(episodes_data, statistics)
+
+
+class InferenceExecutor:
+    """
+    Backend de ejecución de las etapas CPU de la inferencia:
+    - inline: en el event loop (comportamiento original).
+    - thread: en un pool de threads; el modelo se comparte entre threads.
+    - process: en un pool de procesos; cada worker carga el modelo una vez
+      y descarta su cache cuando el proceso principal invalida versiones.
+    """
+
+    backends = ("inline", "thread", "process")
+
+    def __init__(self, backend: str = "inline", max_workers: int = 2):
+        if backend not in self.backends:
+            raise ValueError(
+                f"Backend de inferencia '{backend}' no soportado. "
+                f"Opciones: {', '.join(self.backends)}"
+            )
+        self.backend = backend
+        self.max_workers = max_workers
+        self._pool: Optional[Executor] = None
+
+    def get_pool(self) -> Executor:
+        """Crea el pool de forma lazy en la primera inferencia."""
+        if self._pool is None:
+            if self.backend == "thread":
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="inference"
+                )
+            else:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+        return self._pool
+
+    async def score(
+        self,
+        version: str,
+        episodes_data: List[dict],
+        statistics: Optional[Dict] = None,
+    ) -> List[dict]:
+        """
+        Ejecuta score_episodes en el backend configurado. El perfilador activo
+        llega a las etapas del VersionEngine en los backends inline y thread;
+        en process no cruza al worker y se mide la llamada completa como la
+        etapa "scoring".
+        """
+        if self.backend == "process":
+            loop = asyncio.get_running_loop()
+            with get_current_profiler().stage("scoring"):
+                return await loop.run_in_executor(
+                    self.get_pool(),
+                    score_episodes,
+                    version,
+                    episodes_data,
+                    statistics,
+                    artifacts_cache.generation,
+                )
+
+        # Carga (o toma del cache) los artefactos sin bloquear el event loop
+        await artifacts_cache.get(version)
+        if self.backend == "thread":
+            loop = asyncio.get_running_loop()
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(
+                self.get_pool(),
+                partial(
+                    context.run, score_episodes, version, episodes_data, statistics
+                ),
+            )
+        return score_episodes(version, episodes_data, statistics)
+
+    def shutdown(self) -> None:
+        """Libera el pool de threads/procesos."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+inference_executor = InferenceExecutor(
+    backend=ml_config.inference_executor,
+    max_workers=ml_config.inference_executor_workers,
+)
@@ -1,111 +1,140 @@
-from app.repositories.model_versions import ModelVersionRepository
+from typing import Dict, List
+
+from app.core.config import ml_config
+from app.databases.postgresql.db import get_async_session_local
 from ml_package.saluai5_ml.inference_pipeline.artifacts.loader import ArtifactsLoader
 from ml_package.saluai5_ml.inference_pipeline.data_ingestion.loader import DataLoader
 from ml_package.saluai5_ml.inference_pipeline.data_preparation.cleaner import (
     DataCleaner,
 )
-from ml_package.saluai5_ml.inference_pipeline.data_preparation.encoder import (
-    DataEncoder,
+from ml_package.saluai5_ml.inference_pipeline.executor import inference_executor
+from ml_package.saluai5_ml.inference_pipeline.prediction_cache import prediction_cache
+from ml_package.saluai5_ml.inference_pipeline.registry import active_model_registry
+from ml_package.saluai5_ml.profiling import (
+    get_current_profiler,
+    inference_profile,
+    use_profiler,
 )
 
 
 class InferenceEngine:
     """
-    Coordina el pipeline de inferencia.
+    Coordina el pipeline de inferencia de un stage: resuelve la version
+    activa, consulta el cache de predicciones y delega las etapas CPU al
+    VersionEngine de esa version (a través del executor).
+
+    No guarda estado de las requests, por lo que hay una sola instancia por
+    stage (ver for_stage) compartida por todo el proceso.
     """
 
-    def __init__(self, episode_data, stage="prod"):
-        self.episode_data = episode_data
+    _instances: Dict[str, "InferenceEngine"] = {}
+
+    def __init__(self, stage="prod"):
         self.stage = stage
         self.cleaner = DataCleaner()
-        self.encoder = DataEncoder()
-
-    async def run(self, session):
-        """Ejecuta el flujo completo de inferencia."""
-
-        # Primero se checkea si hay versiones entrenadas
-        await self.check_trained_versions_stage(session)
-
-        # Obtener versión activa del modelo
-        active_version = await self.get_active_version(session)
-
-        # Ingesta de datos
-        self.data_loader = DataLoader(session)
-        data = await self.data_loader.fetch_all_episodes_df()
 
-        # Ingesta de artefactos
-        self.artifacts_loader = ArtifactsLoader(version=active_version)
-        artifacts = self.artifacts_loader.run()
-
-        # Preprocesamiento
-        episode_data_cleaned = self.cleaner.run_preprocessing(
-            [data, self.episode_data], artifacts["multilabel_classes"]
-        )
-
-        # Codificación de datos
-        episode_data_encoded = self.encoder.encode(episode_data_cleaned, artifacts)
-
-        # Ejecutar predicción y construir payload
-        print(active_version)
-        payload_prediction = self.predict_and_build_payload(
-            artifacts["model"], episode_data_encoded
+    @classmethod
+    def for_stage(cls, stage: str) -> "InferenceEngine":
+        """Instancia compartida del engine para el stage."""
+        engine = cls._instances.get(stage)
+        if engine is None:
+            engine = cls._instances.setdefault(stage, cls(stage=stage))
+        return engine
+
+    async def run(self, session, episode_data: dict):
+        """Ejecuta el flujo completo de inferencia para un episodio."""
+        payloads = await self.run_batch(session, [episode_data])
+        return payloads[0]
+
+    async def run_batch(
+        self, session, episodes_data: List[dict], use_cache: bool = True
+    ) -> List[dict]:
+        """
+        Ejecuta el flujo completo de inferencia para varios episodios a la vez:
+        limpieza, codificación y predicción se hacen una sola vez sobre la
+        matriz completa. Retorna un payload por episodio, en el mismo orden.
+        Las etapas CPU corren en el backend configurado (inline, thread o
+        process); aquí solo quedan las consultas a la base de datos. Los
+        episodios con una predicción cacheada para la version activa no se
+        vuelven a evaluar (salvo con use_cache=False). `session` es opcional:
+        sin ella solo se abre una conexión si hace falta consultar la base.
+
+        Con BACKEND_ML_INFERENCE_PROFILING_SAMPLE_RATE > 0 una fracción de
+        las ejecuciones se perfila por etapa y se agrega en inference_profile.
+        """
+        profiler = inference_profile.start()
+        try:
+            with use_profiler(profiler):
+                return await self.run_stages(session, episodes_data, use_cache)
+        finally:
+            inference_profile.add(profiler)
+
+    async def run_stages(
+        self, session, episodes_data: List[dict], use_cache: bool
+    ) -> List[dict]:
+        """Etapas de run_batch, medidas con el perfilador activo."""
+        profiler = get_current_profiler()
+
+        # Versión activa del modelo (registro en memoria, sin consultas)
+        with profiler.stage("version"):
+            active_version = await self.get_active_version(session)
+            version_id = active_model_registry.get_active_version_id(self.stage)
+
+        # Predicciones cacheadas de episodios con las mismas features
+        payloads: List = [None] * len(episodes_data)
+        keys = []
+        if use_cache and ml_config.prediction_cache_enabled:
+            with profiler.stage("cache"):
+                keys = [prediction_cache.make_key(data) for data in episodes_data]
+                payloads = [
+                    prediction_cache.get(active_version, key, version_id)
+                    for key in keys
+                ]
+        missing = [i for i, payload in enumerate(payloads) if payload is None]
+        if not missing:
+            return payloads
+
+        with profiler.stage("estadisticas"):
+            statistics = await self.get_imputation_statistics(session, active_version)
+
+        # Preprocesamiento, codificación y predicción
+        scored = await inference_executor.score(
+            active_version, [episodes_data[i] for i in missing], statistics
         )
-        return payload_prediction
+        for i, payload in zip(missing, scored):
+            payloads[i] = payload
+            if keys:
+                prediction_cache.put(active_version, keys[i], payload, version_id)
+        return payloads
 
-    async def check_trained_versions_stage(self, session):
-        """Checkea si hay versiones entrenadas para cierta stage"""
-
-        instances = await ModelVersionRepository.list_by_stage(
-            session, stage=self.stage
-        )
-        if not instances:
-            raise ValueError(
-                f"No existen versiones entrenadas del modelo para el stage '{self.stage}'. "
-                "Entrena un modelo antes de hacer inferencia."
-            )
+    async def get_imputation_statistics(self, session, version: str):
+        """
+        Estadísticas de imputación: las versiones antiguas no las tienen
+        serializadas, así que se recalculan desde los episodios validados.
+        Retorna None cuando la version trae su propio snapshot.
+        """
+        if ArtifactsLoader(version).has_imputation_statistics():
+            return None
+        if session is None:
+            SessionLocal = get_async_session_local()
+            async with SessionLocal() as session:
+                data = await DataLoader(session).fetch_all_episodes_df()
+        else:
+            data = await DataLoader(session).fetch_all_episodes_df()
+        return self.cleaner.compute_imputation_statistics(data)
 
     async def get_active_version(self, session):
-        """Obtiene la versión activa del modelo para el stage configurado."""
-
-        instance = await ModelVersionRepository.get_active_version_for_stage(
-            session, stage=self.stage
-        )
-        if instance is None:
-            raise ValueError(
-                f"No existe una versión activa del modelo para el stage '{self.stage}'. "
-                "Activa una versión antes de hacer inferencia."
-            )
-        return str(instance.version)
-
-    def predict_and_build_payload(self, model, df):
         """
-        Ejecuta la predicción del modelo y construye el payload ordenado.
+        Obtiene la versión activa del modelo para el stage configurado desde
+        el registro en memoria. Falla si el stage no tiene versiones
+        entrenadas o si ninguna está activa.
         """
-
-        # Predicción
-        prediction = model.predict(df)[0]
-        probabilities = model.predict_proba(df)[0]
-
-        # Mapeo entre label y su índice basado en clases del modelo
-        class_names = list(model.classes_)
-        prediction_index = class_names.index(prediction)
-
-        # Probabilidad correspondiente a la clase predicha
-        prediction_probability = round(float(probabilities[prediction_index]), 2)
-
-        # Payload final
-        return {
-            "prediction": prediction_index,
-            "label": prediction,
-            "probability": prediction_probability,
-        }
+        return await active_model_registry.get_active_version(self.stage, session)
 
 
 if __name__ == "__main__":
     import asyncio
 
-    from app.databases.postgresql.db import get_async_session_local
-
     async def _run_manual_inference():
         # Datos de prueba
         episode_data = {
@@ -157,14 +186,14 @@ if __name__ == "__main__":
         stage = "prod"
 
         # Instanciar el engine
-        engine = InferenceEngine(episode_data=episode_data, stage=stage)
+        engine = InferenceEngine.for_stage(stage)
 
         # Crear sesión como FastAPI lo haría
         SessionLocal = get_async_session_local()
 
         async with SessionLocal() as session:
             try:
-                result = await engine.run(session)
+                result = await engine.run(session, episode_data)
                 print("Resultado de inferencia:", result)
 
             except Exception as e:
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.core.config import ml_config
+
+
+class PredictionCache:
+    """
+    Cache en memoria de predicciones indexado por (version, id de la
+    version, hash de las features canónicas del episodio). Permite responder
+    sin re-ejecutar el pipeline cuando se vuelve a predecir un episodio cuyos
+    datos no cambiaron. El id distingue a una version de otra que reutiliza su
+    etiqueta (tras borrar las versiones del stage).
+
+    - Las entradas expiran después de `ttl_seconds`.
+    - Se desalojan las menos usadas (LRU) al superar `max_entries`.
+    - Al cambiar la version activa las claves cambian, y las entradas de las
+      versiones anteriores se eliminan con invalidate/invalidate_stage.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: (
+            "OrderedDict[tuple[str, Optional[int], str], tuple[float, Dict]]"
+        ) = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(episode_data: dict) -> str:
+        """
+        Hash de las features canónicas: claves ordenadas y listas (códigos
+        CIE) ordenadas, ya que el encoder multilabel no depende del orden.
+        """
+        canonical = {
+            key: sorted(value, key=str) if isinstance(value, list) else value
+            for key, value in episode_data.items()
+        }
+        serialized = json.dumps(canonical, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode()).hexdigest()
+
+    def get(
+        self, version: str, key: str, version_id: Optional[int] = None
+    ) -> Optional[Dict]:
+        """Retorna una copia del payload cacheado, o None si no existe o expiró."""
+        entry_key = (version, version_id, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[entry_key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entry_key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(
+        self,
+        version: str,
+        key: str,
+        payload: Dict,
+        version_id: Optional[int] = None,
+    ) -> None:
+        """Guarda un payload y desaloja los menos usados si se excede el límite."""
+        entry_key = (version, version_id, key)
+        with self._lock:
+            self._entries[entry_key] = (time.monotonic(), dict(payload))
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, version: str) -> None:
+        """Elimina las predicciones de una version."""
+        with self._lock:
+            for entry_key in list(self._entries):
+                if entry_key[0] == version:
+                    del self._entries[entry_key]
+
+    def invalidate_stage(self, stage: str, keep: Optional[str] = None) -> None:
+        """Elimina las predicciones de un stage, salvo las de la version `keep`."""
+        with self._lock:
+            for entry_key in list(self._entries):
+                cached_version = entry_key[0]
+                if cached_version.split("_v")[0] == stage and cached_version != keep:
+                    del self._entries[entry_key]
+
+    def clear(self) -> None:
+        """Vacía el cache y reinicia los contadores."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Contadores de aciertos/fallos y ocupación del cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+prediction_cache = PredictionCache(
+    max_entries=ml_config.prediction_cache_max_entries,
+    ttl_seconds=ml_config.prediction_cache_ttl_seconds,
+)
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+import asyncpg
+
+from app.core.config import ml_config
+from app.databases.postgresql.db import get_async_session_local, get_engine
+from app.repositories.model_versions import (
+    ACTIVE_VERSION_CHANNEL,
+    ModelVersionRepository,
+)
+from ml_package.saluai5_ml.inference_pipeline.artifacts.cache import artifacts_cache
+from ml_package.saluai5_ml.inference_pipeline.prediction_cache import prediction_cache
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class ActiveModelRegistry:
+    """
+    Registro en memoria de la version activa de cada stage, compartido por
+    todo el proceso. Reemplaza las dos consultas (versiones entrenadas y
+    version activa) que antes hacía cada request de inferencia.
+
+    - Se carga una vez y se recarga solo cuando cambia la version activa.
+    - En Postgres cada worker escucha el canal de LISTEN/NOTIFY que emite
+      ModelVersionRepository al activar, desactivar o eliminar versiones.
+    - Sin LISTEN (SQLite en tests, o mientras se reconecta) se recarga por
+      polling cada `poll_interval` segundos.
+    """
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self._stages: Dict[str, dict] = {}
+        self._loaded_at: Optional[float] = None
+        self._listener: Optional[asyncio.Task] = None
+        self.listening = False
+
+    def is_stale(self) -> bool:
+        """Indica si hay que recargar el registro antes de usarlo."""
+        if self._loaded_at is None:
+            return True
+        if self.listening:
+            return False
+        return time.monotonic() - self._loaded_at > self.poll_interval
+
+    def invalidate(self) -> None:
+        """Marca el registro para recargarlo en la próxima consulta."""
+        self._loaded_at = None
+
+    async def refresh(self, session=None) -> Dict[str, dict]:
+        """
+        Recarga las versiones de todos los stages con una sola consulta. Si la
+        version activa de un stage cambió, libera de los caches las versiones
+        que dejaron de servirse (también cuando el cambio vino de otro worker).
+
+        La version activa se identifica por su etiqueta y su id: tras borrar
+        las versiones de un stage las etiquetas se reutilizan, y una
+        "prod_v1" nueva no puede servirse con los artefactos ni las
+        predicciones de la anterior.
+        """
+        if session is None:
+            SessionLocal = get_async_session_local()
+            async with SessionLocal() as session:
+                rows = await ModelVersionRepository.list_stage_versions(session)
+        else:
+            rows = await ModelVersionRepository.list_stage_versions(session)
+
+        stages: Dict[str, dict] = {}
+        for stage, version, active, version_id in rows:
+            entry = stages.setdefault(
+                stage, {"active": None, "active_id": None, "versions": 0}
+            )
+            entry["versions"] += 1
+            if active:
+                entry["active"] = version
+                entry["active_id"] = version_id
+
+        previous, self._stages = self._stages, stages
+        self._loaded_at = time.monotonic()
+        for stage in set(previous) | set(stages):
+            if stage not in previous:
+                continue
+            entry = stages.get(stage, {})
+            active = entry.get("active")
+            if (previous[stage]["active"], previous[stage]["active_id"]) == (
+                active,
+                entry.get("active_id"),
+            ):
+                continue
+            # Misma etiqueta con otro id: lo cacheado de esa etiqueta es viejo
+            keep = active if previous[stage]["active"] != active else None
+            artifacts_cache.invalidate_stage(stage, keep=keep)
+            prediction_cache.invalidate_stage(stage, keep=keep)
+        return stages
+
+    async def get_active_version(self, stage: str, session=None) -> str:
+        """Version activa del stage, sin consultar la base de datos si está al día."""
+        if self.is_stale():
+            await self.refresh(session)
+
+        entry = self._stages.get(stage)
+        if entry is None:
+            raise ValueError(
+                f"No existen versiones entrenadas del modelo para el stage '{stage}'. "
+                "Entrena un modelo antes de hacer inferencia."
+            )
+        if entry["active"] is None:
+            raise ValueError(
+                f"No existe una versión activa del modelo para el stage '{stage}'. "
+                "Activa una versión antes de hacer inferencia."
+            )
+        return entry["active"]
+
+    def get_active_version_id(self, stage: str) -> Optional[int]:
+        """Id de la version activa del stage según el último estado cargado."""
+        return self._stages.get(stage, {}).get("active_id")
+
+    def active_versions(self) -> Dict[str, Optional[str]]:
+        """Version activa por stage según el último estado cargado."""
+        return {stage: entry["active"] for stage, entry in self._stages.items()}
+
+    async def start(self) -> None:
+        """Empieza a escuchar cambios por LISTEN/NOTIFY (solo en Postgres)."""
+        url = get_engine().url
+        if url.get_backend_name() != "postgresql":
+            return
+        dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        self._listener = asyncio.create_task(self._listen(dsn))
+
+    async def stop(self) -> None:
+        """Detiene el listener."""
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        self.listening = False
+
+    async def _listen(self, dsn: str) -> None:
+        """Mantiene una conexión dedicada a LISTEN, reconectando si se cae."""
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                await connection.add_listener(ACTIVE_VERSION_CHANNEL, self._on_notify)
+                self.listening = True
+                # Cambios ocurridos mientras no se escuchaba
+                self.invalidate()
+                while True:
+                    await asyncio.sleep(self.poll_interval)
+                    await connection.execute("SELECT 1")
+
+            except asyncio.CancelledError:
+                raise
+
+            except Exception as e:
+                logger.warning(f"[REGISTRY] LISTEN interrumpido, usando polling: {e}")
+
+            finally:
+                self.listening = False
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+            await asyncio.sleep(self.poll_interval)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        """Cambió la version activa de un stage: recargar en la próxima consulta."""
+        self.invalidate()
+
+
+active_model_registry = ActiveModelRegistry(
+    poll_interval=ml_config.registry_poll_interval_seconds
+)
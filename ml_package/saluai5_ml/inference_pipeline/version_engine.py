@@ -0,0 +1,98 @@
+import warnings
+from typing import Dict, List, Optional
+
+from app.core.config import ml_config
+from ml_package.saluai5_ml.inference_pipeline.artifacts.flat_forest import FlatForest
+from ml_package.saluai5_ml.inference_pipeline.data_preparation.cleaner import (
+    DataCleaner,
+)
+from ml_package.saluai5_ml.profiling import get_current_profiler
+
+
+def build_payloads(model, features) -> List[dict]:
+    """
+    Ejecuta la predicción del modelo sobre todas las filas y construye un
+    payload ordenado por fila. Se llama a predict_proba una sola vez: la
+    clase predicha es la de mayor probabilidad, igual que en model.predict.
+    """
+
+    # Probabilidades de todas las filas. El codec entrega matrices NumPy ya
+    # alineadas al orden de features del modelo: el aviso de sklearn por la
+    # falta de nombres se silencia solo en esta llamada
+    with warnings.catch_warnings():
+        warnings.filterwarnings(
+            "ignore",
+            message="X does not have valid feature names",
+            category=UserWarning,
+        )
+        probabilities = model.predict_proba(features)
+    prediction_indexes = probabilities.argmax(axis=1)
+    class_names = list(model.classes_)
+
+    # Payload final por episodio
+    return [
+        {
+            "prediction": int(prediction_index),
+            "label": str(class_names[prediction_index]),
+            "probability": round(float(row[prediction_index]), 2),
+        }
+        for prediction_index, row in zip(prediction_indexes, probabilities)
+    ]
+
+
+class VersionEngine:
+    """
+    Etapas CPU de la inferencia (limpieza, codificación y predicción) para
+    una version concreta del modelo (stage + version).
+
+    Se construye una sola vez por version, cuando el ArtifactsCache carga sus
+    artefactos, y se comparte entre todas las requests. No guarda estado de
+    ninguna request: el modelo, el codec y las estadísticas son de solo
+    lectura y cada paso es una función pura, así una misma instancia atiende
+    requests concurrentes desde el event loop o desde un pool de threads.
+    """
+
+    cleaner = DataCleaner()
+
+    def __init__(self, version: str, artifacts: Dict):
+        self.version = version
+        self.stage = version.split("_v")[0]
+        self.model = artifacts["model"]
+        self.feature_codec = artifacts["feature_codec"]
+        self.multilabel_classes = frozenset(artifacts["multilabel_classes"])
+        self.imputation_statistics = artifacts["imputation_statistics"]
+        # El evaluador flat_forest recorre la matriz densa
+        self.sparse = ml_config.inference_sparse_features and not isinstance(
+            self.model, FlatForest
+        )
+
+    def score(
+        self, episodes_data: List[dict], statistics: Optional[Dict] = None
+    ) -> List[dict]:
+        """
+        Evalúa varios episodios. `statistics` solo se entrega para versiones
+        sin snapshot de imputación. Las etapas se miden con el perfilador
+        activo (deshabilitado salvo en los requests muestreados).
+        """
+        if statistics is None:
+            statistics = self.imputation_statistics
+        profiler = get_current_profiler()
+
+        # Preprocesamiento
+        with profiler.stage("limpieza"):
+            episodes_data_cleaned = self.cleaner.run_preprocessing(
+                episodes_data, statistics, self.multilabel_classes
+            )
+
+        # Codificación de datos (codec compilado por version)
+        with profiler.stage("codificacion"):
+            if self.sparse:
+                episodes_data_encoded = self.feature_codec.encode_sparse(
+                    episodes_data_cleaned
+                )
+            else:
+                episodes_data_encoded = self.feature_codec.encode(episodes_data_cleaned)
+
+        # Ejecutar predicción y construir payloads
+        with profiler.stage("prediccion"):
+            return build_payloads(self.model, episodes_data_encoded)
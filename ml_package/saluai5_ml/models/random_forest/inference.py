@@ -1,6 +1,8 @@
+from functools import lru_cache
 from pathlib import Path
 
 import joblib
+import numpy as np
 import pandas as pd
 import saluai5_ml.models.utils as u
 
@@ -48,9 +50,11 @@ CATEGORICAL_COLUMNS = ["tipo", "tipo_alerta_ugcc", "tipo_cama", "triage"]
 DIAGNOSTIC_COLUMN = "diagnostics"
 
 
+@lru_cache(maxsize=1)
 def get_representative_values_colums() -> tuple:
     """
     Get representative values for numerical and categorical columns.
+    Computed once per process; call reload_artifacts() to refresh them.
     """
 
     base_path = Path(__file__).resolve().parent.parent.parent
@@ -67,9 +71,11 @@ def get_representative_values_colums() -> tuple:
     return (mean_nc, mode_cc, mode_bc, diagnostic)
 
 
+@lru_cache(maxsize=None)
 def load_model(name_model: str) -> any:
     """
-    Load the trained model from a file."""
+    Load the trained model from a file. Loaded once per process and model.
+    """
     base_path = Path(__file__).resolve().parent
     model_path = base_path / name_model
     model = joblib.load(model_path)
@@ -125,23 +131,43 @@ def fill_missing_values(form_data: dict) -> dict:
     return form_data
 
 
-def apply_encoders_to_columns(form_data: dict) -> any:
+@lru_cache(maxsize=1)
+def load_encoders() -> tuple:
     """
-    Apply the necessary encoders to the form data.
+    Load the OneHot and MinMax encoders once per process.
     """
     base_path = Path(__file__).resolve().parent.parent.parent
     ohe_path = base_path / "encoders" / "categorical_one_hot_encoder.pkl"
-    base_path / "encoders" / "diagnostics_label_encoder.pkl"
     numerical_encoder_path = base_path / "encoders" / "numerical_min_max_scaler.pkl"
-    ohe_encoder = joblib.load(ohe_path)
-    # label_encoder = joblib.load(label_encoder_path)
-    numerical_encoder = joblib.load(numerical_encoder_path)
+    return joblib.load(ohe_path), joblib.load(numerical_encoder_path)
 
-    df_input = pd.DataFrame([form_data])
 
-    # df_input["diagnostics_encoded"] = label_encoder.transform(df_input[DIAGNOSTIC_COLUMN])
+def reload_artifacts() -> None:
+    """
+    Drop the cached representative values, model and encoders so the next
+    prediction reads them again from disk (e.g. after replacing the files).
+    """
+    get_representative_values_colums.cache_clear()
+    load_model.cache_clear()
+    load_encoders.cache_clear()
+
+
+def apply_encoders_to_columns(form_data: dict) -> any:
+    """
+    Apply the necessary encoders to the form data.
+    """
+    return apply_encoders_to_forms([form_data])
+
+
+def apply_encoders_to_forms(forms: list[dict]) -> pd.DataFrame:
+    """
+    Apply the encoders to several forms at once: one OneHot and one MinMax
+    transform over the whole batch instead of one per form.
+    """
+    ohe_encoder, numerical_encoder = load_encoders()
+
+    df_input = pd.DataFrame(forms)
 
-    # cat_columns = CATEGORICAL_COLUMNS + ["diagnostics_encoded"]
     cat_columns = CATEGORICAL_COLUMNS
     df_input_encoded_categorical = ohe_encoder.transform(df_input[cat_columns])
     df_ohe = pd.DataFrame(
@@ -173,11 +199,23 @@ def get_model_prediction(model: any, df: pd.DataFrame) -> dict:
     """
     Get the model's prediction and probability.
     """
-    label_prediction = model.predict(df)[0]
-    label_prediction_proba_np = model.predict_proba(df)[0]
-    label_prob = round(float(label_prediction_proba_np[int(label_prediction)]), 2)
+    return get_model_predictions(model, df)[0]
 
-    return {"prediction": int(label_prediction), "probability": label_prob}
+
+def get_model_predictions(model: any, df: pd.DataFrame) -> list[dict]:
+    """
+    Get the prediction and probability of every row with a single
+    predict_proba call (predict is the argmax of the same probabilities).
+    """
+    probabilities = model.predict_proba(df)
+    labels = model.classes_[np.argmax(probabilities, axis=1)]
+    return [
+        {
+            "prediction": int(label),
+            "probability": round(float(row_proba[int(label)]), 2),
+        }
+        for label, row_proba in zip(labels, probabilities)
+    ]
 
 
 def make_prediction(form_data: dict) -> dict:
@@ -185,11 +223,19 @@ def make_prediction(form_data: dict) -> dict:
     Make a prediction using the trained model.
     """
 
-    preprocessed_form = preprocess_form_data(form_data)
-    completed_form = fill_missing_values(preprocessed_form)
-    df_encoded = apply_encoders_to_columns(completed_form)
+    return make_predictions([form_data])[0]
+
+
+def make_predictions(forms: list[dict]) -> list[dict]:
+    """
+    Make predictions for a batch of forms, encoding and scoring them together.
+    """
+    completed_forms = [
+        fill_missing_values(preprocess_form_data(form_data)) for form_data in forms
+    ]
+    df_encoded = apply_encoders_to_forms(completed_forms)
     rf_model = load_model("random_forest_model.pkl")
-    return get_model_prediction(rf_model, df_encoded)
+    return get_model_predictions(rf_model, df_encoded)
 
 
 if __name__ == "__main__":
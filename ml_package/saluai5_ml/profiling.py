@@ -0,0 +1,235 @@
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from app.core.config import ml_config
+
+try:
+    import resource
+except ImportError:  # Windows: sin getrusage, no se reporta RSS
+    resource = None
+
+# tracemalloc es global al proceso: se enciende con el primer perfilador que
+# lo necesita y se apaga con el último, para no cortar mediciones en curso
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+# El peak de tracemalloc también es global: sólo se reinicia cuando no hay
+# ninguna etapa midiendo, así un perfilador no le borra el peak a otro
+_active_stages = 0
+
+
+def _start_tracing() -> None:
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracing_users += 1
+
+
+def _stop_tracing() -> None:
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def _begin_traced_stage() -> int:
+    """Registra una etapa medida y devuelve la memoria trazada al inicio."""
+    global _active_stages
+    with _tracing_lock:
+        if _active_stages == 0:
+            tracemalloc.reset_peak()
+        _active_stages += 1
+        return tracemalloc.get_traced_memory()[0]
+
+
+def _end_traced_stage() -> tuple:
+    """Cierra una etapa medida y devuelve (memoria actual, peak)."""
+    global _active_stages
+    with _tracing_lock:
+        _active_stages -= 1
+        return tracemalloc.get_traced_memory()
+
+
+def get_peak_rss_mb() -> float:
+    """RSS máximo del proceso hasta ahora (MB); 0.0 si no se puede medir."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo entrega en KB y macOS en bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class StageProfiler:
+    """
+    Perfilador de etapas de un pipeline. Por cada etapa registra:
+    - wall_seconds y cpu_seconds (CPU de todo el proceso).
+    - rss_peak_mb: RSS máximo del proceso al terminar la etapa, y
+      rss_peak_growth_mb: cuánto lo subió la etapa.
+    - alloc_delta_mb y alloc_peak_mb (con tracemalloc): memoria Python que la
+      etapa dejó asignada y máximo asignado durante ella, respecto del inicio.
+
+    Las etapas se marcan en secuencia (begin/end, como record_stage del
+    orquestador) o con el context manager `stage`. Deshabilitado no mide
+    nada, así los pipelines no necesitan ramas.
+
+    En un proceso con requests concurrentes el CPU, el RSS y tracemalloc
+    incluyen el trabajo de los demás: son aproximaciones. Una etapa que
+    empieza con otra en curso (anidada o concurrente) no reinicia el peak,
+    así que su alloc_peak_mb puede sobreestimarse. Sin el módulo `resource`
+    (Windows) se omiten las métricas de RSS.
+    """
+
+    def __init__(self, enabled: bool = True, trace_memory: bool = True):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.report: Dict[str, Dict[str, float]] = {}
+        self._snapshot: Optional[tuple] = None
+        self._closed = False
+        if self.trace_memory:
+            _start_tracing()
+
+    def take_snapshot(self) -> tuple:
+        traced = _begin_traced_stage() if self.trace_memory else 0
+        return time.perf_counter(), time.process_time(), get_peak_rss_mb(), traced
+
+    def add(self, name: str, snapshot: tuple) -> None:
+        """Guarda las métricas de la etapa `name` iniciada en `snapshot`."""
+        wall, cpu, rss_peak, traced = snapshot
+        metrics = {
+            "wall_seconds": round(time.perf_counter() - wall, 4),
+            "cpu_seconds": round(time.process_time() - cpu, 4),
+        }
+        if resource is not None:
+            current_rss_peak = get_peak_rss_mb()
+            metrics["rss_peak_mb"] = round(current_rss_peak, 2)
+            metrics["rss_peak_growth_mb"] = round(current_rss_peak - rss_peak, 2)
+        if self.trace_memory:
+            current, peak = _end_traced_stage()
+            metrics["alloc_delta_mb"] = round((current - traced) / 2**20, 3)
+            metrics["alloc_peak_mb"] = round(max(peak - traced, 0) / 2**20, 3)
+        self.report[name] = metrics
+
+    def begin(self) -> None:
+        """Inicia una etapa de una secuencia."""
+        if self.enabled:
+            self._snapshot = self.take_snapshot()
+
+    def end(self, name: str) -> None:
+        """Cierra la etapa en curso con el nombre `name`."""
+        if self.enabled and self._snapshot is not None:
+            self.add(name, self._snapshot)
+            self._snapshot = None
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mide el bloque como la etapa `name`."""
+        if not self.enabled:
+            yield
+            return
+        snapshot = self.take_snapshot()
+        try:
+            yield
+        finally:
+            self.add(name, snapshot)
+
+    def close(self) -> None:
+        """Libera tracemalloc. El reporte sigue disponible."""
+        if self.trace_memory and not self._closed:
+            if self._snapshot is not None:
+                # etapa de una secuencia que quedó abierta (p. ej. por un error)
+                _end_traced_stage()
+                self._snapshot = None
+            _stop_tracing()
+        self._closed = True
+
+
+# Perfilador de la ejecución en curso: las etapas internas (p. ej. las del
+# VersionEngine) lo toman de aquí sin que se pase por cada llamada
+_current_profiler: ContextVar[Optional[StageProfiler]] = ContextVar(
+    "stage_profiler", default=None
+)
+
+
+def get_current_profiler() -> StageProfiler:
+    """Perfilador activo en este contexto, o uno deshabilitado."""
+    profiler = _current_profiler.get()
+    return profiler if profiler is not None else StageProfiler(enabled=False)
+
+
+@contextmanager
+def use_profiler(profiler: StageProfiler):
+    """Deja `profiler` como el perfilador activo dentro del bloque."""
+    token = _current_profiler.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _current_profiler.reset(token)
+
+
+class StageProfileAggregator:
+    """
+    Agrega los reportes de un muestreo de ejecuciones (requests de
+    inferencia): por etapa, cantidad de muestras y promedio y máximo de cada
+    métrica.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, trace_memory: bool = True):
+        self.sample_rate = sample_rate
+        self.trace_memory = trace_memory
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.samples = 0
+            self._stages: Dict[str, Dict[str, tuple]] = {}
+
+    def start(self) -> StageProfiler:
+        """
+        Perfilador para una ejecución: habilitado con probabilidad
+        `sample_rate`, deshabilitado (sin costo) en las demás.
+        """
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        return StageProfiler(enabled=sampled, trace_memory=self.trace_memory)
+
+    def add(self, profiler: StageProfiler) -> None:
+        """Cierra el perfilador y suma su reporte si fue muestreado."""
+        profiler.close()
+        if not profiler.enabled:
+            return
+        with self._lock:
+            self.samples += 1
+            for name, metrics in profiler.report.items():
+                stage = self._stages.setdefault(name, {})
+                for metric, value in metrics.items():
+                    count, total, maximum = stage.get(metric, (0, 0.0, value))
+                    stage[metric] = (count + 1, total + value, max(maximum, value))
+
+    def stats(self) -> dict:
+        """Promedio y máximo de cada métrica por etapa."""
+        with self._lock:
+            stages = {}
+            for name, metrics in self._stages.items():
+                stage = {"count": next(iter(metrics.values()))[0]}
+                for metric, (count, total, maximum) in metrics.items():
+                    stage[f"{metric}_avg"] = round(total / count, 4)
+                    stage[f"{metric}_max"] = round(maximum, 4)
+                stages[name] = stage
+            return {
+                "sample_rate": self.sample_rate,
+                "samples": self.samples,
+                "stages": stages,
+            }
+
+
+inference_profile = StageProfileAggregator(
+    sample_rate=ml_config.inference_profiling_sample_rate,
+    trace_memory=ml_config.profiling_tracemalloc,
+)
@@ -1,12 +1,16 @@
 import asyncio
+import hashlib
+import json
 import os
 import sys
-from decimal import Decimal
-from typing import Any, Dict, List
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 import sqlalchemy as sa
-from sqlalchemy import select
+from pandas.arrays import IntegerArray
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.databases.postgresql.models import Diagnostic, Episode
@@ -61,6 +65,9 @@ class DataLoader:
 
     valid_labels = {"PERTINENTE", "NO PERTINENTE"}
 
+    # Filas por partición del cursor del servidor
+    chunk_size = 5_000
+
     def __init__(self, session: AsyncSession):
         """
         Inicializa DataLoader con una sesión de base de datos.
@@ -70,79 +77,160 @@ class DataLoader:
         """
         self.session = session
 
-    def _get_attr_safe(self, obj: Any, name: str) -> Any:
-        """Intentar obtener atributo con variantes comunes; devuelve None si no existe."""
-        if hasattr(obj, name):
-            return getattr(obj, name)
-        if name == "id_episodio":
-            for alt in ("id_episodio", "id", "numero_episodio", "numero"):
-                if hasattr(obj, alt):
-                    return getattr(obj, alt)
-        return None
-
-    def _clean_validacion_column(self, val):
-        """Normaliza la columna 'validacion'."""
-        if val is None:
-            return None
+    @staticmethod
+    def _label():
+        return func.upper(func.trim(Episode.validacion))
 
-        val = str(val).strip().upper()
+    @staticmethod
+    def _changed_at():
+        """
+        Última modificación de los datos del episodio. Usa features_updated_at
+        (NULL si nunca cambiaron) y no updated_at, que también se mueve con
+        escrituras que no tocan el entrenamiento.
+        """
+        return func.coalesce(Episode.features_updated_at, Episode.created_at)
 
-        if val in self.valid_labels:
-            return val
+    def _training_select(self, changed_since: Optional[datetime] = None):
+        """
+        SELECT con solo las columnas que usa el modelo. La normalización y el
+        filtro de 'validacion' se hacen en SQL, y los Numeric se castean a
+        float en la base de datos (sin objetos Decimal en Python). Con
+        `changed_since` solo trae los episodios modificados después.
+        """
+        label = self._label()
+        columns = []
+        for col in self.column_names:
+            if col == "id_episodio":
+                columns.append(Episode.id.label(col))
+            elif col == "validacion":
+                columns.append(label.label(col))
+            elif self._column_kind(col) == "numerical":
+                columns.append(sa.cast(getattr(Episode, col), sa.Float).label(col))
+            else:
+                columns.append(getattr(Episode, col))
+        stmt = select(*columns).where(label.in_(sorted(self.valid_labels)))
+        if changed_since is not None:
+            stmt = stmt.where(self._changed_at() > changed_since)
+        return stmt.order_by(Episode.id)
+
+    def _column_kind(self, col: str) -> str:
+        """Tipo de columna de salida según el tipo SQL de la columna de Episode."""
+        if col == "id_episodio":
+            return "id"
+        column_type = Episode.__table__.c[col].type
+        if isinstance(column_type, sa.Boolean):
+            return "binary"
+        if isinstance(column_type, sa.Numeric):
+            return "numerical"
+        return "text"
+
+    def _to_column(self, col: str, values: list) -> np.ndarray:
+        """
+        Convierte los valores de una columna de una partición a un arreglo
+        NumPy tipado: float64 (NULL -> NaN) para numéricas, int8 para
+        booleanas (NULL -> -1, se enmascara al armar el DataFrame) e int64
+        para el id. El texto queda como object.
+        """
+        kind = self._column_kind(col)
+        if kind == "numerical":
+            return np.array(values, dtype=np.float64)
+        if kind == "binary":
+            return np.array([-1 if v is None else v for v in values], dtype=np.int8)
+        if kind == "id":
+            return np.array(values, dtype=np.int64)
+        return np.array(values, dtype=object)
+
+    async def fetch_columns(
+        self, changed_since: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Extrae los episodios con validación válida como columnas tipadas.
+        Las filas se leen con un cursor del servidor en particiones de
+        `chunk_size`, de modo que nunca se materializan entidades ORM ni una
+        lista de dicts con toda la historia: solo los arreglos finales.
+        """
+        stmt = self._training_select(changed_since).execution_options(
+            yield_per=self.chunk_size
+        )
+        parts: Dict[str, List[np.ndarray]] = {col: [] for col in self.column_names}
+        diagnostics: List[List[str]] = []
+
+        result = await self.session.stream(stmt)
+        async for rows in result.partitions():
+            episode_ids = [row[0] for row in rows]
+            diagnostics_map = await self._fetch_diagnostics_map(episode_ids)
+            for i, col in enumerate(self.column_names):
+                parts[col].append(self._to_column(col, [row[i] for row in rows]))
+            diagnostics.extend(diagnostics_map[eid] for eid in episode_ids)
+
+        columns: Dict[str, Any] = {
+            col: (np.concatenate(chunks) if chunks else self._to_column(col, []))
+            for col, chunks in parts.items()
+        }
+        columns["diagnostics"] = diagnostics
+        return columns
+
+    async def fetch_valid_ids(self) -> np.ndarray:
+        """Ids (ordenados) de todos los episodios con validación válida."""
+        result = await self.session.execute(
+            select(Episode.id)
+            .where(self._label().in_(sorted(self.valid_labels)))
+            .order_by(Episode.id)
+        )
+        return np.array(result.scalars().all(), dtype=np.int64)
+
+    async def get_watermark(self) -> Optional[datetime]:
+        """Fecha de la última modificación de cualquier episodio."""
+        result = await self.session.execute(select(func.max(self._changed_at())))
+        return result.scalar_one_or_none()
+
+    async def get_max_episode_id(self) -> Optional[int]:
+        """Id del último episodio con validación válida."""
+        result = await self.session.execute(
+            select(func.max(Episode.id)).where(
+                self._label().in_(sorted(self.valid_labels))
+            )
+        )
+        return result.scalar_one_or_none()
 
-        return None
+    async def get_dataset_fingerprint(self, extra: Optional[Dict] = None) -> str:
+        """
+        Huella del conjunto de entrenamiento: hash de las filas que ve el
+        modelo (las columnas proyectadas de los episodios validados y sus
+        diagnósticos), leídas en particiones como en `fetch_columns`. No
+        depende de updated_at, que también cambia con escrituras que no
+        afectan el entrenamiento (p. ej. la recomendación del modelo).
+        `extra` agrega la configuración del entrenamiento (columnas,
+        hiperparámetros), que también cambia el modelo resultante.
+        """
+        rows_hash = hashlib.sha256()
+        count = 0
+        stmt = self._training_select().execution_options(yield_per=self.chunk_size)
+        result = await self.session.stream(stmt)
+        async for rows in result.partitions():
+            episode_ids = [row[0] for row in rows]
+            diagnostics_map = await self._fetch_diagnostics_map(episode_ids)
+            for row in rows:
+                values = [*row, sorted(diagnostics_map[row[0]])]
+                rows_hash.update(json.dumps(values, default=str).encode() + b"\n")
+            count += len(rows)
+
+        payload = {
+            "count": count,
+            "rows": rows_hash.hexdigest(),
+            "columns": self.column_names,
+            "extra": extra or {},
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, default=str).encode()
+        ).hexdigest()
 
     async def fetch_all_episodes(self) -> List[Dict[str, Any]]:
         """
-        Extrae episodios con validacion IS NOT NULL y devuelve lista de dicts
+        Extrae episodios con validacion válida y devuelve lista de dicts
         con las columnas solicitadas + campo 'diagnostics' con lista de cie_code.
         """
-
-        valid_col = getattr(Episode, "validacion", None)
-        if valid_col is None:
-            return []
-
-        stmt = select(Episode).where(valid_col.is_not(None))
-        result = await self.session.execute(stmt)
-        episodes = result.scalars().all()
-
-        if not episodes:
-            return []
-
-        episode_ids = self._extract_episode_ids(episodes)
-
-        diagnostics_map = await self._fetch_diagnostics_map(episode_ids)
-
-        out: List[Dict[str, Any]] = []
-        for ep in episodes:
-            row: Dict[str, Any] = {}
-            for col in self.column_names:
-                val = self._get_attr_safe(ep, col)
-                if isinstance(val, Decimal):
-                    val = float(val)
-                if col == "validacion":
-                    val = self._clean_validacion_column(val)
-
-                row[col] = val
-
-            eid = self._get_attr_safe(ep, "id_episodio") or getattr(ep, "id", None)
-            row["diagnostics"] = diagnostics_map.get(eid, [])
-            out.append(row)
-
-        out = [r for r in out if r["validacion"] in self.valid_labels]
-        return out
-
-    def _extract_episode_ids(self, episodes: List[Episode]) -> List[int]:
-        """Extrae los IDs de los episodios."""
-        episode_ids = []
-        for ep in episodes:
-            eid = self._get_attr_safe(ep, "id_episodio") or getattr(ep, "id", None)
-            if eid is not None:
-                try:
-                    episode_ids.append(int(eid))
-                except (ValueError, TypeError):
-                    episode_ids.append(eid)
-        return episode_ids
+        return (await self.fetch_all_episodes_df()).to_dict("records")
 
     async def _fetch_diagnostics_map(
         self, episode_ids: List[int]
@@ -178,10 +266,22 @@ class DataLoader:
         return diagnostics_map
 
     async def fetch_all_episodes_df(self) -> pd.DataFrame:
-        """Devuelve los episodios como pandas DataFrame."""
-        rows = await self.fetch_all_episodes()
-        self.print_successful_operation(rows)
-        return pd.DataFrame(rows)
+        """
+        Devuelve los episodios como pandas DataFrame. Las columnas booleanas
+        usan el dtype nullable Int8 (int8 + máscara de NULL).
+        """
+        df = self.build_dataframe(await self.fetch_columns())
+        self.print_successful_operation(df)
+        return df
+
+    def build_dataframe(self, columns: Dict[str, Any]) -> pd.DataFrame:
+        """Arma el DataFrame de entrenamiento a partir de las columnas tipadas."""
+        data = {}
+        for col, values in columns.items():
+            if col in self.column_names and self._column_kind(col) == "binary":
+                values = IntegerArray(np.asarray(values), np.asarray(values) < 0)
+            data[col] = values
+        return pd.DataFrame(data)
 
     def print_successful_operation(self, data) -> None:
         """Imprime mensaje de exito"""
@@ -0,0 +1,282 @@
+import json
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ml_package.saluai5_ml.training_pipeline.data_ingestion.loader import DataLoader
+
+
+class TrainingSnapshot:
+    """
+    Snapshot columnar e incremental del conjunto de entrenamiento.
+
+    Cada version es un directorio con un manifest.json y un bloque .npy por
+    columna (mismo formato que los bundles de artefactos): numéricas en
+    float64, booleanas en int8 (-1 = NULL), texto codificado como
+    diccionario (códigos int32 + categorías en el manifest) y diagnósticos
+    como códigos planos + offsets. Los bloques se leen con mmap_mode="r".
+
+    Cada refresco trae de Postgres solo los episodios modificados después
+    del watermark (updated_at, o created_at si nunca cambió) y los ids que
+    siguen siendo válidos, para reemplazar los cambiados y descartar los
+    eliminados o invalidados. El archivo CURRENT apunta a la version vigente
+    y se reemplaza de forma atómica.
+    """
+
+    format_version = 1
+    manifest_name = "manifest.json"
+    pointer_name = "CURRENT"
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        overlap_seconds: float = 300.0,
+        stage: str = "dev",
+    ):
+        """
+        Args:
+            path: directorio del snapshot (datasets_repository/training/<stage>).
+            overlap_seconds: margen hacia atrás del watermark, para no perder
+                transacciones que hicieron commit después de leerlo.
+            stage: cada stage tiene su propio snapshot. El lock de
+                entrenamiento es por stage, así que dev y prod pueden entrenar
+                a la vez: con un directorio compartido un stage podía
+                reescribir o borrar la version que el otro estaba leyendo.
+        """
+        self.stage = stage
+        self.path = Path(path) if path is not None else self.get_default_path()
+        self.overlap = timedelta(seconds=overlap_seconds)
+
+    def get_default_path(self) -> Path:
+        base_path = Path(__file__).resolve().parent.parent.parent
+        return base_path / "datasets_repository" / "training" / self.stage
+
+    # Lectura
+    def get_current_path(self) -> Optional[Path]:
+        pointer = self.path / self.pointer_name
+        if not pointer.exists():
+            return None
+        return self.path / pointer.read_text().strip()
+
+    def read_manifest(self) -> Optional[Dict[str, Any]]:
+        """Manifest de la version vigente, o None si no hay snapshot usable."""
+        current = self.get_current_path()
+        if current is None or not (current / self.manifest_name).exists():
+            return None
+        manifest = json.loads((current / self.manifest_name).read_text())
+        if manifest.get("format_version") != self.format_version:
+            return None
+        # Si cambiaron las columnas del loader, el snapshot se reconstruye
+        if manifest.get("column_names") != DataLoader.column_names:
+            return None
+        return manifest
+
+    def read_columns(self, manifest: Dict[str, Any]) -> Dict[str, Any]:
+        """Columnas del snapshot con el mismo formato que DataLoader.fetch_columns."""
+        directory = self.path / manifest["directory"]
+        columns: Dict[str, Any] = {}
+        for col, block in manifest["columns"].items():
+            values = np.load(directory / block["file"], mmap_mode="r")
+            if block["kind"] == "text":
+                columns[col] = self.decode_text(values, block["categories"])
+            elif block["kind"] == "multilabel":
+                offsets = np.load(directory / block["offsets_file"], mmap_mode="r")
+                columns[col] = self.decode_multilabel(
+                    values, offsets, block["categories"]
+                )
+            else:
+                columns[col] = values
+        return columns
+
+    def to_dataframe(self, loader: DataLoader) -> pd.DataFrame:
+        """DataFrame de entrenamiento a partir de la version vigente."""
+        manifest = self.read_manifest()
+        if manifest is None:
+            raise ValueError("No existe un snapshot de entrenamiento.")
+        df = loader.build_dataframe(self.read_columns(manifest))
+        loader.print_successful_operation(df)
+        return df
+
+    # Codificación de columnas
+    @staticmethod
+    def encode_text(values) -> Tuple[np.ndarray, List[str]]:
+        categories = sorted({v for v in values if v is not None})
+        lookup = {v: i for i, v in enumerate(categories)}
+        codes = np.fromiter(
+            (-1 if v is None else lookup[v] for v in values),
+            dtype=np.int32,
+            count=len(values),
+        )
+        return codes, categories
+
+    @staticmethod
+    def decode_text(codes: np.ndarray, categories: List[str]) -> np.ndarray:
+        # El código -1 (NULL) toma el último elemento de la tabla
+        table = np.array(categories + [None], dtype=object)
+        return table[codes]
+
+    @staticmethod
+    def encode_multilabel(values) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        categories = sorted({v for labels in values for v in labels})
+        lookup = {v: i for i, v in enumerate(categories)}
+        codes = np.fromiter(
+            (lookup[v] for labels in values for v in labels), dtype=np.int32
+        )
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum([len(labels) for labels in values], out=offsets[1:])
+        return codes, offsets, categories
+
+    @staticmethod
+    def decode_multilabel(
+        codes: np.ndarray, offsets: np.ndarray, categories: List[str]
+    ) -> List[List[str]]:
+        table = np.array(categories, dtype=object)
+        return [
+            table[codes[start:end]].tolist()
+            for start, end in zip(offsets[:-1], offsets[1:])
+        ]
+
+    # Escritura
+    def write(self, columns: Dict[str, Any], watermark: Optional[datetime]) -> Dict:
+        """Escribe una nueva version y la deja como vigente."""
+        previous = self.read_manifest()
+        version = (previous or {}).get("version", 0) + 1
+        directory_name = f"v{version}"
+        directory = self.path / directory_name
+        if directory.exists():
+            shutil.rmtree(directory)
+        directory.mkdir(parents=True)
+
+        blocks = {}
+        for col, values in columns.items():
+            file_name = f"{col}.npy"
+            if col == "diagnostics":
+                codes, offsets, categories = self.encode_multilabel(values)
+                np.save(directory / f"{col}_offsets.npy", offsets)
+                blocks[col] = {
+                    "kind": "multilabel",
+                    "file": file_name,
+                    "offsets_file": f"{col}_offsets.npy",
+                    "categories": categories,
+                }
+                values = codes
+            elif np.asarray(values).dtype == object:
+                values, categories = self.encode_text(values)
+                blocks[col] = {
+                    "kind": "text",
+                    "file": file_name,
+                    "categories": categories,
+                }
+            else:
+                blocks[col] = {"kind": "array", "file": file_name}
+            np.save(directory / file_name, np.ascontiguousarray(values))
+
+        manifest = {
+            "format_version": self.format_version,
+            "version": version,
+            "directory": directory_name,
+            "watermark": watermark.isoformat() if watermark else None,
+            "rows": int(len(columns["id_episodio"])),
+            "column_names": DataLoader.column_names,
+            "columns": blocks,
+        }
+        (directory / self.manifest_name).write_text(
+            json.dumps(manifest, ensure_ascii=False)
+        )
+
+        pointer = self.path / self.pointer_name
+        tmp_pointer = pointer.with_suffix(".tmp")
+        tmp_pointer.write_text(directory_name)
+        tmp_pointer.replace(pointer)
+        self.remove_old_versions(
+            keep={directory_name, (previous or {}).get("directory")}
+        )
+        return manifest
+
+    def remove_old_versions(self, keep) -> None:
+        """
+        Borra las versiones anteriores salvo la vigente y la previa (un
+        entrenamiento en curso puede seguir leyéndola).
+        """
+        for directory in self.path.glob("v*"):
+            if directory.is_dir() and directory.name not in keep:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    @staticmethod
+    def merge(
+        base: Dict[str, Any], changes: Dict[str, Any], valid_ids: np.ndarray
+    ) -> Dict[str, Any]:
+        """
+        Reemplaza en `base` los episodios de `changes`, descarta los que ya no
+        están en `valid_ids` y deja el resultado ordenado por id.
+        """
+        ids = np.asarray(base["id_episodio"])
+        keep = np.isin(ids, valid_ids) & ~np.isin(ids, changes["id_episodio"])
+        merged: Dict[str, Any] = {}
+        for col, values in base.items():
+            if col == "diagnostics":
+                kept = [labels for labels, k in zip(values, keep) if k]
+                merged[col] = kept + list(changes[col])
+            else:
+                merged[col] = np.concatenate([np.asarray(values)[keep], changes[col]])
+
+        order = np.argsort(merged["id_episodio"], kind="stable")
+        for col, values in merged.items():
+            if col == "diagnostics":
+                merged[col] = [values[i] for i in order]
+            else:
+                merged[col] = values[order]
+        return merged
+
+    async def refresh(self, session: AsyncSession) -> Dict[str, Any]:
+        """
+        Actualiza el snapshot con los episodios modificados desde el último
+        watermark. Sin snapshot previo (o con otro formato) lo construye
+        completo. Devuelve el manifest vigente y lo que cambió.
+        """
+        loader = DataLoader(session)
+        # El watermark se lee antes de los datos: lo que cambie mientras tanto
+        # se vuelve a traer en el próximo refresco
+        watermark = await loader.get_watermark()
+        manifest = self.read_manifest()
+
+        if manifest is None or manifest["watermark"] is None:
+            manifest = self.write(await loader.fetch_columns(), watermark)
+            result = {"mode": "full", "changed": manifest["rows"], "manifest": manifest}
+            self.print_successful_operation(result)
+            return result
+
+        since = datetime.fromisoformat(manifest["watermark"]) - self.overlap
+        changes = await loader.fetch_columns(changed_since=since)
+        valid_ids = await loader.fetch_valid_ids()
+        base = self.read_columns(manifest)
+
+        unchanged = (
+            len(changes["id_episodio"]) == 0
+            and len(valid_ids) == manifest["rows"]
+            and np.array_equal(valid_ids, base["id_episodio"])
+        )
+        if unchanged:
+            result = {"mode": "unchanged", "changed": 0, "manifest": manifest}
+        else:
+            columns = self.merge(base, changes, valid_ids)
+            result = {
+                "mode": "incremental",
+                "changed": int(len(changes["id_episodio"])),
+                "manifest": self.write(columns, watermark),
+            }
+        self.print_successful_operation(result)
+        return result
+
+    def print_successful_operation(self, result: Dict[str, Any]) -> None:
+        """Imprime mensaje de exito"""
+        print(
+            f"✅ Snapshot de entrenamiento v{result['manifest']['version']} "
+            f"({result['mode']}): {result['changed']} episodios actualizados, "
+            f"{result['manifest']['rows']} filas"
+        )
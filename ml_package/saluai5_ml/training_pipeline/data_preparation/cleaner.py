@@ -1,3 +1,7 @@
+from pathlib import Path
+from typing import Dict, Optional
+
+import joblib
 import numpy as np
 import pandas as pd
 
@@ -55,9 +59,45 @@ class DataCleaner:
     - Normalización y codificación
     """
 
+    def __init__(self, stage="dev", statistics: Optional[Dict] = None):
+        """
+        Args:
+            stage: stage del modelo (dev/prod).
+            statistics: estadísticas de imputación de una version previa. Si
+                se entregan se aplican en vez de calcularlas con los datos
+                (reentrenamiento incremental sobre los mismos encoders).
+        """
+        self.stage = stage
+        self.statistics = statistics
+
     def upload_data(self, df: pd.DataFrame) -> None:
         self.data = df
         self.data_columns = self.data.columns
+        self.imputation_statistics = {"binary": {}, "numerical": {}, "categorical": {}}
+
+    def get_base_directory_package(self) -> Path:
+        """
+        Obtiene el directorio base del proyecto.
+        """
+        return Path(__file__).resolve().parent.parent.parent
+
+    def get_statistic(self, kind: str, col: str, computed):
+        """Estadística fija de la version previa o, si no hay, la calculada."""
+        if self.statistics is not None and col in self.statistics.get(kind, {}):
+            return self.statistics[kind][col]
+        return computed
+
+    def serialize_imputation_statistics(self, version: str) -> None:
+        """
+        Serializa las estadísticas de imputación (promedios y modas) junto a los
+        encoders de la versión, para que la inferencia no tenga que recalcularlas.
+        """
+        base_path = self.get_base_directory_package()
+        file_path = (
+            base_path / "encoders_repository" / self.stage / f"imputation/{version}.pkl"
+        )
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump(self.imputation_statistics, file_path)
 
     def impute_binary_columns(self) -> None:
         """
@@ -66,11 +106,33 @@ class DataCleaner:
         """
         for col in self.binary_columns:
             if col in self.data_columns:
+                if pd.api.types.is_integer_dtype(self.data[col]):
+                    self.impute_typed_binary_column(col)
+                    continue
                 self.data[col] = self.data[col].replace("", np.nan)
                 mode_value = self.data[col].mode(dropna=True)
                 mode_value = mode_value[0] if not mode_value.empty else False
+                mode_value = self.get_statistic("binary", col, mode_value)
+                self.imputation_statistics["binary"][col] = mode_value
                 self.data[col] = self.data[col].fillna(mode_value)
 
+    def impute_typed_binary_column(self, col: str) -> None:
+        """
+        Imputa una columna binaria tipada (Int8 nullable, como la entrega el
+        DataLoader) sin pasar por objetos Python. La moda se guarda como bool
+        para que las estadísticas sean las mismas que con columnas de objetos.
+        """
+        mode_value = self.data[col].mode(dropna=True)
+        mode_value = bool(mode_value[0]) if not mode_value.empty else False
+        mode_value = self.get_statistic("binary", col, mode_value)
+        if isinstance(mode_value, (bool, np.bool_)):
+            mode_value = bool(mode_value)
+        else:
+            # Estadística de una version entrenada con columnas de objetos ("SI")
+            mode_value = bool(self.map_binary_value(mode_value))
+        self.imputation_statistics["binary"][col] = mode_value
+        self.data[col] = self.data[col].fillna(int(mode_value)).astype(np.int8)
+
     def impute_numerical_columns(self) -> None:
         """
         Imputa valores faltantes en columnas numéricas usando el promedio (mean)
@@ -82,7 +144,9 @@ class DataCleaner:
                 mean_value = self.data[col].mean(skipna=True)
                 if pd.isna(mean_value):
                     mean_value = 0.0
+                mean_value = self.get_statistic("numerical", col, mean_value)
 
+                self.imputation_statistics["numerical"][col] = mean_value
                 self.data[col] = self.data[col].fillna(mean_value)
 
     def impute_categorical_columns(self) -> None:
@@ -96,6 +160,8 @@ class DataCleaner:
                 self.data[col] = self.data[col].replace("", np.nan)
                 mode_value = self.data[col].mode(dropna=True)
                 mode_value = mode_value[0] if not mode_value.empty else None
+                mode_value = self.get_statistic("categorical", col, mode_value)
+                self.imputation_statistics["categorical"][col] = mode_value
                 self.data[col] = self.data[col].fillna(mode_value)
 
     def impute_multicategorical_columns(self) -> None:
@@ -132,6 +198,9 @@ class DataCleaner:
         """
         for col in self.binary_columns:
             if col in self.data_columns:
+                if pd.api.types.is_integer_dtype(self.data[col]):
+                    # Columnas tipadas: ya son 0/1 tras la imputación
+                    continue
                 self.data[col] = self.data[col].apply(self.map_binary_value)
 
     def transform_triage_column(self) -> None:
@@ -1,8 +1,10 @@
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 import joblib
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 from sklearn.preprocessing import MinMaxScaler, MultiLabelBinarizer, OneHotEncoder
 
 
@@ -34,8 +36,28 @@ class DataEncoder:
     normalizar los datos.
     """
 
-    def __init__(self, stage="dev"):
+    def __init__(
+        self,
+        stage="dev",
+        persist=True,
+        encoders: Optional[Tuple] = None,
+        sparse: bool = False,
+    ):
+        """
+        Args:
+            stage: stage del modelo (dev/prod).
+            persist: si es False los encoders no se serializan (folds de la
+                búsqueda de hiperparámetros).
+            encoders: (categorical, multilabel, numerical) ya ajustados de una
+                version previa. Si se entregan no se vuelven a ajustar, solo
+                se aplican y se serializan con la nueva version.
+            sparse: si es True `encode` entrega matrices CSR float32 en vez
+                de DataFrames (ver encode_sparse).
+        """
         self.stage = stage
+        self.persist = persist
+        self.encoders = encoders
+        self.sparse = sparse
 
     def upload_data(self, data: List[pd.DataFrame], version: str) -> None:
         self.features_train = data[0]
@@ -58,6 +80,8 @@ class DataEncoder:
         """
         Serializa el encoder en un archivo.
         """
+        if not self.persist:
+            return
         file_name = self.get_versioning_label(category)
         base_path = self.get_base_directory_package()
         file_path = base_path / "encoders_repository" / self.stage / file_name
@@ -67,10 +91,13 @@ class DataEncoder:
         """
         Codifica columnas categóricas usando One-Hot Encoding.
         """
-        categorical_encoder = OneHotEncoder(
-            sparse_output=False, handle_unknown="ignore"
-        )
-        features_train_encoded = categorical_encoder.fit_transform(
+        if self.encoders is None:
+            categorical_encoder = OneHotEncoder(
+                sparse_output=False, handle_unknown="ignore"
+            ).fit(self.features_train[self.categorical_columns])
+        else:
+            categorical_encoder = self.encoders[0]
+        features_train_encoded = categorical_encoder.transform(
             self.features_train[self.categorical_columns]
         )
         features_test_encoded = categorical_encoder.transform(
@@ -107,8 +134,13 @@ class DataEncoder:
         Codifica columnas multicategóricas usando Multi Label Encoder.
         """
         multicategorical_column = self.multicategorical_columns[0]
-        mlb_encoder = MultiLabelBinarizer()
-        encoded_train = mlb_encoder.fit_transform(
+        if self.encoders is None:
+            mlb_encoder = MultiLabelBinarizer().fit(
+                self.features_train[multicategorical_column]
+            )
+        else:
+            mlb_encoder = self.encoders[1]
+        encoded_train = mlb_encoder.transform(
             self.features_train[multicategorical_column]
         )
         encoded_test = mlb_encoder.transform(
@@ -137,8 +169,11 @@ class DataEncoder:
         """
         Aplica min max scaler a las columnas numericas.
         """
-        scaler = MinMaxScaler()
-        self.features_train[self.numerical_columns] = scaler.fit_transform(
+        if self.encoders is None:
+            scaler = MinMaxScaler().fit(self.features_train[self.numerical_columns])
+        else:
+            scaler = self.encoders[2]
+        self.features_train[self.numerical_columns] = scaler.transform(
             self.features_train[self.numerical_columns]
         )
         self.features_test[self.numerical_columns] = scaler.transform(
@@ -146,20 +181,143 @@ class DataEncoder:
         )
         self.serialize_encoder(scaler, "numerical")
 
+    def get_unknown_categories(self, features: pd.DataFrame) -> Dict[str, List]:
+        """
+        Valores de `features` que los encoders entregados no conocen (p. ej.
+        códigos CIE nuevos). Con vocabulario nuevo los encoders y el modelo
+        deben reajustarse desde cero.
+        """
+        categorical_encoder, mlb_encoder, _ = self.encoders
+        unknown = {}
+        for col, categories in zip(
+            self.categorical_columns, categorical_encoder.categories_
+        ):
+            values = set(features[col].dropna().unique()) - set(categories)
+            if values:
+                unknown[col] = sorted(values, key=str)
+        multicategorical_column = self.multicategorical_columns[0]
+        labels = {
+            label for labels in features[multicategorical_column] for label in labels
+        }
+        values = labels - set(mlb_encoder.classes_)
+        if values:
+            unknown[multicategorical_column] = sorted(values, key=str)
+        return unknown
+
+    def get_fitted_encoders(self) -> Tuple:
+        """
+        Encoders (categorical, multilabel, numerical) ajustados con el train,
+        o los entregados de una version previa. Se ajustan con la misma
+        configuración densa que en encode, así los artefactos no dependen del
+        formato de la matriz de entrenamiento.
+        """
+        if self.encoders is not None:
+            return self.encoders
+        multicategorical_column = self.multicategorical_columns[0]
+        return (
+            OneHotEncoder(sparse_output=False, handle_unknown="ignore").fit(
+                self.features_train[self.categorical_columns]
+            ),
+            MultiLabelBinarizer().fit(self.features_train[multicategorical_column]),
+            MinMaxScaler().fit(self.features_train[self.numerical_columns]),
+        )
+
+    @staticmethod
+    def transform_sparse(encoder, values) -> sp.csr_matrix:
+        """Aplica un OneHotEncoder o MultiLabelBinarizer con salida dispersa."""
+        encoder.set_params(sparse_output=True)
+        try:
+            return sp.csr_matrix(encoder.transform(values))
+        finally:
+            encoder.set_params(sparse_output=False)
+
+    def build_sparse_matrix(
+        self, features: pd.DataFrame, dense_columns: List[str], encoders: Tuple
+    ) -> sp.csr_matrix:
+        """
+        Une el bloque denso (numéricas normalizadas y binarias) con los
+        bloques dispersos one-hot y multilabel en una matriz CSR float32.
+        """
+        categorical_encoder, mlb_encoder, scaler = encoders
+        dense = features[dense_columns].copy()
+        dense[self.numerical_columns] = scaler.transform(
+            features[self.numerical_columns]
+        )
+        return sp.hstack(
+            [
+                sp.csr_matrix(dense.to_numpy(dtype=np.float32)),
+                self.transform_sparse(
+                    categorical_encoder, features[self.categorical_columns]
+                ),
+                self.transform_sparse(
+                    mlb_encoder, features[self.multicategorical_columns[0]]
+                ),
+            ],
+            format="csr",
+            dtype=np.float32,
+        )
+
+    def encode_sparse(self) -> Tuple[sp.csr_matrix, sp.csr_matrix]:
+        """
+        Variante dispersa de encode: no arma el DataFrame ancho y casi todo en
+        ceros (una columna por código CIE), sino una matriz CSR con las mismas
+        columnas, en el mismo orden. Los nombres quedan en `feature_names` y
+        los encoders ajustados en `fitted_encoders`.
+        """
+        encoders = self.fitted_encoders = self.get_fitted_encoders()
+        for encoder, category in zip(
+            encoders, ("categorical", "multilabel", "numerical")
+        ):
+            self.serialize_encoder(encoder, category)
+
+        categorical_encoder, mlb_encoder, _ = encoders
+        multicategorical_column = self.multicategorical_columns[0]
+        dense_columns = [
+            col
+            for col in self.features_train.columns
+            if col not in self.categorical_columns + self.multicategorical_columns
+        ]
+        self.feature_names = (
+            dense_columns
+            + list(categorical_encoder.get_feature_names_out(self.categorical_columns))
+            + [f"{multicategorical_column}_{cls}" for cls in mlb_encoder.classes_]
+        )
+        self.features_train = self.build_sparse_matrix(
+            self.features_train, dense_columns, encoders
+        )
+        self.features_test = self.build_sparse_matrix(
+            self.features_test, dense_columns, encoders
+        )
+        return self.features_train, self.features_test
+
+    @staticmethod
+    def get_matrix_bytes(matrix) -> int:
+        """Memoria ocupada por una matriz codificada (DataFrame o CSR)."""
+        if sp.issparse(matrix):
+            return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+        return int(matrix.memory_usage(index=True).sum())
+
     def encode(self, data: List[pd.DataFrame], version: str) -> pd.DataFrame:
         """
         Ejecuta el preprocesamiento completo de datos.
-        Retorna el DataFrame preprocesado.
+        Retorna el DataFrame preprocesado (o matrices CSR con `sparse`).
         """
         self.upload_data(data, version)
-        self.encode_categorical_columns()
-        self.normalize_numerical_columns()
-        self.encode_multicategorical_columns()
+        if self.sparse:
+            self.encode_sparse()
+        else:
+            self.encode_categorical_columns()
+            self.normalize_numerical_columns()
+            self.encode_multicategorical_columns()
+            self.feature_names = list(self.features_train.columns)
+        self.matrix_bytes = self.get_matrix_bytes(self.features_train)
         self.print_successful_operation()
         return self.features_train, self.features_test
 
     def print_successful_operation(self) -> None:
         """Imprime mensaje de exito"""
+        matrix_format = "CSR" if self.sparse else "denso"
         print(
-            f"✅ Datos codificados: {len(self.features_train)} filas de entrenamiento y {len(self.features_test)} filas de testing"
+            f"✅ Datos codificados: {self.features_train.shape[0]} filas de entrenamiento y {self.features_test.shape[0]} filas de testing "
+            f"({len(self.feature_names)} features, {matrix_format}, {self.matrix_bytes / 2**20:.1f} MB en train)"
         )
@@ -1,3 +1,5 @@
+from typing import Optional
+
 import pandas as pd
 from sklearn.model_selection import train_test_split
 
@@ -62,9 +64,13 @@ class DataSplitter:
         """
         self.data = df
 
-    def build_train_test_data(self, df: pd.DataFrame) -> tuple[pd.DataFrame]:
+    def build_train_test_data(
+        self, df: pd.DataFrame, known_max_id: Optional[int] = None
+    ) -> tuple[pd.DataFrame]:
         """
         Crea los copnjuntos de entrenamiento y testing para el modelo.
+        Con `known_max_id`, los episodios con id menor o igual (que otro
+        modelo ya vio) van solo a entrenamiento y el testing sale de los demás.
         """
         self.upload_data(df)
         features_columns = (
@@ -79,9 +85,17 @@ class DataSplitter:
             if isinstance(self.target_column, str)
             else self.data[self.target_column[0]]
         )
+        known = None
+        if known_max_id is not None:
+            known = self.data["id_episodio"] <= known_max_id
+            x_known, y_known = x[known], y[known]
+            x, y = x[~known], y[~known]
         x_train, x_test, y_train, y_test = train_test_split(
             x, y, test_size=1 - self.train_size, random_state=23, stratify=y
         )
+        if known is not None:
+            x_train = pd.concat([x_known, x_train])
+            y_train = pd.concat([y_known, y_train])
         self.print_successful_operation(x_train, x_test)
         return x_train, x_test, y_train, y_test
 
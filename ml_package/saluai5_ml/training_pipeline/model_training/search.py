@@ -0,0 +1,203 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import f1_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler, StratifiedKFold
+
+from ml_package.saluai5_ml.training_pipeline.data_preparation.encoder import DataEncoder
+
+# Folds codificados del proceso worker (se cargan una vez por worker)
+_worker_folds: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = []
+
+
+def _init_worker(folds) -> None:
+    """Initializer del pool: deja los folds disponibles para todas las tareas."""
+    global _worker_folds
+    _worker_folds = folds
+
+
+def evaluate_candidate_fold(params: Dict[str, Any], fold: int) -> Dict[str, float]:
+    """
+    Entrena un candidato en un fold y lo evalúa en la parte de validación.
+    Devuelve el F1 ponderado y el tiempo (wall y CPU) que tomó.
+    """
+    X_train, y_train, X_val, y_val = _worker_folds[fold]
+    start, cpu_start = time.perf_counter(), time.process_time()
+    # Un núcleo por fit: el paralelismo lo da el pool de procesos
+    model = RandomForestClassifier(**{**params, "n_jobs": 1})
+    model.fit(X_train, y_train)
+    score = f1_score(y_val, model.predict(X_val), average="weighted")
+    return {
+        "score": float(score),
+        "seconds": time.perf_counter() - start,
+        "cpu_seconds": time.process_time() - cpu_start,
+    }
+
+
+class HyperparameterSearch:
+    """
+    Búsqueda de hiperparámetros del RandomForest con validación cruzada
+    estratificada (k-fold).
+
+    Cada fold se codifica una sola vez (DataEncoder sin serializar) y todas
+    las combinaciones candidato x fold se reparten en un pool de procesos del
+    tamaño de los núcleos disponibles. Los folds se envían a cada worker una
+    vez, al crearlo, y no con cada tarea.
+    """
+
+    default_space = {
+        "n_estimators": [100, 300],
+        "max_depth": [10, 20, None],
+        "min_samples_leaf": [1, 3],
+        "max_features": ["sqrt", 0.3],
+    }
+
+    def __init__(
+        self,
+        base_params: Dict[str, Any],
+        space: Optional[Dict[str, list]] = None,
+        n_splits: int = 5,
+        n_candidates: int = 0,
+        max_workers: Optional[int] = None,
+        random_state: int = 23,
+        sparse: bool = False,
+    ):
+        """
+        Args:
+            base_params: parámetros fijos del modelo; cada candidato los pisa.
+            space: valores a probar por parámetro (default_space si es None).
+            n_splits: cantidad de folds.
+            n_candidates: 0 recorre la grilla completa; si no, se muestrean
+                n_candidates combinaciones al azar.
+            max_workers: procesos del pool (por defecto, núcleos disponibles).
+            sparse: codificar los folds como matrices CSR (ver DataEncoder).
+        """
+        self.base_params = base_params
+        self.space = space or self.default_space
+        self.n_splits = n_splits
+        self.n_candidates = n_candidates
+        self.max_workers = max_workers
+        self.random_state = random_state
+        self.sparse = sparse
+
+    def get_candidates(self) -> List[Dict[str, Any]]:
+        """Combinaciones de parámetros a evaluar."""
+        if self.n_candidates:
+            sampler = ParameterSampler(
+                self.space, n_iter=self.n_candidates, random_state=self.random_state
+            )
+            candidates = list(sampler)
+        else:
+            candidates = list(ParameterGrid(self.space))
+        return [{**self.base_params, **candidate} for candidate in candidates]
+
+    def build_folds(self, features: pd.DataFrame, target: pd.Series) -> List[Tuple]:
+        """
+        Divide en k folds estratificados y codifica cada uno una vez (los
+        encoders se ajustan solo con la parte de entrenamiento del fold).
+        """
+        splitter = StratifiedKFold(
+            n_splits=self.n_splits, shuffle=True, random_state=self.random_state
+        )
+        folds = []
+        for train_index, val_index in splitter.split(features, target):
+            X_train, X_val = DataEncoder(persist=False, sparse=self.sparse).encode(
+                [features.iloc[train_index], features.iloc[val_index]], version=None
+            )
+            if not self.sparse:
+                X_train = X_train.to_numpy(dtype=np.float32)
+                X_val = X_val.to_numpy(dtype=np.float32)
+            folds.append(
+                (
+                    X_train,
+                    target.iloc[train_index].to_numpy(),
+                    X_val,
+                    target.iloc[val_index].to_numpy(),
+                )
+            )
+        return folds
+
+    def get_max_workers(self, n_tasks: int) -> int:
+        """Tamaño del pool: núcleos disponibles, sin superar las tareas."""
+        if self.max_workers:
+            return max(1, min(self.max_workers, n_tasks))
+        if hasattr(os, "sched_getaffinity"):
+            cores = len(os.sched_getaffinity(0))
+        else:
+            cores = os.cpu_count() or 1
+        return max(1, min(cores, n_tasks))
+
+    def run(self, features: pd.DataFrame, target: pd.Series) -> Dict[str, Any]:
+        """
+        Ejecuta la búsqueda. Devuelve la mejor configuración, su puntaje
+        promedio en CV y el costo de la búsqueda.
+        """
+        start = time.perf_counter()
+        folds = self.build_folds(features, target)
+        encoding_seconds = time.perf_counter() - start
+
+        candidates = self.get_candidates()
+        tasks = [
+            (i, fold) for i in range(len(candidates)) for fold in range(len(folds))
+        ]
+        max_workers = self.get_max_workers(len(tasks))
+
+        results: Dict[int, List[Dict[str, float]]] = {
+            i: [] for i in range(len(candidates))
+        }
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(folds,),
+        ) as pool:
+            futures = [
+                (i, pool.submit(evaluate_candidate_fold, candidates[i], fold))
+                for i, fold in tasks
+            ]
+            for i, future in futures:
+                results[i].append(future.result())
+
+        scores = [
+            {
+                "params": candidates[i],
+                "mean_score": float(np.mean([r["score"] for r in fold_results])),
+                "std_score": float(np.std([r["score"] for r in fold_results])),
+            }
+            for i, fold_results in results.items()
+        ]
+        # Ante empate gana el primer candidato (orden de la grilla o muestra)
+        best = max(scores, key=lambda s: s["mean_score"])
+        fold_results = [r for rs in results.values() for r in rs]
+        summary = {
+            "best_params": best["params"],
+            "best_score": round(best["mean_score"], 4),
+            "cost": {
+                "candidates": len(candidates),
+                "folds": len(folds),
+                "fits": len(fold_results),
+                "workers": max_workers,
+                "wall_seconds": round(time.perf_counter() - start, 3),
+                "encoding_seconds": round(encoding_seconds, 3),
+                "fit_cpu_seconds": round(
+                    sum(r["cpu_seconds"] for r in fold_results), 3
+                ),
+            },
+            "scores": scores,
+        }
+        self.print_successful_operation(summary)
+        return summary
+
+    def print_successful_operation(self, summary: Dict[str, Any]) -> None:
+        """Imprime mensaje de exito"""
+        print(
+            f"✅ Búsqueda de hiperparámetros: {summary['cost']['candidates']} candidatos x "
+            f"{summary['cost']['folds']} folds en {summary['cost']['wall_seconds']}s. "
+            f"Mejor F1 (CV): {summary['best_score']} con {summary['best_params']}"
+        )
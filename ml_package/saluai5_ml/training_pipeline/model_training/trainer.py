@@ -1,10 +1,15 @@
+import time
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 import joblib
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 from sklearn.ensemble import RandomForestClassifier
 
+from ml_package.saluai5_ml.inference_pipeline.artifacts.flat_forest import FlatForest
+
 
 class ModelTrainer:
     """
@@ -12,6 +17,13 @@ class ModelTrainer:
     los datos preprocesados.
     """
 
+    default_params = {
+        "n_estimators": 100,
+        "max_depth": 10,
+        "bootstrap": True,
+        "random_state": 23,
+    }
+
     def __init__(self, stage="dev", config=None):
         self.stage = stage
         self.config = config
@@ -25,23 +37,81 @@ class ModelTrainer:
         self.target_train = data[1]
         self.label_version = version
 
+    def get_params(self) -> dict:
+        """Hiperparámetros con los que se entrena el modelo."""
+        if self.config is None:
+            return dict(self.default_params)
+        return dict(self.config)
+
     def models_factory(self):
         """Factory para crear modelos de ML clásicos."""
-        if self.config is None:
-            return RandomForestClassifier(
-                n_estimators=100, max_depth=10, bootstrap=True, random_state=23
-            )
-        return RandomForestClassifier(**self.config)
+        return RandomForestClassifier(**self.get_params())
 
-    def train_model(self, data: List[pd.DataFrame], version: str) -> None:
-        """Entrena el modelo de machine learning clásico."""
+    def train_model(
+        self,
+        data: List[pd.DataFrame],
+        version: str,
+        feature_names: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Entrena el modelo de machine learning clásico. Con una matriz CSR hay
+        que entregar `feature_names` (DataEncoder.feature_names).
+        """
         self.upload_data(data, version)
         model = self.models_factory()
+        start = time.perf_counter()
         model.fit(self.features_train, self.target_train)
+        self.fit_seconds = time.perf_counter() - start
+        self.set_feature_names(model, feature_names)
         self.model_serializer(model)
         self.print_successful_operation()
         return model
 
+    def set_feature_names(self, model, feature_names: Optional[List[str]]) -> None:
+        """
+        sklearn solo guarda feature_names_in_ cuando entrena con un DataFrame.
+        Con matrices CSR se asignan a mano: la inferencia (FeatureCodec) arma
+        la matriz en el orden de model.feature_names_in_.
+        """
+        if sp.issparse(self.features_train):
+            model.feature_names_in_ = np.asarray(feature_names, dtype=object)
+
+    def grow_model(
+        self,
+        model,
+        data: List[pd.DataFrame],
+        version: str,
+        n_trees: int,
+        budget: int,
+        feature_names: Optional[List[str]] = None,
+    ):
+        """
+        Entrenamiento incremental: agrega `n_trees` árboles (warm_start) al
+        bosque de la version previa, ajustados solo con `data`. Si el bosque
+        supera `budget` árboles se descartan los más antiguos, de modo que el
+        costo depende del volumen de datos nuevos y no de toda la historia.
+        Los datos deben venir codificados con los encoders de esa version.
+        """
+        self.upload_data(data, version)
+        n_previous = len(model.estimators_)
+        model.set_params(warm_start=True, n_estimators=n_previous + n_trees)
+        start = time.perf_counter()
+        model.fit(self.features_train, self.target_train)
+        self.fit_seconds = time.perf_counter() - start
+        self.set_feature_names(model, feature_names)
+
+        # Los árboles se agregan al final: los más antiguos son los primeros
+        excess = len(model.estimators_) - budget
+        if excess > 0:
+            model.estimators_ = model.estimators_[excess:]
+        model.set_params(warm_start=False, n_estimators=len(model.estimators_))
+
+        self.model_serializer(model)
+        self.print_successful_incremental_operation(
+            n_trees, max(excess, 0), len(model.estimators_)
+        )
+        return model
+
     def get_base_directory_package(self) -> Path:
         """
         Obtiene el directorio base del proyecto.
@@ -62,7 +132,27 @@ class ModelTrainer:
         base_path = self.get_base_directory_package()
         file_path = base_path / "models_repository" / self.stage / file_name
         joblib.dump(model, file_path)
+        self.flat_forest_serializer(model, file_path.with_suffix(".npz"))
+
+    def flat_forest_serializer(self, model, file_path: Path) -> None:
+        """
+        Exporta el bosque a arreglos NumPy contiguos (.npz) junto al modelo,
+        para el backend de inferencia flat_forest.
+        """
+        FlatForest.from_sklearn(model).save(file_path)
 
     def print_successful_operation(self) -> None:
         """Imprime mensaje de exito"""
-        print(f"✅ Modelo {self.model_name} entrenado y serializado exitosamente.")
+        print(
+            f"✅ Modelo {self.model_name} entrenado y serializado exitosamente "
+            f"(ajuste: {self.fit_seconds:.2f}s)."
+        )
+
+    def print_successful_incremental_operation(
+        self, added: int, dropped: int, total: int
+    ) -> None:
+        """Imprime mensaje de exito del entrenamiento incremental"""
+        print(
+            f"✅ Modelo {self.model_name} actualizado: {added} árboles nuevos, "
+            f"{dropped} descartados, {total} en total."
+        )
@@ -1,4 +1,13 @@
+import time
+from datetime import timedelta
+
+from app.core.config import ml_config
+from ml_package.saluai5_ml.inference_pipeline.artifacts.loader import ArtifactsLoader
+from ml_package.saluai5_ml.profiling import StageProfiler
 from ml_package.saluai5_ml.training_pipeline.data_ingestion.loader import DataLoader
+from ml_package.saluai5_ml.training_pipeline.data_ingestion.snapshot import (
+    TrainingSnapshot,
+)
 from ml_package.saluai5_ml.training_pipeline.data_preparation.cleaner import DataCleaner
 from ml_package.saluai5_ml.training_pipeline.data_preparation.encoder import DataEncoder
 from ml_package.saluai5_ml.training_pipeline.data_preparation.splitter import (
@@ -7,6 +16,9 @@ from ml_package.saluai5_ml.training_pipeline.data_preparation.splitter import (
 from ml_package.saluai5_ml.training_pipeline.model_training.evaluator import (
     ModelEvaluator,
 )
+from ml_package.saluai5_ml.training_pipeline.model_training.search import (
+    HyperparameterSearch,
+)
 from ml_package.saluai5_ml.training_pipeline.model_training.trainer import ModelTrainer
 from ml_package.saluai5_ml.training_pipeline.versioner import ModelVersioner
 
@@ -14,47 +26,324 @@ from ml_package.saluai5_ml.training_pipeline.versioner import ModelVersioner
 class TrainingOrchestrator:
     """
     Coordina el pipeline de entrenamiento completo.
+
+    Con `search` activo (por defecto según BACKEND_ML_TRAINING_SEARCH_ENABLED)
+    los hiperparámetros se eligen con una búsqueda con k-fold sobre el
+    conjunto de entrenamiento antes de entrenar el modelo final.
+
+    Si la huella del conjunto de entrenamiento (y de la configuración) es la
+    misma de la última version del stage, no se reentrena: `run` devuelve esa
+    version y deja `noop` en True, salvo que se pida `force`.
+
+    Con `incremental` activo (BACKEND_ML_TRAINING_INCREMENTAL_ENABLED) se
+    parte de la version activa: se le agregan árboles entrenados solo con los
+    episodios modificados desde su watermark, reutilizando sus encoders e
+    imputación. Si eso no es posible se hace un entrenamiento completo.
     """
 
-    def __init__(self, stage, config=None):
+    def __init__(self, stage, config=None, search=None, force=False, incremental=None):
         self.stage = stage
         self.config = config
-        self.cleaner = DataCleaner()
-        self.encoder = DataEncoder(self.stage)
+        self.search = ml_config.training_search_enabled if search is None else search
+        self.incremental = (
+            ml_config.training_incremental_enabled
+            if incremental is None
+            else incremental
+        )
+        self.force = force
+        self.noop = False
+        self.cleaner = DataCleaner(self.stage)
+        self.encoder = DataEncoder(
+            self.stage, sparse=ml_config.training_sparse_features
+        )
         self.splitter = DataSplitter(train_size=0.8)
         self.trainer = ModelTrainer(self.stage, self.config)
         self.evaluator = ModelEvaluator()
         self.versioner = ModelVersioner(self.stage)
 
-    async def run(self, session):
-        """Ejecuta el flujo completo de entrenamiento."""
+    async def run(self, session, on_stage=None):
+        """
+        Ejecuta el flujo completo de entrenamiento. Registra en `self.timings`
+        la duración (segundos) de cada etapa; si se entrega `on_stage`, se
+        llama con los tiempos acumulados al terminar cada una. Con
+        BACKEND_ML_TRAINING_PROFILING_ENABLED, `self.profiler.report` queda
+        con el perfil (CPU y memoria) de cada etapa. `self.training_stats`
+        guarda el formato y tamaño de la matriz de entrenamiento y el tiempo
+        de ajuste, para comparar corridas densas y CSR.
+        """
+        self.timings = {}
+        self.training_stats = {}
+        self.on_stage = on_stage
+        self.profiler = StageProfiler(
+            enabled=ml_config.training_profiling_enabled,
+            trace_memory=ml_config.profiling_tracemalloc,
+        )
+        self.profiler.begin()
+        try:
+            return await self.run_stages(session)
+        finally:
+            self.profiler.close()
 
-        # Ingesta de datos
-        new_version_label = await self.versioner.generate_new_version_label(session)
+    async def run_stages(self, session):
+        """Etapas del entrenamiento, de la huella al registro de la version."""
+        start = time.perf_counter()
+
+        # Huella del conjunto de entrenamiento: sin cambios no se reentrena
         self.loader = DataLoader(session)
-        data = await self.loader.fetch_all_episodes_df()
+        self.dataset_fingerprint = await self.loader.get_dataset_fingerprint(
+            self.get_training_settings()
+        )
+        latest = await self.versioner.get_last_version(session)
+        if (
+            not self.force
+            and latest is not None
+            and latest.dataset_fingerprint == self.dataset_fingerprint
+        ):
+            self.noop = True
+            await self.record_stage("huella", start)
+            print(
+                f"✅ Conjunto de entrenamiento sin cambios: se mantiene {latest.version}"
+            )
+            return latest
+        start = await self.record_stage("huella", start)
+
+        # Ingesta, preparación y entrenamiento: incremental sobre la version
+        # activa si se puede, o completo sobre toda la historia
+        new_version_label = await self.versioner.generate_new_version_label(session)
+        self.data_watermark = await self.loader.get_watermark()
+        self.data_max_episode_id = await self.loader.get_max_episode_id()
+        self.base_version = None
+        self.baseline_metric = None
+        trained = None
+        if self.incremental:
+            trained = await self.train_incremental(session, new_version_label, start)
+            if trained is None:
+                start = await self.record_stage("incremental_descartado", start)
+        if trained is None:
+            trained = await self.train_full(session, new_version_label, start)
+        model, X_test, y_test, search_summary, start = trained
+
+        # Exportación del bundle mapeable en memoria (manifest + bloques .npy),
+        # solo si la inferencia carga ese formato
+        if ml_config.artifact_format == "mmap":
+            ArtifactsLoader(new_version_label).export_bundle()
+            start = await self.record_stage("exportacion", start)
+
+        # Evaluación
+        model_metric = self.evaluator.evaluate_model([X_test, y_test], model)
+        start = await self.record_stage("evaluacion", start)
+
+        # Registro de versiones
+        new_model_version = await self.versioner.save_model_metrics(
+            session,
+            model_metric,
+            new_version_label,
+            hyperparameters=self.get_model_params(model),
+            dataset_fingerprint=self.dataset_fingerprint,
+            data_watermark=self.data_watermark,
+            data_max_episode_id=self.data_max_episode_id,
+            base_version=self.base_version,
+            baseline_metric=self.baseline_metric,
+            search=(
+                {key: search_summary[key] for key in ("best_score", "cost", "scores")}
+                if search_summary
+                else None
+            ),
+        )
+        await self.record_stage("registro", start)
+
+        print(
+            f"✅ Nueva versión de modelo registrada: {new_model_version.version} ({new_model_version.trained_at})"
+        )
+        return new_model_version
+
+    async def train_full(self, session, new_version_label, start):
+        """
+        Entrenamiento completo: ajusta imputación, encoders y un bosque nuevo
+        con toda la historia.
+        """
+        # Ingesta de datos
+        if ml_config.training_snapshot_enabled:
+            # Solo se traen de Postgres los episodios modificados
+            snapshot = TrainingSnapshot(
+                overlap_seconds=ml_config.training_snapshot_overlap_seconds,
+                stage=self.stage,
+            )
+            self.snapshot_refresh = await snapshot.refresh(session)
+            data = snapshot.to_dataframe(self.loader)
+        else:
+            data = await self.loader.fetch_all_episodes_df()
+        start = await self.record_stage("ingesta", start)
 
         # Preprocesamiento
         data = self.cleaner.run_preprocessing(data)
+        self.cleaner.serialize_imputation_statistics(new_version_label)
+        start = await self.record_stage("preprocesamiento", start)
 
         # División de datos para entrenamiento y prueba
         X_train, X_test, y_train, y_test = self.splitter.build_train_test_data(data)
 
+        # Búsqueda de hiperparámetros (opcional) con k-fold sobre el train
+        search_summary = None
+        if self.search:
+            search_summary = self.build_search().run(X_train, y_train)
+            self.trainer.config = search_summary["best_params"]
+            start = await self.record_stage("busqueda", start)
+
         # Codificación de datos
         X_train, X_test = self.encoder.encode([X_train, X_test], new_version_label)
+        start = await self.record_stage("codificacion", start)
 
         # Entrenamiento
-        model = self.trainer.train_model([X_train, y_train], new_version_label)
+        model = self.trainer.train_model(
+            [X_train, y_train], new_version_label, self.encoder.feature_names
+        )
+        self.record_training_stats(self.encoder)
+        start = await self.record_stage("entrenamiento", start)
+        return model, X_test, y_test, search_summary, start
 
-        # Evaluación
-        model_metric = self.evaluator.evaluate_model([X_test, y_test], model)
+    async def train_incremental(self, session, new_version_label, start):
+        """
+        Entrenamiento incremental: trae solo los episodios modificados desde
+        el watermark de la version activa, los prepara con su imputación y
+        sus encoders y le agrega árboles entrenados con ellos. Devuelve None
+        (y se hace un entrenamiento completo) si no hay version activa
+        utilizable, si los datos nuevos no alcanzan o si traen vocabulario
+        que los encoders no conocen (p. ej. códigos CIE nuevos).
+        """
+        previous = await self.versioner.get_active_version(session)
+        if previous is None or previous.data_watermark is None:
+            print("Sin version activa con watermark: entrenamiento completo")
+            return None
 
-        # Registro de versiones
-        new_model_version = await self.versioner.save_model_metrics(
-            session, model_metric, new_version_label
+        try:
+            artifacts = ArtifactsLoader(previous.version)
+            model = artifacts.load_ml_model()
+            encoders = artifacts.load_data_encoders()
+            statistics = artifacts.load_imputation_statistics()
+        except FileNotFoundError as e:
+            print(f"Artefactos de {previous.version} no disponibles: {e}")
+            return None
+        if statistics is None or not hasattr(model, "estimators_"):
+            print(f"{previous.version} no admite entrenamiento incremental")
+            return None
+        # El bosque crece con los hiperparámetros con que se entrenó
+        if previous.hyperparameters:
+            self.trainer.config = dict(previous.hyperparameters)
+
+        # Ingesta de los episodios modificados desde la version activa
+        since = previous.data_watermark - timedelta(
+            seconds=ml_config.training_snapshot_overlap_seconds
         )
+        data = self.loader.build_dataframe(
+            await self.loader.fetch_columns(changed_since=since)
+        )
+        # Los episodios que la version activa ya vio (editados después) solo
+        # entrenan: el conjunto de prueba sale de los episodios nuevos
+        known_max_id = previous.data_max_episode_id
+        fresh = data
+        if known_max_id is not None:
+            fresh = data[data["id_episodio"] > known_max_id]
+        labels = fresh["validacion"].value_counts()
+        if (
+            len(fresh) < ml_config.training_incremental_min_rows
+            or len(labels) < 2
+            or labels.min() < 2
+        ):
+            print(
+                f"{len(fresh)} episodios nuevos no alcanzan para entrenar "
+                "de forma incremental: entrenamiento completo"
+            )
+            return None
 
-        print(
-            f"✅ Nueva versión de modelo registrada: {new_model_version.version} ({new_model_version.trained_at})"
+        # Preprocesamiento con la imputación de la version activa
+        cleaner = DataCleaner(self.stage, statistics=statistics)
+        data = cleaner.run_preprocessing(data)
+
+        encoder = DataEncoder(
+            self.stage, encoders=encoders, sparse=ml_config.training_sparse_features
         )
-        return new_model_version
+        unknown = encoder.get_unknown_categories(data)
+        if unknown:
+            print(f"Vocabulario nuevo {unknown}: entrenamiento completo")
+            return None
+        cleaner.serialize_imputation_statistics(new_version_label)
+
+        # División y codificación con los encoders de la version activa
+        X_train, X_test, y_train, y_test = self.splitter.build_train_test_data(
+            data, known_max_id=known_max_id
+        )
+        X_train, X_test = encoder.encode([X_train, X_test], new_version_label)
+        start = await self.record_stage("preparacion_incremental", start)
+
+        # Métrica de la version activa en el mismo conjunto de prueba (filas
+        # nuevas que ninguno de los dos modelos vio), antes de que grow_model
+        # modifique el bosque: la promoción compara ambos en las mismas filas
+        baseline = self.evaluator.evaluate_model([X_test, y_test], model)
+
+        # Entrenamiento: árboles nuevos sobre el bosque de la version activa
+        model = self.trainer.grow_model(
+            model,
+            [X_train, y_train],
+            new_version_label,
+            n_trees=ml_config.training_incremental_trees,
+            budget=ml_config.training_tree_budget,
+            feature_names=encoder.feature_names,
+        )
+        self.record_training_stats(encoder)
+        start = await self.record_stage("entrenamiento", start)
+        self.base_version = previous.version
+        self.baseline_metric = float(baseline["value"])
+        return model, X_test, y_test, None, start
+
+    def get_model_params(self, model) -> dict:
+        """
+        Hiperparámetros del modelo entrenado: los del trainer y, si el bosque
+        creció de forma incremental, la cantidad real de árboles.
+        """
+        params = self.trainer.get_params()
+        params["n_estimators"] = len(model.estimators_)
+        return params
+
+    def get_training_settings(self) -> dict:
+        """Configuración que, junto con los datos, determina el modelo."""
+        settings = {"params": self.trainer.get_params(), "search": bool(self.search)}
+        if self.incremental:
+            settings["incremental_settings"] = [
+                ml_config.training_incremental_trees,
+                ml_config.training_tree_budget,
+            ]
+        if self.search:
+            settings["search_settings"] = [
+                ml_config.training_search_splits,
+                ml_config.training_search_candidates,
+            ]
+        return settings
+
+    def build_search(self) -> HyperparameterSearch:
+        """Búsqueda configurada a partir de los parámetros del trainer."""
+        return HyperparameterSearch(
+            base_params=self.trainer.get_params(),
+            n_splits=ml_config.training_search_splits,
+            n_candidates=ml_config.training_search_candidates,
+            max_workers=ml_config.training_search_workers or None,
+            sparse=ml_config.training_sparse_features,
+        )
+
+    def record_training_stats(self, encoder: DataEncoder) -> None:
+        """Guarda el formato y tamaño de la matriz y el tiempo de ajuste."""
+        self.training_stats = {
+            "matrix_format": "csr" if encoder.sparse else "dense",
+            "matrix_mb": round(encoder.matrix_bytes / 2**20, 3),
+            "n_features": len(encoder.feature_names),
+            "fit_seconds": round(self.trainer.fit_seconds, 3),
+        }
+
+    async def record_stage(self, name: str, start: float) -> float:
+        """Guarda la duración de la etapa y devuelve el inicio de la siguiente."""
+        self.timings[name] = round(time.perf_counter() - start, 3)
+        self.profiler.end(name)
+        if self.on_stage is not None:
+            await self.on_stage(dict(self.timings))
+        self.profiler.begin()
+        return time.perf_counter()
@@ -1,9 +1,12 @@
-from datetime import date
-from typing import Any, Dict
+from datetime import date, datetime
+from typing import Any, Dict, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.repositories.model_versions import ModelVersionRepository
+from ml_package.saluai5_ml.inference_pipeline.artifacts.cache import artifacts_cache
+from ml_package.saluai5_ml.inference_pipeline.prediction_cache import prediction_cache
+from ml_package.saluai5_ml.inference_pipeline.registry import active_model_registry
 
 
 class ModelVersioner:
@@ -17,6 +20,10 @@ class ModelVersioner:
         )
         return last_version
 
+    async def get_active_version(self, db: AsyncSession):
+        """Retorna el ModelVersion activo del stage (o None)."""
+        return await ModelVersionRepository.get_active_version_for_stage(db, self.stage)
+
     async def generate_new_version_label(self, db: AsyncSession) -> str:
         """Genera prod_v{i} o dev_v{i} según corresponda."""
         last = await self.get_last_version(db)
@@ -29,9 +36,29 @@ class ModelVersioner:
         return f"{self.stage}_v{next_version}"
 
     async def save_model_metrics(
-        self, db: AsyncSession, metric_info: Dict[str, Any], version: str
+        self,
+        db: AsyncSession,
+        metric_info: Dict[str, Any],
+        version: str,
+        hyperparameters: Optional[Dict[str, Any]] = None,
+        search: Optional[Dict[str, Any]] = None,
+        dataset_fingerprint: Optional[str] = None,
+        data_watermark: Optional[datetime] = None,
+        data_max_episode_id: Optional[int] = None,
+        base_version: Optional[str] = None,
+        baseline_metric: Optional[float] = None,
     ):
-        """Inserta una nueva fila en model_versions."""
+        """
+        Inserta una nueva fila en model_versions, con los hiperparámetros del
+        modelo, la huella, el watermark y el id máximo del conjunto de
+        entrenamiento, la version de la que se hicieron crecer los árboles (si
+        fue incremental) y, si hubo búsqueda, su resultado y costo.
+
+        `baseline_metric` es la métrica de `base_version` en el mismo
+        conjunto de prueba que la nueva. Si `base_version` sigue activa, la
+        promoción compara contra ella y no contra la métrica registrada, que
+        se midió en otro conjunto.
+        """
         versions = await ModelVersionRepository.list_by_stage(db, self.stage)
         if not versions:
             instance = await ModelVersionRepository.create(
@@ -41,8 +68,15 @@ class ModelVersioner:
                 metric=metric_info["metric"],
                 metric_value=float(metric_info["value"]),
                 trained_at=date.today(),
+                hyperparameters=hyperparameters,
+                search=search,
+                dataset_fingerprint=dataset_fingerprint,
+                data_watermark=data_watermark,
+                data_max_episode_id=data_max_episode_id,
+                base_version=base_version,
                 active=True,
             )
+            active_model_registry.invalidate()
             return instance
 
         else:
@@ -58,14 +92,21 @@ class ModelVersioner:
                     metric=metric_info["metric"],
                     metric_value=float(metric_info["value"]),
                     trained_at=date.today(),
+                    hyperparameters=hyperparameters,
+                    search=search,
+                    dataset_fingerprint=dataset_fingerprint,
+                    data_watermark=data_watermark,
+                    data_max_episode_id=data_max_episode_id,
+                    base_version=base_version,
                     active=True,
                 )
+                active_model_registry.invalidate()
                 return instance
 
-            if float(metric_info["value"]) >= active_instance.metric_value:
-                await ModelVersionRepository.update_partial(
-                    db, active_instance, active=False
-                )
+            active_metric = active_instance.metric_value
+            if baseline_metric is not None and active_instance.version == base_version:
+                active_metric = baseline_metric
+            if float(metric_info["value"]) >= active_metric:
                 instance = await ModelVersionRepository.create(
                     db,
                     version=version,
@@ -73,8 +114,20 @@ class ModelVersioner:
                     metric=metric_info["metric"],
                     metric_value=float(metric_info["value"]),
                     trained_at=date.today(),
-                    active=True,
+                    hyperparameters=hyperparameters,
+                    search=search,
+                    dataset_fingerprint=dataset_fingerprint,
+                    data_watermark=data_watermark,
+                    data_max_episode_id=data_max_episode_id,
+                    base_version=base_version,
+                    active=False,
                 )
+                # Promoción: un único UPDATE activa la nueva y desactiva la anterior
+                await ModelVersionRepository.activate(db, self.stage, version)
+                await db.refresh(instance)
+                artifacts_cache.invalidate(active_instance.version)
+                prediction_cache.invalidate(active_instance.version)
+                active_model_registry.invalidate()
                 return instance
 
             else:
@@ -85,6 +138,12 @@ class ModelVersioner:
                     metric=metric_info["metric"],
                     metric_value=float(metric_info["value"]),
                     trained_at=date.today(),
+                    hyperparameters=hyperparameters,
+                    search=search,
+                    dataset_fingerprint=dataset_fingerprint,
+                    data_watermark=data_watermark,
+                    data_max_episode_id=data_max_episode_id,
+                    base_version=base_version,
                     active=False,
                 )
                 return instance
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from ml_package.saluai5_ml.inference_pipeline.artifacts import cache as cache_module
+from ml_package.saluai5_ml.inference_pipeline.artifacts.cache import ArtifactsCache
+
+
+@pytest.fixture
+def fake_loader(monkeypatch):
+    """Reemplaza ArtifactsLoader para no leer pickles desde disco."""
+    calls = []
+
+    class FakeLoader:
+        def __init__(self, version):
+            self.version = version
+
+        def run(self):
+            calls.append(self.version)
+            return {"model": f"model-{self.version}"}
+
+        def get_artifacts_size(self):
+            return 100
+
+    monkeypatch.setattr(cache_module, "ArtifactsLoader", FakeLoader)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_load_version_once(fake_loader):
+    cache = ArtifactsCache(max_bytes=1000)
+
+    results = await asyncio.gather(*[cache.get("prod_v1") for _ in range(10)])
+
+    assert fake_loader == ["prod_v1"]
+    assert all(r["model"] == "model-prod_v1" for r in results)
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_respects_memory_budget(fake_loader):
+    cache = ArtifactsCache(max_bytes=250)
+
+    await cache.get("prod_v1")
+    await cache.get("prod_v2")
+    await cache.get("prod_v1")
+    await cache.get("prod_v3")
+
+    assert cache.cached_versions() == ["prod_v1", "prod_v3"]
+    assert cache.total_bytes() == 200
+
+
+@pytest.mark.asyncio
+async def test_invalidate_stage_keeps_active_version(fake_loader):
+    cache = ArtifactsCache(max_bytes=1000)
+    for version in ("prod_v1", "prod_v2", "dev_v1"):
+        await cache.get(version)
+
+    cache.invalidate_stage("prod", keep="prod_v2")
+
+    assert sorted(cache.cached_versions()) == ["dev_v1", "prod_v2"]
+    await cache.get("prod_v1")
+    assert fake_loader.count("prod_v1") == 2
+
+
+def test_worker_cache_is_dropped_after_parent_invalidations(fake_loader):
+    parent, worker = ArtifactsCache(max_bytes=1000), ArtifactsCache(max_bytes=1000)
+    worker.sync(parent.generation)
+    worker.load("prod_v1")
+    worker.sync(parent.generation)
+    worker.load("prod_v1")
+    assert fake_loader == ["prod_v1"]
+
+    # Promoción o stage borrado y reentrenado: el label puede repetirse
+    parent.invalidate_stage("prod")
+    worker.sync(parent.generation)
+    assert worker.cached_versions() == []
+    worker.load("prod_v1")
+    assert fake_loader == ["prod_v1", "prod_v1"]
@@ -0,0 +1,160 @@
+import random
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import MinMaxScaler, MultiLabelBinarizer, OneHotEncoder
+
+from ml_package.saluai5_ml.inference_pipeline.artifacts.bundle import ArtifactBundle
+from ml_package.saluai5_ml.inference_pipeline.data_preparation.codec import FeatureCodec
+from ml_package.saluai5_ml.inference_pipeline.data_preparation.encoder import (
+    DataEncoder,
+)
+from ml_package.saluai5_ml.inference_pipeline.version_engine import (
+    VersionEngine,
+    build_payloads,
+)
+
+CIE_CODES = ["A01", "B02", "C03", "D04"]
+
+
+def make_cleaned_df(n_rows: int, seed: int) -> pd.DataFrame:
+    """Genera filas con el formato que entrega el DataCleaner de inferencia."""
+    rnd = random.Random(seed)
+    rows = []
+    for _ in range(n_rows):
+        row = {col: rnd.uniform(0, 200) for col in FeatureCodec.numerical_columns}
+        row.update({col: rnd.randint(0, 1) for col in FeatureCodec.binary_columns})
+        row["tipo"] = rnd.choice(["SIN ALERTA", "LEY DE URGENCIA"])
+        row["tipo_alerta_ugcc"] = rnd.choice(["SIN ALERTA", "ALERTA"])
+        row["tipo_cama"] = rnd.choice(["Básica", "UCI", "UTI"])
+        row["triage"] = rnd.choice(["1", "2", "3"])
+        row["diagnostics"] = rnd.sample(CIE_CODES, rnd.randint(0, 2))
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture(scope="module")
+def artifacts():
+    train = make_cleaned_df(120, seed=1)
+    categorical = OneHotEncoder(sparse_output=False, handle_unknown="ignore")
+    categorical_encoded = categorical.fit_transform(
+        train[FeatureCodec.categorical_columns]
+    )
+    numerical = MinMaxScaler()
+    numerical_encoded = numerical.fit_transform(train[FeatureCodec.numerical_columns])
+    multilabel = MultiLabelBinarizer()
+    multilabel_encoded = multilabel.fit_transform(train["diagnostics"])
+
+    features = pd.concat(
+        [
+            pd.DataFrame(numerical_encoded, columns=FeatureCodec.numerical_columns),
+            pd.DataFrame(
+                categorical_encoded,
+                columns=categorical.get_feature_names_out(
+                    FeatureCodec.categorical_columns
+                ),
+            ),
+            train[FeatureCodec.binary_columns],
+            pd.DataFrame(
+                multilabel_encoded,
+                columns=[f"diagnostics_{cls}" for cls in multilabel.classes_],
+            ),
+        ],
+        axis=1,
+    )
+    labels = np.where(features["presion_media"] > 0.5, "PERTINENTE", "NO PERTINENTE")
+    model = RandomForestClassifier(n_estimators=10, max_depth=4, random_state=23)
+    model.fit(features, labels)
+    return {"model": model, "data_encoders": (categorical, multilabel, numerical)}
+
+
+def test_codec_matches_sklearn_encoders(artifacts):
+    data = make_cleaned_df(30, seed=2)
+    data.loc[0, "tipo"] = "CATEGORIA NUEVA"
+    data.at[1, "diagnostics"] = ["A01", "ZZZ"]
+
+    codec = FeatureCodec(artifacts["model"], artifacts["data_encoders"])
+    expected = DataEncoder().encode(data.copy(), artifacts)
+    encoded = codec.encode(data)
+
+    assert encoded.dtype == np.float32
+    assert np.array_equal(encoded, expected.to_numpy().astype(np.float32))
+    model = artifacts["model"]
+    assert np.array_equal(model.predict_proba(encoded), model.predict_proba(expected))
+
+
+def test_feature_names_warning_is_only_silenced_while_scoring(artifacts):
+    model, encoders = artifacts["model"], artifacts["data_encoders"]
+    encoded = FeatureCodec(model, encoders).encode(make_cleaned_df(5, seed=4))
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        build_payloads(model, encoded)
+    assert caught == []
+
+    with pytest.warns(UserWarning, match="valid feature names"):
+        model.predict_proba(encoded)
+
+
+def test_bundle_round_trip_is_memory_mapped(artifacts, tmp_path):
+    model, encoders = artifacts["model"], artifacts["data_encoders"]
+    statistics = {"binary": {"dva": False}, "numerical": {"pcr": 12.5}}
+    ArtifactBundle(tmp_path / "dev_v1").save(
+        model, encoders, set(encoders[1].classes_), statistics
+    )
+
+    loaded = ArtifactBundle(tmp_path / "dev_v1").load()
+
+    data = make_cleaned_df(30, seed=3)
+    data.loc[0, "tipo"] = "CATEGORIA NUEVA"
+    encoded = loaded["feature_codec"].encode(data)
+    expected = FeatureCodec(model, encoders).encode(data)
+    assert np.array_equal(encoded, expected)
+    assert np.array_equal(
+        loaded["model"].predict_proba(encoded), model.predict_proba(expected)
+    )
+    assert list(loaded["model"].classes_) == list(model.classes_)
+    assert isinstance(loaded["model"].threshold.base, np.memmap)
+    assert loaded["imputation_statistics"] == statistics
+    assert loaded["multilabel_classes"] == set(CIE_CODES)
+
+
+def test_version_engine_is_shared_safely_across_threads(artifacts):
+    model, encoders = artifacts["model"], artifacts["data_encoders"]
+    engine = VersionEngine(
+        "dev_v1",
+        {
+            "model": model,
+            "feature_codec": FeatureCodec(model, encoders),
+            "multilabel_classes": set(CIE_CODES),
+            "imputation_statistics": {
+                "binary": {},
+                "numerical": {},
+                "categorical": {
+                    "tipo": "SIN ALERTA",
+                    "tipo_alerta_ugcc": "SIN ALERTA",
+                    "tipo_cama": "UCI",
+                    "triage": "2",
+                },
+            },
+        },
+    )
+    batches = []
+    for seed in range(8):
+        records = make_cleaned_df(5, seed=seed).to_dict("records")
+        for record in records:
+            record.update(
+                {col: bool(record[col]) for col in FeatureCodec.binary_columns}
+            )
+        batches.append(records)
+    expected = [engine.score(records) for records in batches]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(engine.score, batches * 4))
+
+    assert results == expected * 4
+    assert not hasattr(engine.cleaner, "data_request")
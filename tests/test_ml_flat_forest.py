@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from ml_package.saluai5_ml.inference_pipeline.artifacts.flat_forest import FlatForest
+
+
+def make_data(n_rows: int, seed: int, missing_rate: float = 0.0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, 12))
+    X[:, 5:] = rng.integers(0, 2, size=(n_rows, 7))
+    y = np.where(X[:, 0] + X[:, 5] - X[:, 1] > 0.3, "PERTINENTE", "NO PERTINENTE")
+    if missing_rate:
+        X[rng.random(X.shape) < missing_rate] = np.nan
+    return X, y
+
+
+@pytest.mark.parametrize("n_rows", [1, 7, 200])
+def test_flat_forest_matches_sklearn_probabilities(tmp_path, n_rows):
+    X_train, y_train = make_data(400, seed=1)
+    model = RandomForestClassifier(n_estimators=25, max_depth=10, random_state=23)
+    model.fit(X_train, y_train)
+
+    path = tmp_path / "dev_v1.npz"
+    FlatForest.from_sklearn(model).save(path)
+    flat_forest = FlatForest.load(path)
+
+    X, _ = make_data(n_rows, seed=2)
+    assert np.array_equal(flat_forest.predict_proba(X), model.predict_proba(X))
+    assert np.array_equal(flat_forest.predict(X), model.predict(X))
+    assert list(flat_forest.classes_) == list(model.classes_)
+
+
+def test_flat_forest_routes_missing_values_like_sklearn():
+    X_train, y_train = make_data(400, seed=3, missing_rate=0.1)
+    model = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=23)
+    model.fit(X_train, y_train)
+
+    X, _ = make_data(50, seed=4, missing_rate=0.2)
+    flat_forest = FlatForest.from_sklearn(model)
+    assert np.array_equal(flat_forest.predict_proba(X), model.predict_proba(X))
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+from ml_package.saluai5_ml.training_pipeline.data_preparation.encoder import DataEncoder
+from ml_package.saluai5_ml.training_pipeline.data_preparation.splitter import (
+    DataSplitter,
+)
+from ml_package.saluai5_ml.training_pipeline.model_training import (
+    search as search_module,
+)
+from ml_package.saluai5_ml.training_pipeline.model_training.search import (
+    HyperparameterSearch,
+)
+
+
+def make_training_data(n=120, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {col: rng.random(n) for col in DataSplitter.numerical_columns}
+    data.update({col: rng.integers(0, 2, n) for col in DataSplitter.binary_columns})
+    data.update(
+        {
+            col: rng.choice(["A", "B", "C"], n)
+            for col in DataSplitter.categorical_columns
+        }
+    )
+    data["diagnostics"] = [list(rng.choice(["I21", "J18", "N17"], 2)) for _ in range(n)]
+    target = np.where(
+        data["presion_sistolica"] + data["dva"] > 0.9, "PERTINENTE", "NO PERTINENTE"
+    )
+    return pd.DataFrame(data), pd.Series(target)
+
+
+def test_search_encodes_each_fold_once_and_scores_every_candidate(monkeypatch):
+    encode_calls = []
+    original_encode = DataEncoder.encode
+
+    def encode(self, data, version):
+        encode_calls.append(self.persist)
+        return original_encode(self, data, version)
+
+    monkeypatch.setattr(DataEncoder, "encode", encode)
+    features, target = make_training_data()
+    search = HyperparameterSearch(
+        base_params={"n_estimators": 10, "random_state": 23},
+        space={"max_depth": [2, None], "min_samples_leaf": [1, 5]},
+        n_splits=3,
+        max_workers=2,
+    )
+
+    summary = search.run(features, target)
+
+    assert encode_calls == [False, False, False]
+    assert summary["cost"]["candidates"] == 4
+    assert summary["cost"]["fits"] == 12
+    assert summary["cost"]["workers"] == 2
+    assert len(summary["scores"]) == 4
+    best = max(summary["scores"], key=lambda s: s["mean_score"])
+    assert summary["best_params"] == best["params"]
+    assert summary["best_params"]["n_estimators"] == 10
+    assert summary["best_score"] == round(best["mean_score"], 4)
+
+
+def test_random_sample_of_candidates():
+    search = HyperparameterSearch(
+        base_params={"random_state": 23},
+        space={"max_depth": [2, 4, 8, None], "min_samples_leaf": [1, 2, 5]},
+        n_candidates=5,
+    )
+    candidates = search.get_candidates()
+    assert len(candidates) == 5
+    assert len({tuple(sorted(c.items(), key=str)) for c in candidates}) == 5
+    assert all(c["random_state"] == 23 for c in candidates)
+
+
+def test_fold_fit_overrides_n_jobs_from_the_search_space(monkeypatch):
+    features, target = make_training_data()
+    X, y = features[DataSplitter.numerical_columns].to_numpy(), target.to_numpy()
+    monkeypatch.setattr(search_module, "_worker_folds", [(X, y, X, y)])
+
+    result = search_module.evaluate_candidate_fold(
+        {"n_estimators": 5, "n_jobs": -1, "random_state": 23}, fold=0
+    )
+
+    assert 0 <= result["score"] <= 1
@@ -0,0 +1,248 @@
+from datetime import datetime
+from decimal import Decimal
+
+import joblib
+import numpy as np
+import pytest
+import pytest_asyncio
+from sklearn.ensemble import RandomForestClassifier
+from sqlalchemy import event, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import ml_config
+from app.databases.postgresql.models import Diagnostic, Episode
+from app.databases.postgresql.models.base import BaseModel
+from app.databases.postgresql.models.episode import episode_diagnostic
+from app.repositories.model_versions import ModelVersionRepository
+from ml_package.saluai5_ml.inference_pipeline.artifacts.loader import ArtifactsLoader
+from ml_package.saluai5_ml.training_pipeline.data_preparation.cleaner import DataCleaner
+from ml_package.saluai5_ml.training_pipeline.data_preparation.encoder import DataEncoder
+from ml_package.saluai5_ml.training_pipeline.data_preparation.splitter import (
+    DataSplitter,
+)
+from ml_package.saluai5_ml.training_pipeline.model_training.trainer import ModelTrainer
+from ml_package.saluai5_ml.training_pipeline.orchestrator import TrainingOrchestrator
+from ml_package.saluai5_ml.training_pipeline.versioner import ModelVersioner
+
+CODES = {"I21": 1, "J18": 2, "K35": 3}
+
+
+@pytest.fixture
+def artifacts_dir(tmp_path, monkeypatch):
+    """Repositorios de modelos y encoders en un directorio temporal."""
+    for category in ("categorical", "multilabel", "numerical", "imputation"):
+        (tmp_path / "encoders_repository" / "dev" / category).mkdir(parents=True)
+    (tmp_path / "models_repository" / "dev").mkdir(parents=True)
+    for cls in (DataCleaner, DataEncoder, ModelTrainer, ArtifactsLoader):
+        monkeypatch.setattr(cls, "get_base_directory_package", lambda self: tmp_path)
+    monkeypatch.setattr(ml_config, "training_snapshot_enabled", False)
+    monkeypatch.setattr(ml_config, "training_snapshot_overlap_seconds", 0)
+    monkeypatch.setattr(ml_config, "training_incremental_trees", 10)
+    monkeypatch.setattr(ml_config, "training_tree_budget", 35)
+    monkeypatch.setattr(ml_config, "training_incremental_min_rows", 20)
+    return tmp_path
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'training.db'}")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def add_split_part(dbapi_connection, _):
+        # Postgres ordena las versiones con split_part
+        dbapi_connection.create_function(
+            "split_part", 3, lambda text, sep, i: text.split(sep)[i - 1]
+        )
+
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with factory() as session:
+        session.add_all([Diagnostic(id=i, cie_code=code) for code, i in CODES.items()])
+        await session.commit()
+    yield factory
+    await engine.dispose()
+
+
+async def add_episodes(session, ids, created_at, codes=("I21", "J18")):
+    rng = np.random.default_rng(ids[0])
+    links = []
+    for i in ids:
+        presion = float(rng.uniform(80, 180))
+        session.add(
+            Episode(
+                id=i,
+                patient_id=1,
+                numero_episodio=str(i),
+                validacion="PERTINENTE" if presion > 130 else "NO PERTINENTE",
+                tipo="SIN ALERTA",
+                tipo_alerta_ugcc="SIN ALERTA",
+                tipo_cama=["BASICA", "UCI"][i % 2],
+                triage=i % 3 + 1,
+                presion_sistolica=Decimal(str(round(presion, 1))),
+                antecedentes_cardiaco=bool(i % 2),
+                created_at=created_at,
+            )
+        )
+        links.append({"episode_id": i, "diagnostic_id": CODES[codes[i % len(codes)]]})
+    await session.flush()
+    await session.execute(episode_diagnostic.insert(), links)
+    await session.commit()
+
+
+async def train(session):
+    orchestrator = TrainingOrchestrator(
+        stage="dev",
+        config={"n_estimators": 30, "max_depth": 5, "random_state": 23},
+        search=False,
+        incremental=True,
+    )
+    version = await orchestrator.run(session)
+    return orchestrator, version
+
+
+def test_grow_model_adds_trees_and_drops_the_oldest(monkeypatch):
+    monkeypatch.setattr(ModelTrainer, "model_serializer", lambda self, model: None)
+    rng = np.random.default_rng(0)
+    X, y = rng.random((80, 3)), rng.integers(0, 2, 80)
+    model = RandomForestClassifier(n_estimators=5, random_state=23).fit(X, y)
+    previous = list(model.estimators_)
+
+    model = ModelTrainer("dev").grow_model(
+        model, [X[:40], y[:40]], "dev_v2", n_trees=3, budget=6
+    )
+
+    assert len(model.estimators_) == model.n_estimators == 6
+    assert model.estimators_[:3] == previous[2:]
+    assert not model.warm_start
+    assert model.predict_proba(X).shape == (80, 2)
+
+
+@pytest.mark.asyncio
+async def test_incremental_retrain_grows_the_active_forest(
+    session_factory, artifacts_dir
+):
+    async with session_factory() as session:
+        await add_episodes(session, list(range(1, 201)), datetime(2025, 1, 1))
+        orchestrator, first = await train(session)
+        assert first.active
+        assert first.base_version is None
+        assert "incremental_descartado" in orchestrator.timings
+        # Con el formato pickle (por defecto) no se exporta el bundle
+        assert "exportacion" not in orchestrator.timings
+        assert not (artifacts_dir / "models_repository" / "dev" / "dev_v1").exists()
+        assert orchestrator.training_stats["matrix_format"] == "dense"
+        assert orchestrator.training_stats["matrix_mb"] > 0
+
+        # Solo los episodios nuevos entran al entrenamiento incremental
+        await add_episodes(session, list(range(201, 261)), datetime(2030, 1, 1))
+        orchestrator, second = await train(session)
+
+    assert second.base_version == "dev_v1"
+    assert orchestrator.baseline_metric is not None
+    assert "preparacion_incremental" in orchestrator.timings
+    assert orchestrator.splitter.data.shape[0] == 60
+    assert orchestrator.training_stats["fit_seconds"] > 0
+    assert second.hyperparameters["n_estimators"] == 35
+    model = joblib.load(artifacts_dir / "models_repository" / "dev" / "dev_v2.pkl")
+    assert len(model.estimators_) == 35
+    # Los encoders de la version previa se reutilizan tal cual
+    for category in ("multilabel", "imputation"):
+        path = artifacts_dir / "encoders_repository" / "dev" / category
+        assert (path / "dev_v2.pkl").read_bytes() == (path / "dev_v1.pkl").read_bytes()
+
+
+@pytest.mark.asyncio
+async def test_rescoring_between_runs_keeps_the_dataset_unchanged(
+    session_factory, artifacts_dir
+):
+    async with session_factory() as session:
+        await add_episodes(session, list(range(1, 201)), datetime(2025, 1, 1))
+        _, first = await train(session)
+        # Re-score tras la promoción: aunque la escritura mueva updated_at, las
+        # filas que ve el modelo no cambian
+        await session.execute(
+            update(Episode).values(
+                recomendacion_modelo="PERTINENTE", updated_at=datetime(2031, 1, 1)
+            )
+        )
+        await session.commit()
+        orchestrator, second = await train(session)
+
+    assert orchestrator.noop
+    assert second.version == first.version
+
+
+@pytest.mark.asyncio
+async def test_edited_episodes_stay_out_of_the_incremental_test_set(
+    session_factory, artifacts_dir, monkeypatch
+):
+    splits = []
+    build = DataSplitter.build_train_test_data
+
+    def spy(self, df, known_max_id=None):
+        X_train, X_test, y_train, y_test = build(self, df, known_max_id)
+        splits.append((df.loc[X_train.index], df.loc[X_test.index]))
+        return X_train, X_test, y_train, y_test
+
+    monkeypatch.setattr(DataSplitter, "build_train_test_data", spy)
+    async with session_factory() as session:
+        await add_episodes(session, list(range(1, 201)), datetime(2025, 1, 1))
+        _, first = await train(session)
+        # Episodios que dev_v1 ya vio, editados después de entrenarlo
+        await session.execute(
+            update(Episode)
+            .where(Episode.id <= 30)
+            .values(triage=2, features_updated_at=datetime(2030, 1, 1))
+        )
+        await session.commit()
+        await add_episodes(session, list(range(201, 261)), datetime(2030, 1, 1))
+        _, second = await train(session)
+
+    assert first.data_max_episode_id == 200
+    assert second.base_version == "dev_v1"
+    assert second.data_max_episode_id == 260
+    train_rows, test_rows = splits[-1]
+    assert (test_rows["id_episodio"] > 200).all()
+    assert (train_rows["id_episodio"] <= 30).sum() == 30
+
+
+@pytest.mark.asyncio
+async def test_new_cie_codes_force_a_full_refit(session_factory, artifacts_dir):
+    async with session_factory() as session:
+        await add_episodes(session, list(range(1, 201)), datetime(2025, 1, 1))
+        await train(session)
+        await add_episodes(
+            session, list(range(201, 261)), datetime(2030, 1, 1), codes=("K35",)
+        )
+        orchestrator, version = await train(session)
+        versions = await ModelVersionRepository.list_by_stage(session, "dev")
+
+    assert version.base_version is None
+    assert "incremental_descartado" in orchestrator.timings
+    assert orchestrator.splitter.data.shape[0] == 260
+    assert len(versions) == 2
+    mlb = joblib.load(
+        artifacts_dir / "encoders_repository" / "dev" / "multilabel" / "dev_v2.pkl"
+    )
+    assert "K35" in mlb.classes_
+
+
+@pytest.mark.asyncio
+async def test_incremental_promotion_compares_on_the_same_test_set(session_factory):
+    versioner = ModelVersioner("dev")
+    metric = {"metric": "f1_score", "value": 0.8}
+    async with session_factory() as session:
+        # 0.95 se midió en el conjunto de prueba de otro entrenamiento
+        await versioner.save_model_metrics(
+            session, {"metric": "f1_score", "value": 0.95}, "dev_v1"
+        )
+        kept = await versioner.save_model_metrics(
+            session, metric, "dev_v2", base_version="dev_v1", baseline_metric=0.85
+        )
+        promoted = await versioner.save_model_metrics(
+            session, metric, "dev_v3", base_version="dev_v1", baseline_metric=0.75
+        )
+
+    assert not kept.active
+    assert promoted.active
@@ -0,0 +1,415 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.databases.postgresql.models import Episode
+from app.databases.postgresql.models.base import BaseModel
+from app.repositories.episode import EpisodeRepository
+from app.services.ml_model_services import inference_service
+from app.services.ml_model_services.inference_service import InferenceService
+from app.services.ml_model_services.micro_batcher import InferenceMicroBatcher
+from app.services.ml_model_services.single_flight import SingleFlight
+from ml_package.saluai5_ml.inference_pipeline import executor as executor_module
+from ml_package.saluai5_ml.inference_pipeline.data_preparation.codec import FeatureCodec
+from ml_package.saluai5_ml.inference_pipeline.executor import InferenceExecutor
+
+BASE = "/ml-model/inference"
+
+
+def fake_result(label="PERTINENTE", prob=0.82):
+    return {
+        "prediction": 1 if label == "PERTINENTE" else 0,
+        "probability": prob,
+        "label": label,
+    }
+
+
+@pytest.fixture
+def doctor(auth_user_manager_safe):
+    return auth_user_manager_safe(SimpleNamespace(id=1), is_doctor=True)
+
+
+@pytest.mark.asyncio
+async def test_batch_requires_exactly_one_source(async_client: AsyncClient, doctor):
+    r = await async_client.post(f"{BASE}/batch", json={"stage": "prod"})
+    assert r.status_code == 422
+
+    r = await async_client.post(
+        f"{BASE}/batch",
+        json={"episode_ids": [1], "episodes": [{"tipo": "SIN ALERTA"}]},
+    )
+    assert r.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_batch_with_payloads_scores_in_one_call(
+    async_client: AsyncClient, doctor
+):
+    predict = AsyncMock(return_value=[fake_result(), fake_result("NO PERTINENTE", 0.6)])
+    with patch.object(InferenceService, "predict_episodes_pertinence", predict):
+        r = await async_client.post(
+            f"{BASE}/batch",
+            json={
+                "episodes": [
+                    {"id_episodio": 10, "tipo": "SIN ALERTA"},
+                    {"id_episodio": 11, "triage": 2},
+                ]
+            },
+        )
+
+    assert r.status_code == 200, r.text
+    predict.assert_awaited_once()
+    assert len(predict.call_args.kwargs["episodes_data"]) == 2
+    data = r.json()
+    assert [item["id_episodio"] for item in data["results"]] == [10, 11]
+    assert data["results"][1]["label"] == "NO PERTINENTE"
+    assert data["updated_episodes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_batch_with_ids_writes_back_in_bulk(async_client: AsyncClient, doctor):
+    features = {1: {"tipo": "SIN ALERTA"}, 3: {"tipo": "SIN ALERTA"}}
+    bulk_update = AsyncMock(return_value=2)
+    with (
+        patch.object(
+            InferenceService,
+            "get_episodes_features",
+            AsyncMock(return_value=features),
+        ),
+        patch.object(
+            InferenceService,
+            "predict_episodes_pertinence",
+            AsyncMock(return_value=[fake_result(), fake_result("NO PERTINENTE")]),
+        ),
+        patch.object(
+            EpisodeRepository, "bulk_update_model_recommendations", bulk_update
+        ),
+    ):
+        r = await async_client.post(
+            f"{BASE}/batch",
+            json={"episode_ids": [1, 2, 3], "update_episodes": True},
+        )
+
+    assert r.status_code == 200, r.text
+    data = r.json()
+    assert data["not_found_episode_ids"] == [2]
+    assert data["updated_episodes"] == 2
+    bulk_update.assert_awaited_once()
+    assert bulk_update.call_args.args[1] == {1: "PERTINENTE", 3: "NO PERTINENTE"}
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_scores_concurrent_requests_together():
+    calls = []
+
+    async def score_batch(stage, episodes_data):
+        calls.append((stage, len(episodes_data)))
+        return [{"label": episode["tipo"]} for episode in episodes_data]
+
+    batcher = InferenceMicroBatcher(score_batch, window_ms=50, max_batch_size=32)
+    results = await asyncio.gather(
+        *[batcher.submit("prod", {"tipo": f"T{i}"}) for i in range(5)]
+    )
+
+    assert calls == [("prod", 5)]
+    assert [r["label"] for r in results] == [f"T{i}" for i in range(5)]
+    stats = batcher.stats()
+    assert stats["batches"] == 1
+    assert stats["avg_batch_size"] == 5
+    assert stats["max_queue_wait_ms"] >= 0
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_splits_on_max_size_and_propagates_errors():
+    async def score_batch(stage, episodes_data):
+        if any(episode.get("fail") for episode in episodes_data):
+            raise ValueError("boom")
+        return [{} for _ in episodes_data]
+
+    batcher = InferenceMicroBatcher(score_batch, window_ms=50, max_batch_size=2)
+    await asyncio.gather(*[batcher.submit("prod", {}) for _ in range(3)])
+    assert batcher.stats()["batches"] == 2
+
+    with pytest.raises(ValueError):
+        await batcher.submit("prod", {"fail": True})
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_fails_only_the_bad_payload_of_a_batch():
+    calls = []
+
+    async def score_batch(stage, episodes_data):
+        calls.append(len(episodes_data))
+        if any(episode.get("fail") for episode in episodes_data):
+            raise ValueError("boom")
+        return [{"label": episode["tipo"]} for episode in episodes_data]
+
+    batcher = InferenceMicroBatcher(score_batch, window_ms=50, max_batch_size=32)
+    payloads = [{"tipo": f"T{i}", "fail": i == 2} for i in range(5)]
+    results = await asyncio.gather(
+        *[batcher.submit("prod", payload) for payload in payloads],
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[2], ValueError)
+    assert [r["label"] for i, r in enumerate(results) if i != 2] == [
+        "T0",
+        "T1",
+        "T3",
+        "T4",
+    ]
+    assert calls[0] == 5
+    assert batcher.stats()["batches"] == 1
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_micro_batcher_does_not_bisect_a_global_failure():
+    calls = []
+
+    async def score_batch(stage, episodes_data):
+        calls.append(len(episodes_data))
+        raise FileNotFoundError("sin artefactos")
+
+    batcher = InferenceMicroBatcher(score_batch, window_ms=50, max_batch_size=32)
+    results = await asyncio.gather(
+        *[batcher.submit("prod", {"tipo": f"T{i}"}) for i in range(8)],
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(r, FileNotFoundError) for r in results)
+    # El batch completo y sus dos mitades, no 2N-1 llamadas
+    assert calls == [8, 4, 4]
+    await batcher.close()
+
+
+@pytest.mark.asyncio
+async def test_inference_stats_requires_admin(
+    async_client: AsyncClient, auth_user_manager_safe
+):
+    auth_user_manager_safe(SimpleNamespace(id=1), is_doctor=True)
+    r = await async_client.get(f"{BASE}/stats")
+    assert r.status_code == 403
+
+    auth_user_manager_safe(SimpleNamespace(id=2), is_admin=True)
+    r = await async_client.get(f"{BASE}/stats")
+    assert r.status_code == 200
+    assert "batches" in r.json()["micro_batching"]
+
+
+@pytest.mark.parametrize("backend", ["inline", "thread"])
+@pytest.mark.asyncio
+async def test_executor_runs_cpu_stages_in_configured_backend(monkeypatch, backend):
+    threads = []
+
+    def score_episodes(version, episodes_data, statistics):
+        threads.append(threading.get_ident())
+        return [{"version": version} for _ in episodes_data]
+
+    monkeypatch.setattr(executor_module, "score_episodes", score_episodes)
+    monkeypatch.setattr(executor_module.artifacts_cache, "get", AsyncMock())
+
+    executor = InferenceExecutor(backend=backend, max_workers=1)
+    results = await executor.score("prod_v1", [{}, {}])
+    executor.shutdown()
+
+    assert results == [{"version": "prod_v1"}, {"version": "prod_v1"}]
+    on_event_loop = threads == [threading.get_ident()]
+    assert on_event_loop == (backend == "inline")
+
+
+def episode_record():
+    """Episodio completo para los artefactos versionados de prod_v1."""
+    record = {col: 100.0 for col in FeatureCodec.numerical_columns}
+    record.update({col: False for col in FeatureCodec.binary_columns})
+    record.update(
+        tipo="SIN ALERTA",
+        tipo_alerta_ugcc="SIN ALERTA",
+        tipo_cama="UCI",
+        triage="2",
+        diagnostics=["I21"],
+    )
+    return record
+
+
+@pytest.mark.asyncio
+async def test_process_backend_scores_in_spawned_workers():
+    statistics = {
+        "binary": {},
+        "numerical": {},
+        "categorical": {
+            "tipo": "SIN ALERTA",
+            "tipo_alerta_ugcc": "SIN ALERTA",
+            "tipo_cama": "UCI",
+            "triage": "2",
+        },
+    }
+    expected = executor_module.score_episodes("prod_v1", [episode_record()], statistics)
+    executor = InferenceExecutor(backend="process", max_workers=1)
+    try:
+        results = await executor.score("prod_v1", [episode_record()], statistics)
+        executor_module.artifacts_cache.invalidate("prod_v1")
+        results += await executor.score("prod_v1", [episode_record()], statistics)
+    finally:
+        executor.shutdown()
+
+    assert results == expected * 2
+
+
+@pytest.mark.asyncio
+async def test_process_backend_sends_the_cache_generation(monkeypatch):
+    calls = []
+
+    def score_episodes(version, episodes_data, statistics, generation):
+        calls.append(generation)
+        return [{"version": version} for _ in episodes_data]
+
+    monkeypatch.setattr(executor_module, "score_episodes", score_episodes)
+    executor = InferenceExecutor(backend="process", max_workers=1)
+    # Pool de threads: el worker ve el score_episodes reemplazado
+    executor._pool = ThreadPoolExecutor(max_workers=1)
+    generation = executor_module.artifacts_cache.generation
+    await executor.score("prod_v1", [{}])
+    executor_module.artifacts_cache.invalidate("prod_v9")
+    await executor.score("prod_v1", [{}])
+    executor.shutdown()
+
+    assert calls == [generation, generation + 1]
+
+
+def test_executor_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        InferenceExecutor(backend="gpu")
+
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_identical_calls_only():
+    flight = SingleFlight()
+    calls = []
+
+    async def call(name):
+        calls.append(name)
+        await asyncio.sleep(0.01)
+        if name == "boom":
+            raise ValueError("boom")
+        return {"label": name}
+
+    results = await asyncio.gather(
+        flight.do("a", lambda: call("a")),
+        flight.do("a", lambda: call("a")),
+        flight.do("b", lambda: call("b")),
+        flight.do("boom", lambda: call("boom")),
+        flight.do("boom", lambda: call("boom")),
+        return_exceptions=True,
+    )
+
+    assert calls == ["a", "b", "boom"]
+    assert results[0] == results[1] == {"label": "a"}
+    assert results[0] is not results[1]
+    assert all(isinstance(r, ValueError) for r in results[3:])
+    assert flight.stats()["coalesced"] == 2
+    assert flight.stats()["in_flight"] == 0
+
+    await flight.do("a", lambda: call("a"))
+    assert calls[-1] == "a"
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_one_pipeline_run_and_one_update(monkeypatch):
+    @asynccontextmanager
+    async def session_local():
+        yield None
+
+    async def score_batch(stage, episodes_data):
+        await asyncio.sleep(0.01)
+        return [fake_result()]
+
+    score = AsyncMock(side_effect=score_batch)
+    update = AsyncMock(return_value=7)
+    monkeypatch.setattr(
+        inference_service, "get_async_session_local", lambda: session_local
+    )
+    monkeypatch.setattr(inference_service, "single_flight", SingleFlight())
+    monkeypatch.setattr(InferenceService, "_score_batch", score)
+    monkeypatch.setattr(EpisodeRepository, "update_model_recommendation", update)
+    user = SimpleNamespace(is_doctor=True)
+
+    results = await asyncio.gather(
+        *[
+            InferenceService.predict_and_record(
+                {"tipo": "SIN ALERTA", "triage": 3}, 7, current_user=user
+            )
+            for _ in range(3)
+        ],
+        InferenceService.predict_and_record(
+            {"tipo": "SIN ALERTA", "triage": 3}, 8, current_user=user
+        ),
+    )
+
+    assert results == [fake_result()] * 4
+    assert score.await_count == 2
+    assert [call.args[1:] for call in update.await_args_list] == [
+        (7, "PERTINENTE"),
+        (8, "PERTINENTE"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_opens_no_session_and_write_is_single_returning_update(
+    tmp_path, monkeypatch
+):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'inference.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with factory() as session:
+        session.add(Episode(id=5, patient_id=1, numero_episodio="5"))
+        await session.commit()
+
+    sessions_opened = []
+
+    def session_local():
+        sessions_opened.append(1)
+        return factory()
+
+    run_batch = AsyncMock(return_value=[fake_result()])
+    monkeypatch.setattr(
+        inference_service, "get_async_session_local", lambda: session_local
+    )
+    monkeypatch.setattr(inference_service.InferenceEngine, "run_batch", run_batch)
+    statements = []
+    monkeypatch.setattr(
+        engine.sync_engine.dialect,
+        "do_execute",
+        lambda cursor, statement, parameters, context: (
+            statements.append(statement),
+            cursor.execute(statement, parameters),
+        ),
+    )
+    user = SimpleNamespace(is_doctor=True)
+
+    result = await InferenceService.predict_and_record(
+        {"tipo": "SIN ALERTA"}, 5, current_user=user
+    )
+    missing = await InferenceService.predict_and_record(
+        {"tipo": "SIN ALERTA"}, 6, current_user=user
+    )
+
+    assert result == missing == fake_result()
+    assert run_batch.call_args.args[0] is None
+    assert len(sessions_opened) == 2
+    assert len(statements) == 2
+    assert all(s.startswith("UPDATE episodes") and "RETURNING" in s for s in statements)
+    async with factory() as session:
+        episode = await session.get(Episode, 5)
+        assert episode.recomendacion_modelo == "PERTINENTE"
+    await engine.dispose()
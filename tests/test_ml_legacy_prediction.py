@@ -0,0 +1,30 @@
+from app.schemas.prediction import PredictionRequest
+from ml_package.saluai5_ml.models.random_forest import inference
+
+
+def make_forms():
+    example = PredictionRequest.model_config["json_schema_extra"]["example"]
+    base = PredictionRequest(**example).model_dump(
+        exclude={"model_type", "id_episodio"}
+    )
+    forms = []
+    for k in range(6):
+        form = dict(base)
+        form["presion_sistolica"] = 60 + 20 * k
+        form["tipo_cama"] = ["Básica", "UCI", "UTI", None][k % 4]
+        form["pcr"] = None if k % 3 == 0 else 10 * k
+        forms.append(form)
+    return forms
+
+
+def test_batch_matches_single_predictions_and_loads_once():
+    inference.reload_artifacts()
+    single = [inference.make_prediction(dict(form)) for form in make_forms()]
+    batch = inference.make_predictions([dict(form) for form in make_forms()])
+
+    assert batch == single
+    assert inference.load_encoders.cache_info().misses == 1
+    assert inference.get_representative_values_colums.cache_info().misses == 1
+
+    inference.reload_artifacts()
+    assert inference.load_model.cache_info().currsize == 0
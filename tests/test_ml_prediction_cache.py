@@ -0,0 +1,90 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from ml_package.saluai5_ml.inference_pipeline import inference_engine
+from ml_package.saluai5_ml.inference_pipeline.inference_engine import InferenceEngine
+from ml_package.saluai5_ml.inference_pipeline.prediction_cache import PredictionCache
+
+PAYLOAD = {"prediction": 1, "label": "PERTINENTE", "probability": 0.82}
+
+
+def test_key_is_canonical():
+    key = PredictionCache.make_key({"tipo": "SIN ALERTA", "diagnostics": ["B", "A"]})
+    same = PredictionCache.make_key({"diagnostics": ["A", "B"], "tipo": "SIN ALERTA"})
+    other = PredictionCache.make_key({"tipo": "SIN ALERTA", "diagnostics": ["A"]})
+    assert key == same
+    assert key != other
+
+
+def test_ttl_lru_and_stage_invalidation(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(
+        "ml_package.saluai5_ml.inference_pipeline.prediction_cache.time.monotonic",
+        lambda: now[0],
+    )
+    cache = PredictionCache(max_entries=2, ttl_seconds=60)
+
+    cache.put("prod_v1", "a", PAYLOAD)
+    cache.put("prod_v1", "b", PAYLOAD)
+    assert cache.get("prod_v1", "a") == PAYLOAD
+    cache.put("prod_v2", "c", PAYLOAD)
+    assert cache.get("prod_v1", "b") is None
+
+    now[0] = 61
+    assert cache.get("prod_v1", "a") is None
+
+    cache.put("prod_v2", "d", PAYLOAD)
+    cache.invalidate_stage("prod", keep="prod_v2")
+    assert cache.get("prod_v2", "d") == PAYLOAD
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_engine_scores_only_cache_misses(monkeypatch):
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    score = AsyncMock(side_effect=lambda version, data, stats: [PAYLOAD] * len(data))
+    monkeypatch.setattr(inference_engine, "prediction_cache", cache)
+    monkeypatch.setattr(inference_engine.inference_executor, "score", score)
+    monkeypatch.setattr(
+        inference_engine.ArtifactsLoader, "has_imputation_statistics", lambda _: True
+    )
+    engine = InferenceEngine(stage="prod")
+    engine.get_active_version = AsyncMock(return_value="prod_v1")
+
+    first = await engine.run_batch(None, [{"tipo": "A"}, {"tipo": "B"}])
+    second = await engine.run_batch(None, [{"tipo": "B"}, {"tipo": "C"}])
+
+    assert first == second == [PAYLOAD, PAYLOAD]
+    assert [call.args[1] for call in score.await_args_list] == [
+        [{"tipo": "A"}, {"tipo": "B"}],
+        [{"tipo": "C"}],
+    ]
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_reused_version_label_does_not_hit_old_predictions(monkeypatch):
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    score = AsyncMock(side_effect=lambda version, data, stats: [PAYLOAD] * len(data))
+    monkeypatch.setattr(inference_engine, "prediction_cache", cache)
+    monkeypatch.setattr(inference_engine.inference_executor, "score", score)
+    monkeypatch.setattr(
+        inference_engine.ArtifactsLoader, "has_imputation_statistics", lambda _: True
+    )
+    version_ids = iter([1, 1, 4])
+    monkeypatch.setattr(
+        inference_engine.active_model_registry,
+        "get_active_version_id",
+        lambda stage: next(version_ids),
+    )
+    engine = InferenceEngine(stage="prod")
+    engine.get_active_version = AsyncMock(return_value="prod_v1")
+
+    # La tercera "prod_v1" es otra fila (el stage se borró y se reentrenó)
+    for _ in range(3):
+        await engine.run_batch(None, [{"tipo": "A"}])
+
+    assert score.await_count == 2
+    assert cache.stats()["hits"] == 1
@@ -0,0 +1,180 @@
+import tracemalloc
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import ml_config
+from ml_package.saluai5_ml import profiling
+from ml_package.saluai5_ml.inference_pipeline import executor as executor_module
+from ml_package.saluai5_ml.inference_pipeline import inference_engine
+from ml_package.saluai5_ml.inference_pipeline.executor import InferenceExecutor
+from ml_package.saluai5_ml.inference_pipeline.inference_engine import InferenceEngine
+from ml_package.saluai5_ml.profiling import (
+    StageProfileAggregator,
+    StageProfiler,
+    get_current_profiler,
+)
+from ml_package.saluai5_ml.training_pipeline.data_ingestion.loader import DataLoader
+from ml_package.saluai5_ml.training_pipeline.orchestrator import TrainingOrchestrator
+
+PAYLOAD = {"prediction": 1, "label": "PERTINENTE", "probability": 0.82}
+
+
+def test_profiler_records_time_and_memory_per_stage():
+    profiler = StageProfiler()
+    assert tracemalloc.is_tracing()
+
+    profiler.begin()
+    kept = [bytearray(1024) for _ in range(2048)]
+    profiler.end("carga")
+    with profiler.stage("temporal"):
+        temporary = bytearray(8 * 2**20)
+        del temporary
+    profiler.close()
+
+    assert not tracemalloc.is_tracing()
+    assert list(profiler.report) == ["carga", "temporal"]
+    for metrics in profiler.report.values():
+        assert metrics["wall_seconds"] >= 0
+        assert metrics["cpu_seconds"] >= 0
+        assert metrics["rss_peak_mb"] > 0
+    assert profiler.report["carga"]["alloc_delta_mb"] >= 2
+    assert profiler.report["temporal"]["alloc_peak_mb"] >= 8
+    assert profiler.report["temporal"]["alloc_delta_mb"] < 1
+    assert len(kept) == 2048
+
+
+def test_overlapping_stages_keep_their_peak():
+    outer = StageProfiler()
+    inner = StageProfiler()
+
+    outer.begin()
+    temporary = bytearray(8 * 2**20)
+    del temporary
+    with inner.stage("interna"):
+        pass
+    outer.end("externa")
+    inner.close()
+    outer.close()
+
+    # la etapa que empezó después no reinicia el peak de la que estaba en curso
+    assert outer.report["externa"]["alloc_peak_mb"] >= 8
+    assert not tracemalloc.is_tracing()
+
+
+def test_profiler_without_resource_skips_rss(monkeypatch):
+    monkeypatch.setattr(profiling, "resource", None)
+    profiler = StageProfiler()
+    with profiler.stage("temporal"):
+        pass
+    profiler.close()
+
+    assert profiling.get_peak_rss_mb() == 0.0
+    assert "rss_peak_mb" not in profiler.report["temporal"]
+    assert profiler.report["temporal"]["wall_seconds"] >= 0
+
+
+def test_disabled_profiler_measures_nothing():
+    profiler = StageProfiler(enabled=False)
+    profiler.begin()
+    profiler.end("carga")
+    with profiler.stage("temporal"):
+        pass
+    profiler.close()
+
+    assert profiler.report == {}
+    assert not tracemalloc.is_tracing()
+
+
+def test_aggregator_samples_and_averages():
+    never = StageProfileAggregator(sample_rate=0.0)
+    profiler = never.start()
+    never.add(profiler)
+    assert not profiler.enabled
+    assert never.stats()["samples"] == 0
+
+    always = StageProfileAggregator(sample_rate=1.0, trace_memory=False)
+    for wall in (0.1, 0.3):
+        profiler = always.start()
+        profiler.report = {"prediccion": {"wall_seconds": wall}}
+        always.add(profiler)
+
+    stats = always.stats()
+    assert stats["samples"] == 2
+    assert stats["stages"]["prediccion"] == {
+        "count": 2,
+        "wall_seconds_avg": 0.2,
+        "wall_seconds_max": 0.3,
+    }
+    always.reset()
+    assert always.stats() == {"sample_rate": 1.0, "samples": 0, "stages": {}}
+
+
+@pytest.mark.asyncio
+async def test_sampled_inference_profiles_engine_and_worker_stages(monkeypatch):
+    def score_episodes(version, episodes_data, statistics):
+        # Corre en el pool de threads con el perfilador del request
+        with get_current_profiler().stage("prediccion"):
+            return [PAYLOAD] * len(episodes_data)
+
+    aggregator = StageProfileAggregator(sample_rate=1.0)
+    monkeypatch.setattr(inference_engine, "inference_profile", aggregator)
+    monkeypatch.setattr(executor_module, "score_episodes", score_episodes)
+    monkeypatch.setattr(executor_module.artifacts_cache, "get", AsyncMock())
+    executor = InferenceExecutor(backend="thread", max_workers=1)
+    monkeypatch.setattr(inference_engine, "inference_executor", executor)
+    monkeypatch.setattr(
+        inference_engine.ArtifactsLoader, "has_imputation_statistics", lambda _: True
+    )
+    engine = InferenceEngine(stage="prod")
+    engine.get_active_version = AsyncMock(return_value="prod_v1")
+
+    results = await engine.run_batch(None, [{"tipo": "A"}], use_cache=False)
+    executor.shutdown()
+
+    assert results == [PAYLOAD]
+    stats = aggregator.stats()
+    assert stats["samples"] == 1
+    assert set(stats["stages"]) == {"version", "estadisticas", "prediccion"}
+    assert "alloc_peak_mb_max" in stats["stages"]["prediccion"]
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.asyncio
+async def test_training_profile_covers_recorded_stages(monkeypatch):
+    monkeypatch.setattr(ml_config, "training_profiling_enabled", True)
+    orchestrator = TrainingOrchestrator(stage="dev", search=False)
+    latest = SimpleNamespace(version="dev_v4", dataset_fingerprint="abc")
+    orchestrator.versioner.get_last_version = AsyncMock(return_value=latest)
+    monkeypatch.setattr(
+        DataLoader, "get_dataset_fingerprint", AsyncMock(return_value="abc")
+    )
+
+    assert await orchestrator.run(None) is latest
+    assert list(orchestrator.profiler.report) == list(orchestrator.timings)
+    assert "alloc_delta_mb" in orchestrator.profiler.report["huella"]
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.asyncio
+async def test_inference_profile_route(
+    async_client: AsyncClient, auth_user_manager_safe, monkeypatch
+):
+    aggregator = StageProfileAggregator(sample_rate=0.5)
+    aggregator.samples = 3
+    monkeypatch.setattr(profiling, "inference_profile", aggregator)
+    monkeypatch.setattr(
+        "app.api.routes.ml_model.inference.inference_profile", aggregator
+    )
+
+    auth_user_manager_safe(SimpleNamespace(id=1), is_admin=False)
+    r = await async_client.get("/ml-model/inference/profile")
+    assert r.status_code == 403
+
+    auth_user_manager_safe(SimpleNamespace(id=2), is_admin=True)
+    r = await async_client.get("/ml-model/inference/profile?reset=true")
+    assert r.status_code == 200
+    assert r.json() == {"sample_rate": 0.5, "samples": 3, "stages": {}}
+    assert aggregator.samples == 0
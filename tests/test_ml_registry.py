@@ -0,0 +1,136 @@
+from datetime import date
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.databases.postgresql.models import ModelVersion
+from app.databases.postgresql.models.base import BaseModel
+from app.repositories.model_versions import ModelVersionRepository
+from ml_package.saluai5_ml.inference_pipeline import registry as registry_module
+from ml_package.saluai5_ml.inference_pipeline.registry import ActiveModelRegistry
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'registry.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(registry_module, "get_async_session_local", lambda: factory)
+
+    async with factory() as session:
+        for number, active in ((1, False), (2, True), (3, False)):
+            session.add(
+                ModelVersion(
+                    version=f"prod_v{number}",
+                    stage="prod",
+                    metric="f1",
+                    metric_value=0.8,
+                    trained_at=date(2026, 1, number),
+                    active=active,
+                )
+            )
+        await session.commit()
+
+    yield factory
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_activate_flips_stage_with_single_update(session_factory):
+    async with session_factory() as session:
+        await ModelVersionRepository.activate(session, "prod", "prod_v3")
+        res = await session.execute(
+            select(ModelVersion.version, ModelVersion.active).order_by(
+                ModelVersion.version
+            )
+        )
+        assert res.all() == [("prod_v1", False), ("prod_v2", False), ("prod_v3", True)]
+
+
+@pytest.mark.asyncio
+async def test_registry_serves_from_memory_until_invalidated(
+    session_factory, monkeypatch
+):
+    registry = ActiveModelRegistry(poll_interval=3600)
+    assert await registry.get_active_version("prod") == "prod_v2"
+
+    queries = []
+    original = ModelVersionRepository.list_stage_versions
+
+    async def counting(db):
+        queries.append(1)
+        return await original(db)
+
+    monkeypatch.setattr(ModelVersionRepository, "list_stage_versions", counting)
+    cache_invalidations = []
+    monkeypatch.setattr(
+        registry_module.artifacts_cache,
+        "invalidate_stage",
+        lambda stage, keep=None: cache_invalidations.append((stage, keep)),
+    )
+
+    async with session_factory() as session:
+        await ModelVersionRepository.activate(session, "prod", "prod_v3")
+
+    # Sin notificación ni polling vencido sigue respondiendo desde memoria
+    assert await registry.get_active_version("prod") == "prod_v2"
+    assert queries == []
+
+    registry.invalidate()
+    assert await registry.get_active_version("prod") == "prod_v3"
+    assert queries == [1]
+    assert cache_invalidations == [("prod", "prod_v3")]
+
+
+@pytest.mark.asyncio
+async def test_registry_polls_without_listen_and_reports_missing_versions(
+    session_factory,
+):
+    registry = ActiveModelRegistry(poll_interval=0)
+    with pytest.raises(ValueError, match="No existen versiones entrenadas"):
+        await registry.get_active_version("dev")
+
+    async with session_factory() as session:
+        instance = await ModelVersionRepository.get_by_version(session, "prod_v2")
+        await ModelVersionRepository.update_partial(session, instance, active=False)
+
+    with pytest.raises(ValueError, match="No existe una versión activa"):
+        await registry.get_active_version("prod")
+
+
+@pytest.mark.asyncio
+async def test_registry_drops_caches_when_a_deleted_label_is_reused(
+    session_factory, monkeypatch
+):
+    registry = ActiveModelRegistry(poll_interval=3600)
+    assert await registry.get_active_version("prod") == "prod_v2"
+
+    cache_invalidations = []
+    for cache in (registry_module.artifacts_cache, registry_module.prediction_cache):
+        monkeypatch.setattr(
+            cache,
+            "invalidate_stage",
+            lambda stage, keep=None: cache_invalidations.append((stage, keep)),
+        )
+
+    # Otro worker borra el stage y entrena de nuevo: la etiqueta se reutiliza
+    async with session_factory() as session:
+        await ModelVersionRepository.delete_by_stage(session, "prod")
+        session.add(
+            ModelVersion(
+                version="prod_v2",
+                stage="prod",
+                metric="f1",
+                metric_value=0.9,
+                trained_at=date(2026, 2, 1),
+                active=True,
+            )
+        )
+        await session.commit()
+
+    registry.invalidate()
+    assert await registry.get_active_version("prod") == "prod_v2"
+    assert cache_invalidations == [("prod", None), ("prod", None)]
@@ -0,0 +1,217 @@
+import asyncio
+from datetime import date, datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import ml_config
+from app.databases.postgresql.models import Episode, ModelVersion
+from app.databases.postgresql.models.base import BaseModel
+from app.repositories.episode import EpisodeRepository
+from app.repositories.rescoring_job import RescoringJobRepository
+from app.services.ml_model_services import rescoring_service, training_lock
+from app.services.ml_model_services.rescoring_service import (
+    RescoringJobLock,
+    RescoringService,
+)
+from app.services.ml_model_services.training_lock import TrainingLock
+from ml_package.saluai5_ml.inference_pipeline import inference_engine
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path, monkeypatch):
+    """Base SQLite propia con las tablas de los modelos y el pipeline simulado."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'rescoring.db'}")
+    async with engine.begin() as conn:
+        # WAL: el cursor de lectura no bloquea los UPDATE (como en Postgres)
+        await conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        await conn.run_sync(BaseModel.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    scored_chunks = []
+
+    async def score(version, episodes_data, statistics):
+        scored_chunks.append(len(episodes_data))
+        return [{"label": f"{version}:{e['tipo']}"} for e in episodes_data]
+
+    monkeypatch.setattr(rescoring_service, "get_async_session_local", lambda: factory)
+    monkeypatch.setattr(training_lock, "get_engine", lambda: engine)
+    monkeypatch.setattr(TrainingLock, "lock_dir", tmp_path)
+    monkeypatch.setattr(rescoring_service.inference_executor, "score", score)
+    monkeypatch.setattr(
+        inference_engine.ArtifactsLoader, "has_imputation_statistics", lambda _: True
+    )
+    monkeypatch.setattr(ml_config, "rescoring_chunk_size", 2)
+    monkeypatch.setattr(ml_config, "rescoring_pause_ms", 0)
+
+    async with factory() as session:
+        session.add(
+            ModelVersion(
+                version="prod_v2",
+                stage="prod",
+                metric="f1",
+                metric_value=0.8,
+                trained_at=date(2026, 1, 1),
+                active=True,
+            )
+        )
+        for i in range(1, 7):
+            session.add(
+                Episode(
+                    id=i,
+                    patient_id=1,
+                    numero_episodio=str(i),
+                    tipo=f"T{i}",
+                    estado_del_caso="Cerrado" if i == 4 else "Abierto",
+                )
+            )
+        await session.commit()
+
+    factory.scored_chunks = scored_chunks
+    yield factory
+    await engine.dispose()
+
+
+async def recommendations(factory):
+    async with factory() as session:
+        res = await session.execute(
+            select(Episode.id, Episode.recomendacion_modelo).order_by(Episode.id)
+        )
+        return dict(res.all())
+
+
+@pytest.mark.asyncio
+async def test_rescoring_streams_open_episodes_in_chunks(session_factory):
+    async with session_factory() as session:
+        job = await RescoringJobRepository.create(
+            session, stage="prod", version="prod_v2", total_episodes=5
+        )
+
+    await RescoringService.run_job(job.id)
+
+    assert session_factory.scored_chunks == [2, 2, 1]
+    recs = await recommendations(session_factory)
+    assert recs[4] is None
+    assert recs[6] == "prod_v2:T6"
+    async with session_factory() as session:
+        job = await RescoringJobRepository.get_by_id(session, job.id)
+    assert job.status == "succeeded"
+    assert (job.processed_episodes, job.updated_episodes) == (5, 5)
+    assert job.last_episode_id == 6
+
+
+@pytest.mark.asyncio
+async def test_rescoring_keeps_episode_updated_at(session_factory):
+    edited = datetime(2025, 1, 1)
+    async with session_factory() as session:
+        await session.execute(update(Episode).values(updated_at=edited))
+        await session.commit()
+        job = await RescoringJobRepository.create(
+            session, stage="prod", version="prod_v2", total_episodes=5
+        )
+
+    await RescoringService.run_job(job.id)
+    async with session_factory() as session:
+        await EpisodeRepository.update_model_recommendation(session, 4, "prod_v2:T4")
+
+    recs = await recommendations(session_factory)
+    assert recs[6] == "prod_v2:T6"
+    assert recs[4] == "prod_v2:T4"
+    async with session_factory() as session:
+        res = await session.execute(select(Episode.updated_at))
+        # El entrenamiento y el snapshot no ven la recomendación como un cambio
+        assert {u.replace(tzinfo=None) for u in res.scalars()} == {edited}
+
+
+@pytest.mark.asyncio
+async def test_rescoring_resumes_after_last_episode(session_factory):
+    async with session_factory() as session:
+        job = await RescoringJobRepository.create(
+            session, stage="prod", version="prod_v2", total_episodes=5
+        )
+        await RescoringJobRepository.update_partial(
+            session, job, status="running", processed_episodes=3, last_episode_id=3
+        )
+
+    await RescoringService.run_job(job.id)
+
+    recs = await recommendations(session_factory)
+    assert [recs[i] for i in (1, 2, 3)] == [None, None, None]
+    assert recs[5] == "prod_v2:T5"
+    async with session_factory() as session:
+        job = await RescoringJobRepository.get_by_id(session, job.id)
+    assert job.processed_episodes == 5
+
+
+@pytest.mark.asyncio
+async def test_rescoring_stops_when_version_is_superseded(session_factory):
+    async with session_factory() as session:
+        job = await RescoringJobRepository.create(
+            session, stage="prod", version="prod_v1", total_episodes=5
+        )
+
+    await RescoringService.run_job(job.id)
+
+    assert session_factory.scored_chunks == []
+    async with session_factory() as session:
+        job = await RescoringJobRepository.get_by_id(session, job.id)
+    assert job.status == "superseded"
+
+
+@pytest.mark.asyncio
+async def test_startup_recovers_jobs_interrupted_by_a_restart(session_factory):
+    async with session_factory() as session:
+        stale = await RescoringJobRepository.create(
+            session, stage="prod", version="prod_v1", total_episodes=5
+        )
+        interrupted = await RescoringJobRepository.create(
+            session, stage="prod", version="prod_v2", total_episodes=5
+        )
+        await RescoringJobRepository.update_partial(
+            session, interrupted, status="running", last_episode_id=3
+        )
+
+    await RescoringService.recover_interrupted()
+    await asyncio.gather(
+        *(RescoringService._tasks.pop(job.id) for job in (stale, interrupted))
+    )
+
+    assert session_factory.scored_chunks == [2]
+    async with session_factory() as session:
+        stale = await RescoringJobRepository.get_by_id(session, stale.id)
+        interrupted = await RescoringJobRepository.get_by_id(session, interrupted.id)
+    assert stale.status == "superseded"
+    assert interrupted.status == "succeeded"
+    assert interrupted.last_episode_id == 6
+
+
+@pytest.mark.asyncio
+async def test_job_running_in_another_process_is_not_run_twice(session_factory):
+    async with session_factory() as session:
+        job = await RescoringJobRepository.create(
+            session, stage="prod", version="prod_v2", total_episodes=5
+        )
+    held = RescoringJobLock("prod", job.id)
+    assert await held.acquire()
+
+    await RescoringService.run_job(job.id)
+    await held.release()
+
+    assert session_factory.scored_chunks == []
+    async with session_factory() as session:
+        job = await RescoringJobRepository.get_by_id(session, job.id)
+    assert job.status == "queued"
+
+
+@pytest.mark.asyncio
+async def test_start_lock_is_created_on_the_running_loop():
+    async def get_lock():
+        return RescoringService.get_start_lock()
+
+    lock = RescoringService.get_start_lock()
+    assert RescoringService.get_start_lock() is lock
+    # Otro event loop (otro thread) obtiene su propio lock
+    other = await asyncio.to_thread(asyncio.run, get_lock())
+    assert other is not lock
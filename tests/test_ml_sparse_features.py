@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from ml_package.saluai5_ml.inference_pipeline.data_preparation.codec import FeatureCodec
+from ml_package.saluai5_ml.training_pipeline.data_preparation.encoder import DataEncoder
+from ml_package.saluai5_ml.training_pipeline.data_preparation.splitter import (
+    DataSplitter,
+)
+from ml_package.saluai5_ml.training_pipeline.model_training.trainer import ModelTrainer
+
+
+def make_training_data(n=200, n_codes=400, seed=0):
+    """Features con el formato del splitter y un vocabulario CIE amplio."""
+    rng = np.random.default_rng(seed)
+    codes = [f"C{i:03d}" for i in range(n_codes)]
+    data = {col: rng.random(n) * 100 for col in DataSplitter.numerical_columns}
+    data.update({col: rng.integers(0, 2, n) for col in DataSplitter.binary_columns})
+    data.update(
+        {
+            col: rng.choice(["A", "B", "C"], n)
+            for col in DataSplitter.categorical_columns
+        }
+    )
+    data["diagnostics"] = [list(rng.choice(codes, 2, replace=False)) for _ in range(n)]
+    target = np.where(
+        data["presion_sistolica"] + 50 * data["dva"] > 70,
+        "PERTINENTE",
+        "NO PERTINENTE",
+    )
+    return pd.DataFrame(data), pd.Series(target)
+
+
+def encode(features, sparse):
+    train, test = features.iloc[:150], features.iloc[150:]
+    encoder = DataEncoder(persist=False, sparse=sparse)
+    X_train, X_test = encoder.encode([train.copy(), test.copy()], version=None)
+    return encoder, X_train, X_test
+
+
+def test_sparse_encoding_matches_dense_and_uses_less_memory():
+    features, _ = make_training_data()
+    dense, X_dense, X_dense_test = encode(features, sparse=False)
+    sparse, X_sparse, X_sparse_test = encode(features, sparse=True)
+
+    assert sp.isspmatrix_csr(X_sparse) and X_sparse.dtype == np.float32
+    assert sparse.feature_names == dense.feature_names == list(X_dense.columns)
+    assert np.array_equal(X_sparse.toarray(), X_dense.to_numpy(dtype=np.float32))
+    assert np.array_equal(
+        X_sparse_test.toarray(), X_dense_test.to_numpy(dtype=np.float32)
+    )
+    assert sparse.matrix_bytes * 5 < dense.matrix_bytes
+
+    # Los encoders quedan con la configuración densa de siempre
+    categorical_encoder, mlb_encoder, _ = sparse.fitted_encoders
+    assert categorical_encoder.sparse_output is False
+    assert mlb_encoder.sparse_output is False
+
+
+def test_model_trained_on_csr_scores_like_the_dense_one(monkeypatch):
+    monkeypatch.setattr(ModelTrainer, "model_serializer", lambda self, model: None)
+    features, target = make_training_data()
+    config = {"n_estimators": 15, "max_depth": 6, "random_state": 23}
+    y_train = target.iloc[:150]
+
+    dense, X_dense, X_dense_test = encode(features, sparse=False)
+    dense_model = ModelTrainer("dev", config).train_model([X_dense, y_train], "dev_v1")
+    sparse, X_sparse, X_sparse_test = encode(features, sparse=True)
+    trainer = ModelTrainer("dev", config)
+    sparse_model = trainer.train_model(
+        [X_sparse, y_train], "dev_v1", feature_names=sparse.feature_names
+    )
+
+    assert trainer.fit_seconds > 0
+    assert list(sparse_model.feature_names_in_) == list(dense_model.feature_names_in_)
+    assert np.array_equal(
+        sparse_model.predict_proba(X_sparse_test),
+        dense_model.predict_proba(X_dense_test),
+    )
+
+    # El codec de inferencia arma la misma matriz, densa o CSR
+    codec = FeatureCodec(sparse_model, sparse.fitted_encoders)
+    data = features.iloc[150:].reset_index(drop=True)
+    data.at[0, "diagnostics"] = ["ZZZ"]
+    encoded = codec.encode(data)
+    encoded_sparse = codec.encode_sparse(data)
+    assert sp.isspmatrix_csr(encoded_sparse)
+    assert np.array_equal(encoded_sparse.toarray(), encoded)
+    assert np.array_equal(
+        sparse_model.predict_proba(encoded_sparse),
+        sparse_model.predict_proba(encoded),
+    )
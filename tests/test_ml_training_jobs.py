@@ -0,0 +1,342 @@
+import asyncio
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import ml_config, settings
+from app.databases.postgresql.models.base import BaseModel
+from app.repositories.training_job import TrainingJobRepository
+from app.services.ml_model_services import training_lock, training_service
+from app.services.ml_model_services.training_lock import (
+    TrainingInProgressError,
+    TrainingLock,
+)
+from app.services.ml_model_services.training_service import TrainingService
+from ml_package.saluai5_ml.profiling import StageProfiler
+from ml_package.saluai5_ml.training_pipeline.data_ingestion.loader import DataLoader
+from ml_package.saluai5_ml.training_pipeline.orchestrator import TrainingOrchestrator
+
+BASE = "/ml-model/training"
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path, monkeypatch):
+    """Base SQLite propia y un pool de threads en lugar del pool de procesos."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'training.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(training_service, "get_async_session_local", lambda: factory)
+    monkeypatch.setattr(training_service, "get_engine", lambda: engine)
+    monkeypatch.setattr(ml_config, "rescoring_on_activation", False)
+    monkeypatch.setattr(TrainingService, "_pool", ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(training_lock, "get_engine", lambda: engine)
+    monkeypatch.setattr(TrainingLock, "lock_dir", tmp_path)
+    yield engine
+    TrainingService.shutdown()
+    await engine.dispose()
+
+
+async def get_job(engine, job_id):
+    async with async_sessionmaker(engine)() as session:
+        return await TrainingJobRepository.get_by_id(session, job_id)
+
+
+@pytest.mark.asyncio
+async def test_job_trains_off_the_event_loop_and_records_the_result(
+    engine, monkeypatch
+):
+    def fake_worker(job_id, force):
+        time.sleep(0.3)
+        return {
+            "version": "dev_v2",
+            "active": False,
+            "noop": False,
+            "stage_timings": {"ingesta": 0.3},
+            "profile": {"ingesta": {"wall_seconds": 0.3, "cpu_seconds": 0.01}},
+            "training_stats": {"matrix_format": "csr", "fit_seconds": 0.2},
+        }
+
+    monkeypatch.setattr(training_service, "run_training_job", fake_worker)
+
+    job = await TrainingService.start("dev")
+    assert job.status == "queued"
+
+    ticks = 0
+    task = TrainingService._tasks[job.id]
+    while not task.done():
+        await asyncio.sleep(0.01)
+        ticks += 1
+
+    assert ticks > 10
+    job = await get_job(engine, job.id)
+    assert job.status == "succeeded"
+    assert job.version == "dev_v2"
+    assert job.stage_timings == {"ingesta": 0.3}
+    assert job.profile["ingesta"]["cpu_seconds"] == 0.01
+    assert job.training_stats == {"matrix_format": "csr", "fit_seconds": 0.2}
+    assert job.finished_at is not None
+
+
+@pytest.mark.asyncio
+async def test_failed_job_keeps_the_error(engine, monkeypatch):
+    def fake_worker(job_id, force):
+        raise ValueError("sin episodios validados")
+
+    monkeypatch.setattr(training_service, "run_training_job", fake_worker)
+
+    job = await TrainingService.start("dev")
+    await TrainingService._tasks[job.id]
+
+    job = await get_job(engine, job.id)
+    assert job.status == "failed"
+    assert job.error == "sin episodios validados"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_triggers_join_the_running_job(engine, monkeypatch):
+    calls = []
+
+    def fake_worker(job_id, force):
+        calls.append(job_id)
+        time.sleep(0.2)
+        return {
+            "version": "dev_v2",
+            "active": False,
+            "noop": False,
+            "stage_timings": {},
+        }
+
+    monkeypatch.setattr(training_service, "run_training_job", fake_worker)
+
+    jobs = await asyncio.gather(*(TrainingService.start("dev") for _ in range(3)))
+    assert len({job.id for job in jobs}) == 1
+    await TrainingService._tasks[jobs[0].id]
+    assert calls == [jobs[0].id]
+
+    # Sin lock tomado (job terminado) el siguiente trigger crea otro job
+    next_job = await TrainingService.start("dev")
+    await TrainingService._tasks[next_job.id]
+    assert next_job.id != jobs[0].id
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_unfinished_job_without_lock_holder_is_failed(engine, monkeypatch):
+    monkeypatch.setattr(
+        training_service,
+        "run_training_job",
+        lambda job_id, force: {
+            "version": "dev_v2",
+            "active": False,
+            "noop": False,
+            "stage_timings": {},
+        },
+    )
+    async with async_sessionmaker(engine)() as session:
+        stale = await TrainingJobRepository.create(session, stage="dev")
+        await TrainingJobRepository.update_partial(session, stale, status="running")
+
+    job = await TrainingService.start("dev")
+    await TrainingService._tasks[job.id]
+
+    stale = await get_job(engine, stale.id)
+    assert stale.status == "failed"
+    assert stale.error.startswith("Interrumpido")
+    assert (await get_job(engine, job.id)).status == "succeeded"
+
+
+@pytest.mark.asyncio
+async def test_lock_is_exclusive_per_stage(engine):
+    held, other_stage, again = (
+        TrainingLock("dev"),
+        TrainingLock("prod"),
+        TrainingLock("dev"),
+    )
+    assert await held.acquire()
+    assert not await TrainingLock("dev").acquire()
+    assert await other_stage.acquire()
+
+    with pytest.raises(TrainingInProgressError):
+        await TrainingService("dev").run_training()
+    with pytest.raises(TrainingInProgressError):
+        await TrainingService.join_running_job("dev", attempts=1)
+
+    await held.release()
+    assert await again.acquire()
+    await again.release()
+    await other_stage.release()
+
+
+@pytest.mark.asyncio
+async def test_unchanged_dataset_skips_the_job(engine, monkeypatch):
+    forced = []
+
+    def fake_worker(job_id, force):
+        forced.append(force)
+        return {
+            "version": "dev_v4",
+            "active": True,
+            "noop": not force,
+            "stage_timings": {"huella": 0.01},
+        }
+
+    monkeypatch.setattr(training_service, "run_training_job", fake_worker)
+
+    job = await TrainingService.start("dev")
+    await TrainingService._tasks[job.id]
+    forced_job = await TrainingService.start("dev", force=True)
+    await TrainingService._tasks[forced_job.id]
+
+    assert forced == [False, True]
+    job = await get_job(engine, job.id)
+    assert job.status == "skipped"
+    assert job.version == "dev_v4"
+    assert (await get_job(engine, forced_job.id)).status == "succeeded"
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_short_circuits_on_same_fingerprint(monkeypatch):
+    orchestrator = TrainingOrchestrator(stage="dev", search=False)
+    latest = SimpleNamespace(version="dev_v4", dataset_fingerprint="abc")
+    orchestrator.versioner.get_last_version = AsyncMock(return_value=latest)
+    orchestrator.versioner.generate_new_version_label = AsyncMock()
+    monkeypatch.setattr(
+        DataLoader, "get_dataset_fingerprint", AsyncMock(return_value="abc")
+    )
+
+    assert await orchestrator.run(None) is latest
+    assert orchestrator.noop
+    orchestrator.versioner.generate_new_version_label.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_worker_marks_running_and_reports_stage_timings(engine, monkeypatch):
+    seen = []
+
+    class FakeOrchestrator:
+        def __init__(self, stage, force):
+            self.timings = {}
+            self.noop = False
+            self.profiler = StageProfiler(enabled=False)
+            self.training_stats = {}
+
+        async def run(self, session, on_stage=None):
+            for name in ("ingesta", "entrenamiento"):
+                self.timings[name] = 0.1
+                await on_stage(dict(self.timings))
+                job = await get_job(engine, job_id)
+                seen.append((job.status, job.stage_timings))
+            return SimpleNamespace(version="dev_v1", active=True)
+
+    monkeypatch.setattr(training_service, "TrainingOrchestrator", FakeOrchestrator)
+    async with async_sessionmaker(engine)() as session:
+        job_id = (await TrainingJobRepository.create(session, stage="dev")).id
+    await engine.dispose()
+
+    result = await asyncio.to_thread(training_service.run_training_job, job_id)
+
+    assert result == {
+        "version": "dev_v1",
+        "active": True,
+        "noop": False,
+        "stage_timings": {"ingesta": 0.1, "entrenamiento": 0.1},
+        "profile": None,
+        "training_stats": None,
+    }
+    assert seen == [
+        ("running", {"ingesta": 0.1}),
+        ("running", {"ingesta": 0.1, "entrenamiento": 0.1}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_training_job_route(
+    async_client: AsyncClient, auth_user_manager_safe, monkeypatch
+):
+    auth_user_manager_safe(SimpleNamespace(id=1), is_admin=True)
+    job = SimpleNamespace(
+        id=7,
+        stage="prod",
+        status="running",
+        version=None,
+        stage_timings={"ingesta": 1.5},
+        error=None,
+        created_at=None,
+        started_at=None,
+        finished_at=None,
+    )
+
+    async def get_by_id(db, job_id):
+        return job if job_id == 7 else None
+
+    monkeypatch.setattr(TrainingJobRepository, "get_by_id", get_by_id)
+
+    r = await async_client.get(f"{BASE}/jobs/7")
+    assert r.status_code == 200
+    assert r.json()["status"] == "running"
+    assert r.json()["stage_timings"] == {"ingesta": 1.5}
+
+    r = await async_client.get(f"{BASE}/jobs/8")
+    assert r.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_job_runs_in_a_spawned_worker_process(tmp_path, monkeypatch):
+    """Pool real (spawn): el worker importa la app desde cero y usa su engine."""
+    db_path = tmp_path / "spawn.db"
+    monkeypatch.setenv("BACKEND_DB_PSQL_URL", f"sqlite+aiosqlite:///{db_path}")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(training_service, "get_async_session_local", lambda: factory)
+    monkeypatch.setattr(TrainingService, "_pool", None)
+    async with factory() as session:
+        job_id = (await TrainingJobRepository.create(session, stage="dev")).id
+
+    try:
+        result = await TrainingService.wait_for_worker(job_id, force=False)
+    finally:
+        TrainingService.shutdown()
+
+    job = await get_job(engine, job_id)
+    await engine.dispose()
+    # El worker marcó el job en su propio engine y su error (SQLite no tiene
+    # las funciones de Postgres del versioner) volvió serializado al proceso
+    assert result is None
+    assert job.started_at is not None
+    assert job.status == "failed"
+    assert job.error
+
+
+@pytest.mark.asyncio
+async def test_background_trigger_validates_the_stage(
+    async_client: AsyncClient, monkeypatch
+):
+    start = AsyncMock()
+    monkeypatch.setattr(TrainingService, "start", start)
+    headers = {"x-token": settings.security_config.admin_secret}
+
+    r = await async_client.post(
+        f"{BASE}/internal/trigger-background?stage=staging", headers=headers
+    )
+    assert r.status_code == 400
+    start.assert_not_awaited()
+
+
+def test_api_imports_without_posix_only_modules():
+    # En Windows no existen fcntl ni resource: la app debe poder importarse
+    code = (
+        "import sys; sys.modules['fcntl'] = None; sys.modules['resource'] = None; "
+        "import app.main"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
@@ -0,0 +1,240 @@
+from datetime import datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.databases.postgresql.models import Diagnostic, Episode
+from app.databases.postgresql.models.base import BaseModel
+from app.databases.postgresql.models.episode import episode_diagnostic
+from app.repositories.episode import EpisodeRepository
+from ml_package.saluai5_ml.training_pipeline.data_ingestion.loader import DataLoader
+from ml_package.saluai5_ml.training_pipeline.data_ingestion.snapshot import (
+    TrainingSnapshot,
+)
+from ml_package.saluai5_ml.training_pipeline.data_preparation.cleaner import DataCleaner
+
+LABELS = [" pertinente ", "NO PERTINENTE", None, "OTRO", "No Pertinente", "PERTINENTE"]
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'training.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(BaseModel.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with factory() as session:
+        session.add_all(
+            [Diagnostic(id=1, cie_code="I21"), Diagnostic(id=2, cie_code="J18")]
+        )
+        for i, label in enumerate(LABELS, start=1):
+            session.add(
+                Episode(
+                    id=i,
+                    patient_id=1,
+                    numero_episodio=str(i),
+                    validacion=label,
+                    tipo="SIN ALERTA" if i % 2 else None,
+                    tipo_alerta_ugcc="SIN ALERTA",
+                    tipo_cama="BASICA",
+                    triage=i,
+                    presion_sistolica=Decimal("120.5") if i % 3 else None,
+                    antecedentes_cardiaco=[True, False, None][i % 3],
+                )
+            )
+        await session.flush()
+        await session.execute(
+            episode_diagnostic.insert(),
+            [
+                {"episode_id": 1, "diagnostic_id": 1},
+                {"episode_id": 1, "diagnostic_id": 2},
+                {"episode_id": 6, "diagnostic_id": 2},
+            ],
+        )
+        await session.commit()
+    yield factory
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_loader_filters_in_sql_and_builds_typed_columns(session_factory):
+    async with session_factory() as session:
+        loader = DataLoader(session)
+        loader.chunk_size = 2
+        df = await loader.fetch_all_episodes_df()
+
+    assert df["id_episodio"].tolist() == [1, 2, 5, 6]
+    assert df["validacion"].tolist() == [
+        "PERTINENTE",
+        "NO PERTINENTE",
+        "NO PERTINENTE",
+        "PERTINENTE",
+    ]
+    assert df["id_episodio"].dtype == np.int64
+    assert df["presion_sistolica"].dtype == np.float64
+    assert df["triage"].dtype == np.float64
+    assert str(df["antecedentes_cardiaco"].dtype) == "Int8"
+    assert df["antecedentes_cardiaco"].isna().tolist() == [False, True, True, False]
+    assert np.isnan(df["presion_sistolica"][3])
+    assert df["diagnostics"].tolist() == [["I21", "J18"], [], [], ["J18"]]
+
+
+@pytest.mark.asyncio
+async def test_cleaner_imputes_typed_binary_columns(session_factory):
+    async with session_factory() as session:
+        df = await DataLoader(session).fetch_all_episodes_df()
+
+    cleaner = DataCleaner("dev")
+    cleaner.imputation_statistics = {"binary": {}, "numerical": {}, "categorical": {}}
+    data = cleaner.run_preprocessing(df)
+
+    mode = cleaner.imputation_statistics["binary"]["antecedentes_cardiaco"]
+    assert mode is False
+    assert data["antecedentes_cardiaco"].dtype == np.int8
+    assert data["antecedentes_cardiaco"].tolist() == [0, 0, 0, 1]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_refresh_only_applies_changed_episodes(
+    session_factory, tmp_path
+):
+    snapshot = TrainingSnapshot(tmp_path / "snapshot", overlap_seconds=0)
+    async with session_factory() as session:
+        first = await snapshot.refresh(session)
+        assert first["mode"] == "full"
+        assert first["manifest"]["rows"] == 4
+
+        later = datetime(2030, 1, 1)
+        await session.execute(
+            update(Episode)
+            .where(Episode.id == 2)
+            .values(triage=9, features_updated_at=later)
+        )
+        await session.execute(
+            update(Episode)
+            .where(Episode.id == 5)
+            .values(validacion="OTRO", features_updated_at=later)
+        )
+        await session.execute(
+            episode_diagnostic.insert(), [{"episode_id": 2, "diagnostic_id": 1}]
+        )
+        session.add(
+            Episode(
+                id=7,
+                patient_id=1,
+                numero_episodio="7",
+                validacion="pertinente",
+                tipo="URGENCIA",
+                tipo_alerta_ugcc="SIN ALERTA",
+                tipo_cama="BASICA",
+                triage=1,
+                created_at=later,
+            )
+        )
+        await session.execute(delete(Episode).where(Episode.id == 6))
+        await session.commit()
+
+        second = await snapshot.refresh(session)
+        loader = DataLoader(session)
+        expected = await loader.fetch_all_episodes_df()
+        third = await snapshot.refresh(session)
+
+    assert second["mode"] == "incremental"
+    assert second["changed"] == 2
+    assert third["mode"] == "unchanged"
+    assert sorted(p.name for p in (tmp_path / "snapshot").glob("v*")) == ["v1", "v2"]
+
+    df = snapshot.to_dataframe(loader)
+    pd.testing.assert_frame_equal(df, expected)
+    assert df["id_episodio"].tolist() == [1, 2, 7]
+    assert df["diagnostics"].tolist() == [["I21", "J18"], ["I21"], []]
+
+
+@pytest.mark.asyncio
+async def test_rescoring_does_not_trigger_a_snapshot_delta(session_factory, tmp_path):
+    snapshot = TrainingSnapshot(tmp_path / "snapshot", overlap_seconds=0)
+    async with session_factory() as session:
+        await session.execute(
+            update(Episode).values(created_at=datetime(2020, 1, 1), updated_at=None)
+        )
+        await session.commit()
+        await snapshot.refresh(session)
+
+        # Re-score tras una promoción y cierre de un caso: no son datos del modelo
+        await EpisodeRepository.bulk_update_model_recommendations(
+            session, {i: "PERTINENTE" for i in range(1, 7)}
+        )
+        await EpisodeRepository.update_model_recommendation(session, 2, "NO PERTINENTE")
+        episode = await session.get(Episode, 1)
+        episode.estado_del_caso = "Cerrado"
+        await session.commit()
+
+        result = await snapshot.refresh(session)
+
+    assert result["mode"] == "unchanged"
+    assert result["manifest"]["version"] == 1
+
+
+@pytest.mark.asyncio
+async def test_dataset_fingerprint_tracks_labels_and_settings(session_factory):
+    async with session_factory() as session:
+        loader = DataLoader(session)
+        first = await loader.get_dataset_fingerprint({"search": False})
+        assert first == await loader.get_dataset_fingerprint({"search": False})
+        assert first != await loader.get_dataset_fingerprint({"search": True})
+
+        # Un episodio sin validación válida no forma parte del conjunto
+        await session.execute(update(Episode).where(Episode.id == 4).values(triage=9))
+        await session.commit()
+        assert first == await loader.get_dataset_fingerprint({"search": False})
+
+        await session.execute(
+            update(Episode)
+            .where(Episode.id == 2)
+            .values(validacion="PERTINENTE", updated_at=Episode.created_at)
+        )
+        await session.commit()
+        second = await loader.get_dataset_fingerprint({"search": False})
+        assert first != second
+
+        # Cambia una feature de un episodio validado, sin tocar updated_at
+        await session.execute(
+            update(Episode)
+            .where(Episode.id == 1)
+            .values(triage=7, updated_at=Episode.updated_at)
+        )
+        await session.commit()
+        third = await loader.get_dataset_fingerprint({"search": False})
+        assert third != second
+
+        # La recomendación del modelo no es parte de las filas de entrenamiento
+        await session.execute(update(Episode).values(recomendacion_modelo="PERTINENTE"))
+        await session.commit()
+        assert third == await loader.get_dataset_fingerprint({"search": False})
+
+
+@pytest.mark.asyncio
+async def test_only_data_edits_touch_features_updated_at(session_factory):
+    async with session_factory() as session:
+        episode = await session.get(Episode, 1)
+        episode.estado_del_caso = "Cerrado"
+        episode.recomendacion_modelo = "PERTINENTE"
+        await session.commit()
+        await session.refresh(episode)
+        assert episode.updated_at is not None
+        assert episode.features_updated_at is None
+
+        episode.triage = 4
+        await session.commit()
+        await session.refresh(episode)
+        assert episode.features_updated_at is not None
+
+
+def test_each_stage_has_its_own_snapshot_directory():
+    dev, prod = TrainingSnapshot(stage="dev"), TrainingSnapshot(stage="prod")
+    assert dev.path.parent == prod.path.parent
+    assert (dev.path.name, prod.path.name) == ("dev", "prod")
@@ -0,0 +1,66 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from httpx import AsyncClient
+
+from app.services.ml_model_services.warmup_service import ModelWarmup, model_warmup
+
+
+@pytest.mark.asyncio
+async def test_warmup_is_ready_only_once_every_stage_loads(monkeypatch):
+    warmup = ModelWarmup()
+    monkeypatch.setattr(warmup, "open_db_connections", AsyncMock(return_value=2))
+    attempts = []
+    loaded = asyncio.Event()
+
+    async def warm_up_stage(stage):
+        attempts.append(stage)
+        if stage == "dev" and not loaded.is_set():
+            raise FileNotFoundError("missing artifacts")
+        return {"status": "warm", "version": f"{stage}_v3"}
+
+    monkeypatch.setattr(warmup, "warm_up_stage", warm_up_stage)
+    assert warmup.status()["status"] == "warming_up"
+
+    task = asyncio.create_task(
+        warmup.run(stages=["prod", "dev"], db_connections=2, retry_seconds=0.01)
+    )
+    await asyncio.sleep(0.05)
+
+    status = warmup.status()
+    assert status["status"] == "warming_up"
+    assert status["db_connections"] == 2
+    assert status["stages"]["prod"] == {"status": "warm", "version": "prod_v3"}
+    assert status["stages"]["dev"]["status"] == "error"
+    assert status["failed_stages"] == ["dev"]
+
+    # Solo se reintenta el stage que falló
+    loaded.set()
+    await asyncio.wait_for(task, timeout=1)
+    status = warmup.status()
+    assert status["status"] == "ready"
+    assert status["failed_stages"] == []
+    assert attempts.count("prod") == 1
+    assert attempts.count("dev") > 1
+
+
+def test_synthetic_episode_has_every_feature():
+    episode = ModelWarmup.synthetic_episode()
+    assert episode["diagnostics"] == []
+    assert "presion_media" in episode
+    assert "id_episodio" not in episode
+
+
+@pytest.mark.asyncio
+async def test_ready_endpoint_is_separate_from_health(
+    async_client: AsyncClient, monkeypatch
+):
+    monkeypatch.setattr(model_warmup, "ready", False)
+    assert (await async_client.get("/ready")).status_code == 503
+    assert (await async_client.get("/health")).status_code == 200
+
+    monkeypatch.setattr(model_warmup, "ready", True)
+    r = await async_client.get("/ready")
+    assert r.status_code == 200
+    assert r.json()["status"] == "ready"
@@ -130,3 +130,33 @@ async def test_predict_internal_exception(
         r = await async_client.post(f"{BASE}/", json={"model_type": "random_forest"})
         assert r.status_code == 500
         assert "Error al realizar la predicción" in r.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_predict_batch_updates_existing_episodes(
+    async_client: AsyncClient,
+    auth_user_manager_safe,
+    doctor_user,
+    db_session: AsyncSession,
+):
+    """El batch predice todos los formularios y actualiza los episodios existentes"""
+    auth_user_manager_safe(doctor_user, is_doctor=True)
+    ep = await seed_episode(db_session)
+
+    with patch.object(
+        prediction_service.PredictionService,
+        "predict_episodes_pertinence",
+        return_value=[fake_prediction(), fake_prediction(label="NO PERTINENTE")],
+    ):
+        r = await async_client.post(
+            f"{BASE}/batch",
+            json=[
+                {"model_type": "random_forest", "id_episodio": ep.id, "triage": 3},
+                {"model_type": "random_forest", "id_episodio": 9999, "triage": 2},
+            ],
+        )
+        assert r.status_code == 200
+        data = r.json()
+        assert [item["label"] for item in data] == ["PERTINENTE", "NO PERTINENTE"]
+        assert "added" in data[0]["update_episode"]
+        assert "not found" in data[1]["update_episode"]